@@ -35,6 +35,9 @@ bl_info = {
 import bpy
 from .export_formats import *
 from .tk_utils import *
+from .tk_utils import search as search_utils
+from .tk_utils import presets as preset_utils
+from .update import update_list
 from .update import *
 from .properties import *
 
@@ -71,24 +74,25 @@ from .properties.export_properties import (
     )
 
 
-def GetGlobalPresets(scene, context):
-
-    items = [
-        ("0", "None",  "", 0),
-        ]
-
-    preferences = context.preferences
-    addon_prefs = preferences.addons[__package__].preferences
-    cap_file = addon_prefs.saved_export_presets
+def BuildGlobalPresetItems(presets):
 
-    u = 1
+    items = list(preset_utils.NO_PRESET_ITEMS)
 
-    for i,x in enumerate(cap_file):
+    for i,x in enumerate(presets):
         items.append((str(i+1), x.name, x.description, i+1))
 
     return items
 
 
+def GetGlobalPresets(scene, context):
+
+    preferences = context.preferences
+    addon_prefs = preferences.addons[__package__].preferences
+
+    return preset_utils.GetCachedEnumItems('saved_export_presets', addon_prefs.saved_export_presets, 
+        BuildGlobalPresetItems)
+
+
 class CAP_AddonPreferences(AddonPreferences):
     bl_idname = __name__
 
@@ -145,6 +149,42 @@ class CAP_AddonPreferences(AddonPreferences):
     )
 
 
+    use_incremental_export: BoolProperty(
+        name = "Skip Unchanged Exports",
+        description = "Skips exporting Objects and Collections whose meshes, transforms, modifiers, materials, Export Preset and file path haven't changed since they were last exported.  \n\nA manifest file named .capsule_manifest.json is saved in each export folder to keep track of what was exported",
+        default = False,
+    )
+
+    use_export_trace: BoolProperty(
+        name = "Save Export Traces",
+        description = "Records how long every part of an export takes and saves it as capsule_trace.json next to the exported files.  \n\nThe trace can be opened in a trace viewer like chrome://tracing or https://ui.perfetto.dev to find slow exports",
+        default = False,
+    )
+
+    use_modal_export: BoolProperty(
+        name = "Export In Background",
+        description = "Exports from the Capsule panels and menus one Export Target at a time, showing the progress in the Capsule panels and letting you cancel the export by pressing Esc.  \n\nThe scene is restored to how it was before the export when cancelled",
+        default = False,
+    )
+
+    mesh_cache_size: IntProperty(
+        name = "Mesh Cache Size (MB)",
+        description = "How much memory can be used to keep evaluated meshes during an export, so objects exported more than once are only evaluated once.  Only used by the fast STL and OBJ writers.  \n\nThe least recently used meshes are removed when the cache is full.  Set to 0 to turn the cache off",
+        default = 512,
+        min = 0,
+        soft_max = 4096,
+    )
+
+    export_worker_count: IntProperty(
+        name = "Parallel Export Workers",
+        description = "The number of background Blender processes used to export at the same time.  When set higher than 1, exports are split between workers that each open the saved .blend file, so the file must be saved with no unsaved changes.  \n\nIf it isn't, Capsule will export in the current Blender session instead",
+        default = 1,
+        min = 1,
+        soft_max = 16,
+        max = 64,
+    )
+
+
     data_missing : BoolProperty(default = False)
     plugin_is_ready : BoolProperty(default = False)
     prev_selected_obj : StringProperty(default= '')
@@ -292,26 +332,7 @@ class CAP_AddonPreferences(AddonPreferences):
                 # TODO: Allow exporters to report issues and warnings based on configurations to be populated higher
                 # in the UI hierarchy.
                 # TODO: When a tab is changed in one format type, try to have it changed in all other types using an updater.
-                if currentExp.format_type == 'FBX':
-                    currentExp.data_fbx.draw_addon_preferences(format_type_box, currentExp.data_fbx, cap_file, currentExp)
-
-                elif currentExp.format_type == 'OBJ':
-                    currentExp.data_obj.draw_addon_preferences(format_type_box, currentExp.data_obj, cap_file, currentExp)
-
-                elif currentExp.format_type == 'GLTF':
-                    currentExp.data_gltf.draw_addon_preferences(format_type_box, currentExp.data_gltf, cap_file, currentExp)
-                
-                elif currentExp.format_type == 'Alembic':
-                    currentExp.data_abc.draw_addon_preferences(format_type_box, currentExp.data_abc, cap_file, currentExp)
-                
-                elif currentExp.format_type == 'Collada':
-                    currentExp.data_dae.draw_addon_preferences(format_type_box, currentExp.data_dae, cap_file, currentExp)
-                
-                elif currentExp.format_type == 'STL':
-                    currentExp.data_stl.draw_addon_preferences(format_type_box, currentExp.data_stl, cap_file, currentExp)
-                
-                elif currentExp.format_type == 'USD':
-                    currentExp.data_usd.draw_addon_preferences(format_type_box, currentExp.data_usd, cap_file, currentExp)
+                GetExporter(currentExp.format_type).draw_addon_preferences(format_type_box, currentExp, cap_file)
 
             else:
                 preset_unselected = file_presets_box.column(align= True)
@@ -399,6 +420,14 @@ class CAP_AddonPreferences(AddonPreferences):
             extras_content.separator()
             extras_content.separator()
 
+            extras_content.prop(addon_prefs, "use_incremental_export")
+            extras_content.prop(addon_prefs, "export_worker_count")
+            extras_content.prop(addon_prefs, "use_modal_export")
+            extras_content.prop(addon_prefs, "mesh_cache_size")
+            extras_content.prop(addon_prefs, "use_export_trace")
+            extras_content.separator()
+            extras_content.separator()
+
             erase_options = extras_content.column(align= True)
             erase_options.operator("scene.cap_resetsceneprops", text = "Reset Capsule Scene Data", icon = "TRASH")
             erase_options.separator()
@@ -433,6 +462,7 @@ def CreateDefaultData(scene):
     defaultDatablock = bpy.context.view_layer.objects.active
     defaultDatablock.name = addon_prefs.default_datablock
     defaultDatablock.CAPFile.is_storage_object = True
+    defaultDatablock.CAPFile.preset_id_version = preset_utils.PRESET_ID_VERSION
 
     # hide it!
     defaultDatablock.hide_set(True)
@@ -442,27 +472,177 @@ def CreateDefaultData(scene):
 
 
 @persistent
-def CheckSelectedObject(scene):
+def ClearCollectionIndexes(scene, depsgraph = None):
     """
-    A scene handler used to configure the status of previously selected objects and multi-edit opportunities behind the scenes.
+    A handler that clears the cached scene collection indexes whenever collections or scenes change.
     """
 
+    if depsgraph is not None:
+        if depsgraph.id_type_updated('COLLECTION') is False and depsgraph.id_type_updated('SCENE') is False:
+            return
+    
+    search_utils.ClearSceneCollectionIndexes()
+
+
+@persistent
+def ClearCollectionIndexesOnLoad(*args):
+    """
+    A handler that clears the cached scene collection indexes when a new file is loaded.
+    """
+
+    search_utils.ClearSceneCollectionIndexes()
+
+
+
+# The number of objects and collections in the file when the Export Lists were last checked for deleted entries.
+export_list_id_counts = None
+
+
+@persistent
+def RemoveDeletedExportListItems(scene, depsgraph = None):
+    """
+    A handler that removes Export List entries for deleted objects and collections.
+    Only the number of objects and collections is checked on each update, so this stays cheap.
+    """
+
+    global export_list_id_counts
+
+    id_counts = (len(bpy.data.objects), len(bpy.data.collections))
+    if id_counts == export_list_id_counts:
+        return
+    
+    # Only deletions can leave dead entries behind.
+    if export_list_id_counts is not None and id_counts[0] >= export_list_id_counts[0] \
+            and id_counts[1] >= export_list_id_counts[1]:
+        export_list_id_counts = id_counts
+        return
+    
+    export_list_id_counts = id_counts
+    update_list.RemoveDeletedExportListItems(scene)
+
+
+@persistent
+def ClearExportListIndexesOnUndo(*args):
+    """
+    A handler that clears the Export List indexes after an undo, redo or file load, as the objects
+    and collections they point to are replaced.
+    """
+
+    global export_list_id_counts
+    export_list_id_counts = None
+
+    update_list.ClearExportListIndexes()
+
+
+@persistent
+def MigratePresetIDsOnLoad(*args):
+    """
+    A handler that converts files from before presets had IDs when they're loaded, and clears the preset
+    indexes for the new file.  Also used as a timer when Capsule is enabled with a file already open.
+    """
+
+    preset_utils.ClearPresetIndexes()
+
     preferences = bpy.context.preferences
     addon_prefs = preferences.addons[__name__].preferences
-    proxy = bpy.context.scene.CAPProxy
+
+    datablock = bpy.data.objects.get(addon_prefs.default_datablock)
+    if datablock is not None:
+        if preset_utils.MigratePresetIDs(datablock.CAPFile) is True:
+            print("Capsule - Converted Export and Location Presets to use IDs.")
+    
+    return None
+
+
+@persistent
+def ClearPresetIndexesOnUndo(*args):
+    """
+    A handler that clears the preset indexes after an undo or redo, as the objects and collections they
+    point to are replaced.
+    """
+
+    preset_utils.ClearPresetIndexes()
+
+
+# The selection the proxy properties were last synced to, see GetSelectionFingerprint().
+selection_fingerprint = None
+
+# How long to wait after the selection stops changing before syncing the proxy properties, in seconds.
+PROXY_SYNC_DELAY = 0.1
+
+
+def GetSelectionFingerprint(context):
+    """
+    Returns a cheap summary of the current selection that changes whenever the active object, the number
+    of selected objects or the active collection in the Outliner does.
+    """
+
+    view_layer = context.view_layer
+    active_object = view_layer.objects.active
+
+    return (
+        active_object.as_pointer() if active_object is not None else 0,
+        len(view_layer.objects.selected),
+        view_layer.active_layer_collection.as_pointer(),
+    )
+
+
+@persistent
+def CheckSelectedObject(scene, depsgraph = None):
+    """
+    A scene handler that checks whether the selection has changed and if so schedules SyncSelectedObject.
+    Depsgraph updates happen on every frame of playback and every sculpt stroke, so this needs to stay cheap.
+    """
+
+    global selection_fingerprint
+
+    fingerprint = GetSelectionFingerprint(bpy.context)
+    if fingerprint == selection_fingerprint:
+        return
+    
+    selection_fingerprint = fingerprint
+
+    # Restarting the timer means rapid selection changes only sync once they settle down.
+    if bpy.app.timers.is_registered(SyncSelectedObject):
+        bpy.app.timers.unregister(SyncSelectedObject)
+    
+    bpy.app.timers.register(SyncSelectedObject, first_interval = PROXY_SYNC_DELAY)
+
+
+def SyncSelectedObject():
+    """
+    A timer used to configure the status of previously selected objects and multi-edit opportunities behind the scenes.
+    """
+
+    # Timers have no window or screen, so the selection is read from the view layer instead of the context.
+    context = bpy.context
+    scene = context.scene
+    view_layer = context.view_layer
+    if scene is None or view_layer is None:
+        return None
+    
+    # Exports change the selection as they go, so wait until they're finished.
+    if scene.CAPStatus.is_exporting is True:
+        return PROXY_SYNC_DELAY
+
+    preferences = context.preferences
+    addon_prefs = preferences.addons[__name__].preferences
+    proxy = scene.CAPProxy
+    selected_objects = view_layer.objects.selected
+    active_object = view_layer.objects.active
     #print("SCENE UPDATE")
 
     # If the active selected object changes or anything else about the selection, we need to update the edit toggles
-    if bpy.context.active_object is not None:
-        if bpy.context.active_object.name != addon_prefs.prev_selected_obj or len(bpy.context.selected_objects) != addon_prefs.prev_selected_obj_count:
-            addon_prefs.prev_selected_obj = bpy.context.active_object.name
-            addon_prefs.prev_selected_obj_count = len(bpy.context.selected_objects)
+    if active_object is not None:
+        if active_object.name != addon_prefs.prev_selected_obj or len(selected_objects) != addon_prefs.prev_selected_obj_count:
+            addon_prefs.prev_selected_obj = active_object.name
+            addon_prefs.prev_selected_obj_count = len(selected_objects)
 
-            for item in bpy.context.selected_objects:
+            for item in selected_objects:
                 item.CAPObj.enable_edit = True
             
             # update the proxy objects with the current selection
-            obj = bpy.context.active_object.CAPObj
+            obj = active_object.CAPObj
 
             # Disable updates before editing, enable afterwards
             proxy.disable_updates = True
@@ -476,11 +656,11 @@ def CheckSelectedObject(scene):
 
             proxy.disable_updates = False
     
-    elif len(bpy.context.selected_objects) != addon_prefs.prev_selected_obj_count:
-        addon_prefs.prev_selected_obj_count = len(bpy.context.selected_objects)
-        return
+    elif len(selected_objects) != addon_prefs.prev_selected_obj_count:
+        addon_prefs.prev_selected_obj_count = len(selected_objects)
+        return None
     
-    current_col = search_utils.GetActiveCollection() 
+    current_col = search_utils.GetActiveCollection(scene, view_layer)
     if current_col is not None:
         if current_col.name != addon_prefs.prev_selected_col:
 
@@ -502,6 +682,18 @@ def CheckSelectedObject(scene):
 
             proxy.disable_updates = False
     
+    return None
+
+
+@persistent
+def ClearSelectionFingerprint(*args):
+    """
+    A handler that forgets the last selection when a new file is loaded, so the proxy properties are synced again.
+    """
+
+    global selection_fingerprint
+    selection_fingerprint = None
+    
     
 
 #---------------------------------------------------------
@@ -646,6 +838,19 @@ def register():
     # export_presets.CreatePresets()
     bpy.app.handlers.load_pre.append(CreateDefaultData)
     bpy.app.handlers.depsgraph_update_post.append(CheckSelectedObject)
+    bpy.app.handlers.depsgraph_update_post.append(ClearCollectionIndexes)
+    bpy.app.handlers.load_post.append(ClearCollectionIndexesOnLoad)
+    bpy.app.handlers.load_post.append(ClearSelectionFingerprint)
+    bpy.app.handlers.depsgraph_update_post.append(RemoveDeletedExportListItems)
+    bpy.app.handlers.undo_post.append(ClearExportListIndexesOnUndo)
+    bpy.app.handlers.redo_post.append(ClearExportListIndexesOnUndo)
+    bpy.app.handlers.load_post.append(ClearExportListIndexesOnUndo)
+    bpy.app.handlers.load_post.append(MigratePresetIDsOnLoad)
+    bpy.app.handlers.undo_post.append(ClearPresetIndexesOnUndo)
+    bpy.app.handlers.redo_post.append(ClearPresetIndexesOnUndo)
+
+    # Files that are already open when Capsule is enabled won't trigger a load.
+    bpy.app.timers.register(MigratePresetIDsOnLoad, first_interval = 0.1)
 
     add_hotkeys()
 
@@ -660,6 +865,22 @@ def unregister():
     # export_presets.DeletePresets()
     bpy.app.handlers.load_pre.remove(CreateDefaultData)
     bpy.app.handlers.depsgraph_update_post.remove(CheckSelectedObject)
+    bpy.app.handlers.depsgraph_update_post.remove(ClearCollectionIndexes)
+    bpy.app.handlers.load_post.remove(ClearCollectionIndexesOnLoad)
+    bpy.app.handlers.load_post.remove(ClearSelectionFingerprint)
+    bpy.app.handlers.depsgraph_update_post.remove(RemoveDeletedExportListItems)
+    bpy.app.handlers.undo_post.remove(ClearExportListIndexesOnUndo)
+    bpy.app.handlers.redo_post.remove(ClearExportListIndexesOnUndo)
+    bpy.app.handlers.load_post.remove(ClearExportListIndexesOnUndo)
+    bpy.app.handlers.load_post.remove(MigratePresetIDsOnLoad)
+    bpy.app.handlers.undo_post.remove(ClearPresetIndexesOnUndo)
+    bpy.app.handlers.redo_post.remove(ClearPresetIndexesOnUndo)
+
+    if bpy.app.timers.is_registered(MigratePresetIDsOnLoad):
+        bpy.app.timers.unregister(MigratePresetIDsOnLoad)
+
+    if bpy.app.timers.is_registered(SyncSelectedObject):
+        bpy.app.timers.unregister(SyncSelectedObject)
 
 
     # Delete custom datablocks
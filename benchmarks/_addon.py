@@ -0,0 +1,33 @@
+# ///////////////////////////////////////////////////////////////////
+# Finds and imports the installed Capsule addon for the benchmark scripts.
+# ///////////////////////////////////////////////////////////////////
+
+# Benchmarks are run with "blender --python", so they aren't imported as part of the addon package.
+# Each script adds this folder to sys.path and imports this module to reach the addon.
+
+import importlib, os
+
+
+# The addon's module name is the name of the folder it was installed into, which isn't always "Capsule".
+ADDON_NAME = os.path.basename(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def EnableAddon():
+    """
+    Enables the addon for this Blender session without saving it to the user preferences.
+    """
+
+    import addon_utils
+
+    addon_utils.enable(ADDON_NAME, default_set = False)
+
+
+def ImportAddonModule(name = None):
+    """
+    Imports a module of the installed addon by its path inside the addon, or the addon itself if no name is given.
+    """
+
+    if name is None:
+        return importlib.import_module(ADDON_NAME)
+
+    return importlib.import_module(ADDON_NAME + "." + name)
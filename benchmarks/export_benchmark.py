@@ -0,0 +1,542 @@
+# ///////////////////////////////////////////////////////////////////
+# Measures how the export pipeline scales with synthetic scenes.
+# ///////////////////////////////////////////////////////////////////
+
+# Usage (the Capsule addon must be installed and enabled in the user preferences):
+#
+#   blender -b --factory-startup --python <addon folder>/benchmarks/export_benchmark.py -- --suite default --result bench.json
+#   blender -b --factory-startup --python <addon folder>/benchmarks/export_benchmark.py -- --objects 20000 --depth 4
+#   blender --factory-startup --python <addon folder>/benchmarks/export_benchmark.py -- --suite quick --result bench.json
+#
+# Each scene is generated from a set of parameters, exported with ExportTargets and then the heavier
+# helpers are timed on their own.  Results are written as JSON so runs from different releases can be compared.
+#
+# Background sessions (-b) have no window or 3D View, so they only measure the headless fallbacks - origin moves
+# are made with MoveAllHeadless and BuildSceneContext uses the current view layer.  Leave out -b to measure the
+# operator origin moves and the Capsule view layer switch.  The paths that were measured are listed in the results.
+
+import bpy, json, os, shutil, sys, tempfile, time
+
+
+# The benchmarks folder isn't on sys.path when a script is run with "blender --python".
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _addon import ADDON_NAME, EnableAddon, ImportAddonModule
+
+
+# Scene parameter sets that --suite can run one after the other.
+BENCHMARK_SUITES = {
+    'quick': [
+        {'name': 'quick', 'objects': 500, 'collections': 10},
+    ],
+    'default': [
+        {'name': 'small', 'objects': 1000, 'collections': 20},
+        {'name': 'medium', 'objects': 10000, 'collections': 100},
+        {'name': 'large', 'objects': 50000, 'collections': 500},
+        {'name': 'deep_hierarchy', 'objects': 10000, 'collections': 100, 'depth': 16},
+        {'name': 'constrained', 'objects': 10000, 'collections': 100, 'constraint_ratio': 0.5, 'armature_ratio': 0.05},
+        {'name': 'modifier_heavy', 'objects': 10000, 'collections': 100, 'modifiers': 4},
+    ],
+}
+
+# The parameters used for anything a scene doesn't set itself.
+DEFAULT_PARAMETERS = {
+    'name': 'custom',
+    'objects': 1000,
+    'collections': 20,
+    'depth': 2,
+    'constraint_ratio': 0.05,
+    'armature_ratio': 0.01,
+    'modifiers': 1,
+    'export_ratio': 0.01,
+    'collection_export_ratio': 0.1,
+}
+
+# The export statistics that are reported for each scene.
+EXPORT_STAT_KEYS = ('scene_setup_time', 'export_process_time', 'export_task_api_time', 'scene_restore_time',
+    'obj_exported', 'col_exported')
+
+MODIFIER_TYPES = ('BEVEL', 'TRIANGULATE', 'ARRAY', 'WEIGHTED_NORMAL')
+
+
+def ParseArguments(argv):
+    """
+    Parses the arguments that were given after Blender's "--" separator.
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog = "export_benchmark.py",
+        description = "Times the Capsule export pipeline against generated scenes.",
+    )
+
+    parser.add_argument("--suite", choices = sorted(BENCHMARK_SUITES.keys()), default = None,
+        help = "Runs a predefined set of scenes instead of a single scene built from the other arguments.")
+    parser.add_argument("--objects", type = int, default = DEFAULT_PARAMETERS['objects'],
+        help = "The number of objects to create.")
+    parser.add_argument("--collections", type = int, default = DEFAULT_PARAMETERS['collections'],
+        help = "The number of nested collections to sort the objects into.")
+    parser.add_argument("--depth", type = int, default = DEFAULT_PARAMETERS['depth'],
+        help = "How many levels deep objects are parented to each other.")
+    parser.add_argument("--constraint-ratio", type = float, default = DEFAULT_PARAMETERS['constraint_ratio'],
+        help = "The fraction of objects that have a constraint.")
+    parser.add_argument("--armature-ratio", type = float, default = DEFAULT_PARAMETERS['armature_ratio'],
+        help = "The fraction of objects that are armatures with bone constraints.")
+    parser.add_argument("--modifiers", type = int, default = DEFAULT_PARAMETERS['modifiers'],
+        help = "The number of modifiers added to every mesh.")
+    parser.add_argument("--export-ratio", type = float, default = DEFAULT_PARAMETERS['export_ratio'],
+        help = "The fraction of objects that are exported.")
+    parser.add_argument("--collection-export-ratio", type = float, default = DEFAULT_PARAMETERS['collection_export_ratio'],
+        help = "The fraction of collections that are exported.")
+    parser.add_argument("--repeat", type = int, default = 3,
+        help = "How many times each helper is timed.  The fastest run is reported.")
+    parser.add_argument("--result", default = None,
+        help = "Where to write the JSON results.  Defaults to printing them.")
+
+    return parser.parse_args(argv)
+
+
+def GetScenes(args):
+    """
+    Returns the list of scene parameters to benchmark from the command line arguments.
+    """
+
+    if args.suite is not None:
+        scenes = BENCHMARK_SUITES[args.suite]
+    else:
+        scenes = [{
+            'objects': args.objects,
+            'collections': args.collections,
+            'depth': args.depth,
+            'constraint_ratio': args.constraint_ratio,
+            'armature_ratio': args.armature_ratio,
+            'modifiers': args.modifiers,
+            'export_ratio': args.export_ratio,
+            'collection_export_ratio': args.collection_export_ratio,
+        }]
+
+    return [dict(DEFAULT_PARAMETERS, **scene) for scene in scenes]
+
+
+def GetStep(ratio):
+    """
+    Turns a ratio into an interval, so every nth item can be picked.  Returns 0 if nothing should be picked.
+    """
+
+    if ratio <= 0:
+        return 0
+
+    return max(1, int(round(1 / ratio)))
+
+
+def ClearScene(context):
+    """
+    Removes every object and collection from the current scene, along with their data.
+    """
+
+    scene = context.scene
+
+    bpy.data.batch_remove(list(scene.objects))
+    bpy.data.batch_remove([c for c in bpy.data.collections if scene.user_of_id(c)])
+    bpy.data.batch_remove([m for m in bpy.data.meshes if m.users == 0])
+    bpy.data.batch_remove([a for a in bpy.data.armatures if a.users == 0])
+
+
+def CreateCapsuleData(context, export_directory):
+    """
+    Creates the Capsule data object with a single OBJ export preset and a location preset for the given directory.
+    """
+
+    preset_utils = ImportAddonModule("tk_utils.presets")
+
+    preferences = context.preferences
+    addon_prefs = preferences.addons[ADDON_NAME].preferences
+
+    datablock = bpy.data.objects.new(addon_prefs.default_datablock, None)
+    context.scene.collection.objects.link(datablock)
+    datablock.hide_viewport = True
+    datablock.hide_render = True
+    datablock.hide_select = True
+
+    cap_file = datablock.CAPFile
+    cap_file.is_storage_object = True
+    cap_file.preset_id_version = preset_utils.PRESET_ID_VERSION
+
+    export_preset = cap_file.export_presets.add()
+    export_preset.name = "Benchmark"
+    export_preset.format_type = 'OBJ'
+    preset_utils.AssignPresetID(cap_file.export_presets, export_preset)
+
+    location_preset = cap_file.location_presets.add()
+    location_preset.name = "Benchmark"
+    location_preset.path = export_directory + os.sep
+    preset_utils.AssignPresetID(cap_file.location_presets, location_preset)
+
+    return datablock
+
+
+def CreateArmatureData(context):
+    """
+    Creates a small armature datablock shared by every generated armature.
+    """
+
+    armature = bpy.data.armatures.new("Benchmark Armature")
+    builder = bpy.data.objects.new("Benchmark Armature Builder", armature)
+    context.scene.collection.objects.link(builder)
+    context.view_layer.objects.active = builder
+
+    # Bones can only be created in Edit Mode.
+    bpy.ops.object.mode_set(mode = 'EDIT')
+    parent_bone = None
+    for i in range(0, 3):
+        bone = armature.edit_bones.new("Bone." + str(i))
+        bone.head = (0.0, 0.0, i)
+        bone.tail = (0.0, 0.0, i + 1)
+        bone.parent = parent_bone
+        parent_bone = bone
+
+    bpy.ops.object.mode_set(mode = 'OBJECT')
+    bpy.data.objects.remove(builder)
+
+    return armature
+
+
+def BuildScene(context, parameters, export_directory):
+    """
+    Generates a synthetic scene from a set of parameters.  Returns a dictionary counting what was created.
+    """
+
+    scene = context.scene
+    cap_file = CreateCapsuleData(context, export_directory).CAPFile
+    export_preset_value = str(cap_file.export_presets[0].instance_id)
+    location_preset_value = str(cap_file.location_presets[0].instance_id)
+
+    mesh = bpy.data.meshes.new("Benchmark Cube")
+    mesh.from_pydata(
+        [(-1, -1, -1), (1, -1, -1), (1, 1, -1), (-1, 1, -1), (-1, -1, 1), (1, -1, 1), (1, 1, 1), (-1, 1, 1)],
+        [],
+        [(0, 1, 2, 3), (4, 7, 6, 5), (0, 4, 5, 1), (1, 5, 6, 2), (2, 6, 7, 3), (3, 7, 4, 0)],
+    )
+    mesh.update()
+
+    armature = None
+    if parameters['armature_ratio'] > 0:
+        armature = CreateArmatureData(context)
+
+    # Collections are nested as a binary tree under the scene collection.
+    collections = []
+    for i in range(0, parameters['collections']):
+        collection = bpy.data.collections.new("Collection." + str(i))
+        if i == 0:
+            scene.collection.children.link(collection)
+        else:
+            collections[(i - 1) // 2].children.link(collection)
+        collections.append(collection)
+
+    constraint_step = GetStep(parameters['constraint_ratio'])
+    armature_step = GetStep(parameters['armature_ratio'])
+    export_step = GetStep(parameters['export_ratio'])
+
+    counts = {'objects': 0, 'meshes': 0, 'armatures': 0, 'constraints': 0, 'modifiers': 0,
+        'exported_objects': 0, 'exported_collections': 0}
+
+    previous = None
+    for i in range(0, parameters['objects']):
+        if armature is not None and armature_step > 0 and i % armature_step == 0:
+            item = bpy.data.objects.new("Armature." + str(i), armature)
+            counts['armatures'] += 1
+        else:
+            item = bpy.data.objects.new("Mesh." + str(i), mesh)
+            counts['meshes'] += 1
+
+        item.location = (i % 100, (i // 100) % 100, i // 10000)
+
+        if len(collections) > 0:
+            collections[i % len(collections)].objects.link(item)
+        else:
+            scene.collection.objects.link(item)
+
+        # Objects are parented in chains that are 'depth' objects long.
+        if parameters['depth'] > 0 and previous is not None and i % (parameters['depth'] + 1) != 0:
+            item.parent = previous
+
+        if item.type == 'MESH':
+            for m in range(0, parameters['modifiers']):
+                modifier_type = MODIFIER_TYPES[m % len(MODIFIER_TYPES)]
+                item.modifiers.new(modifier_type.title(), modifier_type)
+                counts['modifiers'] += 1
+
+        if constraint_step > 0 and i % constraint_step == 0 and previous is not None:
+            constraint = item.constraints.new('COPY_ROTATION')
+            constraint.target = previous
+            counts['constraints'] += 1
+
+        if export_step > 0 and i % export_step == 0:
+            item.CAPObj.enable_export = True
+            item.CAPObj.export_preset = export_preset_value
+            item.CAPObj.location_preset = location_preset_value
+            counts['exported_objects'] += 1
+
+        counts['objects'] += 1
+        previous = item
+
+    # Bone constraints need the pose, which is only built once the scene is evaluated.
+    context.view_layer.update()
+    for item in scene.objects:
+        if item.type == 'ARMATURE' and item.pose is not None:
+            constraint = item.pose.bones[-1].constraints.new('LIMIT_ROTATION')
+            constraint.use_limit_x = True
+            counts['constraints'] += 1
+
+    collection_export_step = GetStep(parameters['collection_export_ratio'])
+    for i, collection in enumerate(collections):
+        if collection_export_step > 0 and i % collection_export_step == 0:
+            collection.CAPCol.enable_export = True
+            collection.CAPCol.export_preset = export_preset_value
+            collection.CAPCol.location_preset = location_preset_value
+            counts['exported_collections'] += 1
+
+    return counts
+
+
+def GetMeasuredPaths(context):
+    """
+    Returns which code paths the helpers that depend on having a window take in this session.
+    """
+
+    object_ops = ImportAddonModule("tk_utils.object_ops")
+
+    paths = {}
+
+    if object_ops.IsHeadless() is True:
+        paths['MoveAllFailsafe'] = "MoveAllHeadless (no 3D View, the operator move isn't measured)"
+    else:
+        paths['MoveAllFailsafe'] = "transform.translate operator"
+
+    if context.window is None:
+        paths['BuildSceneContext'] = "current view layer (no window, the Capsule view layer isn't measured)"
+    else:
+        paths['BuildSceneContext'] = "Capsule view layer"
+
+    return paths
+
+
+def TimeFunction(function, repeat):
+    """
+    Runs a function a number of times and returns the fastest time in seconds.
+    """
+
+    times = []
+    for i in range(0, repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def LegacySwitchToCapsuleViewLayer(context, scope = None):
+    """
+    The view layer switch BuildSceneContext used before the Capsule view layer was kept between exports.
+    """
+
+    object_ops = ImportAddonModule("tk_utils.object_ops")
+
+    override = object_ops.Find3DViewContext()
+
+    bpy.ops.scene.view_layer_add()
+    bpy.context.view_layer.name = "Benchmark Legacy View Layer"
+    view_layer = bpy.context.view_layer
+
+    with context.temp_override(window = override['window'], area = override['area'], 
+            region = override['region']):
+        bpy.ops.object.hide_view_clear()
+        bpy.ops.object.select_all(action= 'DESELECT')
+
+    return view_layer
+
+
+def LegacyRestorePreviousViewLayer(context, scene_records):
+    """
+    The view layer restore RestoreSceneContext used before the Capsule view layer was kept between exports.
+    """
+
+    context.window.view_layer = scene_records['capsule_view_layer']
+    bpy.ops.scene.view_layer_remove()
+    context.window.view_layer = scene_records['previous_view_layer']
+
+
+def TimeLegacySceneContext(context, repeat):
+    """
+    Times BuildSceneContext and RestoreSceneContext from start to finish with the old view layer switch
+    swapped in.  Returns the fastest build and restore times in seconds.
+    """
+
+    record_utils = ImportAddonModule("tk_utils.record")
+
+    switch = record_utils.SwitchToCapsuleViewLayer
+    restore = record_utils.RestorePreviousViewLayer
+    record_utils.SwitchToCapsuleViewLayer = LegacySwitchToCapsuleViewLayer
+    record_utils.RestorePreviousViewLayer = LegacyRestorePreviousViewLayer
+
+    build_times = []
+    restore_times = []
+
+    try:
+        for i in range(0, repeat):
+            start = time.perf_counter()
+            record = record_utils.BuildSceneContext(context)
+            build_times.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            record_utils.RestoreSceneContext(context, record)
+            restore_times.append(time.perf_counter() - start)
+
+    finally:
+        record_utils.SwitchToCapsuleViewLayer = switch
+        record_utils.RestorePreviousViewLayer = restore
+
+    return min(build_times), min(restore_times)
+
+
+def TimeHelpers(context, repeat):
+    """
+    Times the heavier export helpers on their own.  Returns a dictionary of times in seconds.
+    """
+
+    record_utils = ImportAddonModule("tk_utils.record")
+    search_utils = ImportAddonModule("tk_utils.search")
+    object_transform = ImportAddonModule("tk_utils.object_transform")
+    object_ops = ImportAddonModule("tk_utils.object_ops")
+
+    helpers = {}
+
+    build_times = []
+    restore_times = []
+    for i in range(0, repeat):
+        start = time.perf_counter()
+        record = record_utils.BuildSceneContext(context)
+        build_times.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        record_utils.RestoreSceneContext(context, record)
+        restore_times.append(time.perf_counter() - start)
+
+    helpers['BuildSceneContext'] = min(build_times)
+    helpers['RestoreSceneContext'] = min(restore_times)
+
+    # Compares the whole scene record and restore with the view layer switch used before the persistent
+    # Capsule view layer, which added a new view layer and cleared it with operators on every export.
+    # Both need a window, so they're only timed in interactive sessions.
+    helpers['BuildSceneContext_Legacy'] = None
+    helpers['RestoreSceneContext_Legacy'] = None
+
+    if context.window is not None and object_ops.Find3DViewContext() is not None:
+        legacy_times = TimeLegacySceneContext(context, repeat)
+        helpers['BuildSceneContext_Legacy'] = legacy_times[0]
+        helpers['RestoreSceneContext_Legacy'] = legacy_times[1]
+
+    helpers['CheckCapsuleErrors'] = TimeFunction(lambda: record_utils.CheckCapsuleErrors(context), repeat)
+
+    collections = search_utils.GetSceneCollections(context.scene)
+    helpers['GetCollectionObjectTree'] = TimeFunction(lambda: [
+        search_utils.GetCollectionObjectTree(context, collection, 'All') for collection in collections
+    ], repeat)
+
+    # Moves the whole scene so the first object sits at the world origin, then moves it back.
+    move_target = next((item for item in context.scene.objects if item.type == 'MESH'), None)
+    if move_target is not None:
+        previous_location = move_target.matrix_world.translation.copy()
+
+        def MoveAndReturn():
+            object_transform.MoveAllFailsafe(context, move_target, [0.0, 0.0, 0.0])
+            object_transform.MoveAllFailsafe(context, move_target, previous_location)
+
+        helpers['MoveAllFailsafe'] = TimeFunction(MoveAndReturn, repeat) / 2
+
+    return helpers
+
+
+def RunScene(context, parameters, repeat):
+    """
+    Builds a scene from the given parameters, exports it and times the export helpers.
+    Returns a dictionary of results.
+    """
+
+    export_operators = ImportAddonModule("export_operators")
+
+    export_directory = tempfile.mkdtemp(prefix = "capsule_benchmark_")
+
+    try:
+        ClearScene(context)
+
+        start = time.perf_counter()
+        counts = BuildScene(context, parameters, export_directory)
+        build_time = time.perf_counter() - start
+
+        print(">> BENCHMARKING " + parameters['name'] + " - " + str(counts['objects']) + " OBJECTS <<")
+
+        export_targets = export_operators.GetExportTargets(context, 'ALL')
+
+        start = time.perf_counter()
+        export_result = export_operators.ExportTargets(context, export_targets[0], export_targets[1], False)
+        export_time = time.perf_counter() - start
+
+        result = {}
+        result['name'] = parameters['name']
+        result['parameters'] = parameters
+        result['scene'] = counts
+        result['scene_build_time'] = build_time
+        result['export_status'] = export_result['status']
+        result['export_message'] = export_result['message']
+        result['export_time'] = export_time
+        result['export_stats'] = {key: export_result['stats'].get(key) for key in EXPORT_STAT_KEYS}
+        result['helpers'] = TimeHelpers(context, repeat)
+
+    finally:
+        shutil.rmtree(export_directory, ignore_errors = True)
+
+    return result
+
+
+def main(argv = None):
+    """
+    The command line entry point.  Returns the process exit code.
+    """
+
+    addon = ImportAddonModule()
+
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    args = ParseArguments(argv)
+
+    output = {}
+    output['blender_version'] = bpy.app.version_string
+    output['capsule_version'] = ".".join(str(v) for v in addon.bl_info['version'])
+    output['time'] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    output['session'] = 'background' if bpy.app.background is True else 'interactive'
+    output['measured_paths'] = GetMeasuredPaths(bpy.context)
+    output['results'] = []
+
+    if bpy.app.background is True:
+        print(">> BACKGROUND SESSION - ONLY THE HEADLESS FALLBACKS ARE MEASURED, RUN WITHOUT -b FOR THE OPERATOR PATHS <<")
+
+    for parameters in GetScenes(args):
+        output['results'].append(RunScene(bpy.context, parameters, args.repeat))
+
+    output = json.dumps(output, indent = 2)
+
+    if args.result is None:
+        print(output)
+    else:
+        with open(args.result, 'w') as result_file:
+            result_file.write(output)
+
+    return 0
+
+
+
+if __name__ == "__main__":
+    EnableAddon()
+    sys.exit(main())
@@ -0,0 +1,200 @@
+# ///////////////////////////////////////////////////////////////////
+# Checks that files from before presets had IDs keep their preset assignments when they're converted.
+# ///////////////////////////////////////////////////////////////////
+
+# Usage (the Capsule addon must be installed and enabled in the user preferences):
+#
+#   blender -b --factory-startup --python <addon folder>/benchmarks/preset_migration_check.py
+#
+# Each case builds Capsule data the way older versions stored it, where objects, collections and the scene
+# proxy refer to presets by list position, then converts it with MigratePresetIDs and checks that everything
+# still refers to the same presets.  The process exits with code 0 when every case passes and 1 when any fail.
+
+import bpy, os, sys
+
+
+# The benchmarks folder isn't on sys.path when a script is run with "blender --python".
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _addon import ADDON_NAME, EnableAddon, ImportAddonModule
+
+
+# Each case lists the IDs the presets had before conversion, and the list positions (counting from 1,
+# with 0 for None) that objects, collections and the scene proxy refer to them by.
+MIGRATION_CASES = [
+    {
+        # Export Presets were given random IDs when they were created, and files could have no Location Presets.
+        'name': "export presets only",
+        'version': 0,
+        'export_ids': [482913, 77120, 903311],
+        'location_ids': [],
+        'objects': {'export_preset': [2, 3, 0, 1]},
+        'collections': {'export_preset': [1, 3]},
+        'proxy': {'obj_export_preset': 2, 'col_export_preset': 3},
+    },
+    {
+        # Older Export Presets could have ID 0, random IDs could repeat and Location Presets had none.
+        'name': "missing and repeated IDs",
+        'version': 0,
+        'export_ids': [0, 5120, 5120],
+        'location_ids': [0, 0],
+        'objects': {'export_preset': [3, 2, 1], 'location_preset': [2, 1, 0]},
+        'collections': {'export_preset': [3], 'location_preset': [2]},
+        'proxy': {'obj_export_preset': 3, 'col_location_preset': 2},
+    },
+]
+
+
+def CreateCapsuleData(context, case):
+    """
+    Creates Capsule data, objects and collections for a migration case, stored the way older versions
+    stored them.  Returns the datablock and a list of every object and collection that was created.
+    """
+
+    addon_prefs = context.preferences.addons[ADDON_NAME].preferences
+
+    datablock = bpy.data.objects.new(addon_prefs.default_datablock, None)
+    context.scene.collection.objects.link(datablock)
+
+    cap_file = datablock.CAPFile
+    cap_file.is_storage_object = True
+    cap_file.preset_id_version = case['version']
+
+    for list_name, preset_ids in (('export_presets', case['export_ids']), ('location_presets', case['location_ids'])):
+        presets = getattr(cap_file, list_name)
+        for i, preset_id in enumerate(preset_ids):
+            preset = presets.add()
+            preset.name = list_name + "." + str(i + 1)
+            preset.instance_id = preset_id
+
+    created = []
+
+    # Raw values are written, as the enums can't hold list positions anymore.
+    for preset_property, positions in case['objects'].items():
+        for i, position in enumerate(positions):
+            name = "Migration Object." + str(i)
+            item = bpy.data.objects.get(name)
+            if item is None:
+                item = bpy.data.objects.new(name, None)
+                context.scene.collection.objects.link(item)
+                created.append(item)
+            item.CAPObj[preset_property] = position
+
+    for preset_property, positions in case['collections'].items():
+        for i, position in enumerate(positions):
+            name = "Migration Collection." + str(i)
+            collection = bpy.data.collections.get(name)
+            if collection is None:
+                collection = bpy.data.collections.new(name)
+                context.scene.collection.children.link(collection)
+                created.append(collection)
+            collection.CAPCol[preset_property] = position
+
+    for proxy_property, position in case['proxy'].items():
+        context.scene.CAPProxy[proxy_property] = position
+
+    return datablock, created
+
+
+def GetPresetName(cap_file, list_name, position):
+    """
+    Returns the name of the preset at a list position counting from 1, or None for position 0.
+    """
+
+    if position == 0:
+        return None
+
+    return getattr(cap_file, list_name)[position - 1].name
+
+
+def RunCase(context, case):
+    """
+    Converts the Capsule data of a migration case and checks every preset assignment survived.
+    Returns a list of failure messages, which is empty if the case passed.
+    """
+
+    preset_utils = ImportAddonModule("tk_utils.presets")
+
+    datablock, created = CreateCapsuleData(context, case)
+    cap_file = datablock.CAPFile
+    failures = []
+
+    # The presets each assignment referred to before conversion, as (owner, property, expected name) tuples.
+    expected = []
+    for preset_property, positions in case['objects'].items():
+        list_name = preset_utils.PRESET_PROPERTIES[preset_property]
+        for i, position in enumerate(positions):
+            expected.append((bpy.data.objects["Migration Object." + str(i)].CAPObj, preset_property,
+                preset_property, GetPresetName(cap_file, list_name, position)))
+
+    for preset_property, positions in case['collections'].items():
+        list_name = preset_utils.PRESET_PROPERTIES[preset_property]
+        for i, position in enumerate(positions):
+            expected.append((bpy.data.collections["Migration Collection." + str(i)].CAPCol, preset_property,
+                preset_property, GetPresetName(cap_file, list_name, position)))
+
+    for proxy_property, position in case['proxy'].items():
+        preset_property = 'export_preset' if proxy_property.endswith('export_preset') else 'location_preset'
+        list_name = preset_utils.PRESET_PROPERTIES[preset_property]
+        expected.append((context.scene.CAPProxy, proxy_property, preset_property,
+            GetPresetName(cap_file, list_name, position)))
+
+    try:
+        preset_utils.ClearPresetIndexes()
+        if preset_utils.MigratePresetIDs(cap_file) is not True:
+            failures.append("MigratePresetIDs didn't convert the file.")
+
+        if cap_file.preset_id_version != preset_utils.PRESET_ID_VERSION:
+            failures.append("The file wasn't marked as converted.")
+
+        for list_name in preset_utils.PRESET_PROPERTIES.values():
+            preset_ids = [preset.instance_id for preset in getattr(cap_file, list_name)]
+            if 0 in preset_ids or len(set(preset_ids)) != len(preset_ids):
+                failures.append(list_name + " don't all have unique IDs: " + str(preset_ids))
+
+        for properties, property_name, preset_property, preset_name in expected:
+            preset = preset_utils.FindPreset(cap_file, preset_property, str(properties.get(property_name, 0)))
+            found_name = preset.name if preset is not None else None
+
+            if found_name != preset_name:
+                failures.append(repr(properties.id_data) + " " + property_name + " refers to " + str(found_name)
+                    + " instead of " + str(preset_name))
+
+        # Converting again should leave everything as it is.
+        if preset_utils.MigratePresetIDs(cap_file) is not False:
+            failures.append("MigratePresetIDs converted the file a second time.")
+
+    finally:
+        bpy.data.batch_remove(created + [datablock])
+        preset_utils.ClearPresetIndexes()
+
+    return failures
+
+
+def main():
+    """
+    The command line entry point.  Returns the process exit code.
+    """
+
+    failed = 0
+
+    for case in MIGRATION_CASES:
+        failures = RunCase(bpy.context, case)
+
+        if len(failures) == 0:
+            print(">> PASSED - " + case['name'] + " <<")
+            continue
+
+        failed += 1
+        print(">> FAILED - " + case['name'] + " <<")
+        for failure in failures:
+            print("   " + failure)
+
+    print(">> " + str(len(MIGRATION_CASES) - failed) + " OF " + str(len(MIGRATION_CASES)) + " CASES PASSED <<")
+
+    return 1 if failed > 0 else 0
+
+
+
+if __name__ == "__main__":
+    EnableAddon()
+    sys.exit(main())
@@ -0,0 +1,228 @@
+# ///////////////////////////////////////////////////////////////////
+# Compares the per-object and struct-of-arrays scene record paths.
+# ///////////////////////////////////////////////////////////////////
+
+# Usage (the Capsule addon must be installed and enabled in the user preferences):
+#
+#   blender -b --factory-startup --python <addon folder>/benchmarks/scene_record_benchmark.py -- --objects 10000
+#
+# The current scene is filled with empties, some of which are locked, hidden or constrained, and both
+# record paths record and restore it.  The timings are printed and optionally written as JSON.
+
+import bpy, json, os, sys, time
+from mathutils import Vector
+
+
+# The benchmarks folder isn't on sys.path when a script is run with "blender --python".
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _addon import EnableAddon, ImportAddonModule
+
+
+def ParseArguments(argv):
+    """
+    Parses the arguments that were given after Blender's "--" separator.
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog = "scene_record_benchmark.py",
+        description = "Times recording and restoring object states for a synthetic scene.",
+    )
+
+    parser.add_argument("--objects", type = int, default = 10000,
+        help = "The number of objects to create.")
+    parser.add_argument("--constraint-ratio", type = float, default = 0.05,
+        help = "The fraction of objects that have a constraint.")
+    parser.add_argument("--repeat", type = int, default = 5,
+        help = "How many times each record path is timed.  The fastest run is reported.")
+    parser.add_argument("--result", default = None,
+        help = "Where to write the JSON results.  Defaults to printing them.")
+
+    return parser.parse_args(argv)
+
+
+def BuildScene(context, object_count, constraint_ratio):
+    """
+    Fills the current scene with the given number of empties.
+    """
+
+    scene = context.scene
+
+    constraint_step = 0
+    if constraint_ratio > 0:
+        constraint_step = max(1, int(1 / constraint_ratio))
+
+    for i in range(0, object_count):
+        item = bpy.data.objects.new("Empty." + str(i), None)
+        item.location = (i % 100, i // 100, 0.0)
+        scene.collection.objects.link(item)
+
+        if i % 7 == 0:
+            item.lock_location = (True, False, True)
+        if i % 11 == 0:
+            item.hide_select = True
+        if i % 13 == 0:
+            item.hide_viewport = True
+        
+        if constraint_step > 0 and i % constraint_step == 0:
+            constraint = item.constraints.new('LIMIT_LOCATION')
+            constraint.use_min_z = True
+            constraint.min_z = -1.0
+            constraint.influence = 0.5
+
+    return scene
+
+
+def LegacyRecord(context, objects):
+    """
+    Records object states with one dictionary per object, the way scene records used to be built.
+    Constrained object locations are found the same way RecordObjectStates finds them, so both
+    paths do the same work.
+    """
+
+    loc_utils = ImportAddonModule("tk_utils.locations")
+
+    constrained_objects = [item for item in objects if len(item.constraints) > 0]
+    constrained_locations = loc_utils.FindWorldSpaceObjectLocations(context, constrained_objects)
+    true_locations = {}
+    for i, item in enumerate(constrained_objects):
+        true_locations[item] = Vector(constrained_locations[i])
+
+    object_records = []
+
+    for item in objects:
+        record = {}
+        record['item'] = item
+        record['hide_viewport'] = item.hide_viewport
+        record['hide_select'] = item.hide_select
+        record['is_selected'] = item.select_get()
+
+        transform_locks = []
+        for i, x in enumerate(item.lock_location):
+            transform_locks.append(item.lock_location[i])
+        for i, x in enumerate(item.lock_rotation):
+            transform_locks.append(item.lock_rotation[i])
+        for i, x in enumerate(item.lock_scale):
+            transform_locks.append(item.lock_scale[i])
+        
+        if True in transform_locks:
+            record['transform_locks'] = transform_locks
+        
+        if len(item.constraints) > 0:
+            constraint_list = []
+            i = 0
+            for constraint in item.constraints:
+                constraint_list.append( {'index': i, 'enabled': constraint.mute, 'influence': constraint.influence} )
+                i += 1
+            
+            record['constraint_list'] = constraint_list
+            record['true_location'] = true_locations[item]
+            record['constraint_location'] = true_locations[item].copy()
+        
+        object_records.append(record)
+    
+    return object_records
+
+
+def LegacyRestore(context, object_records):
+    """
+    Restores object states one property at a time, the way scene records used to be restored.
+    Constrained objects are moved back into place like RestoreObjectStates does.
+    """
+
+    object_transform = ImportAddonModule("tk_utils.object_transform")
+
+    for record in object_records:
+        item = record['item']
+
+        if 'constraint_list' in record:
+            object_transform.MoveObjectFailsafe(item, context, record['constraint_location'])
+
+            for constraint_record in record['constraint_list']:
+                index = constraint_record['index']
+                item.constraints[index].mute = constraint_record['enabled']
+                item.constraints[index].influence = constraint_record['influence']
+        
+        item.hide_viewport = record['hide_viewport']
+        item.hide_select = record['hide_select']
+        item.select_set(record['is_selected'])
+
+        if 'transform_locks' in record:
+            lock_list = record['transform_locks']
+
+            item.lock_location[0] = lock_list[0]
+            item.lock_location[1] = lock_list[1]
+            item.lock_location[2] = lock_list[2]
+            item.lock_rotation[0] = lock_list[3]
+            item.lock_rotation[1] = lock_list[4]
+            item.lock_rotation[2] = lock_list[5]
+            item.lock_scale[0] = lock_list[6]
+            item.lock_scale[1] = lock_list[7]
+            item.lock_scale[2] = lock_list[8]
+
+
+def TimeFunction(function, repeat):
+    """
+    Runs a function a number of times and returns the fastest time in seconds.
+    """
+
+    times = []
+    for i in range(0, repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    
+    return min(times)
+
+
+def RunBenchmark(context, object_count, constraint_ratio, repeat):
+    """
+    Builds a synthetic scene and times both record paths.  Returns a dictionary of results.
+    """
+
+    record_utils = ImportAddonModule("tk_utils.record")
+
+    scene = BuildScene(context, object_count, constraint_ratio)
+    objects = scene.objects
+
+    legacy_records = LegacyRecord(context, objects)
+    array_records = record_utils.RecordObjectStates(context, objects)
+
+    result = {}
+    result['objects'] = len(objects)
+    result['constrained_objects'] = len(array_records['constrained_indices'])
+    result['blender_version'] = bpy.app.version_string
+    result['legacy_record_time'] = TimeFunction(lambda: LegacyRecord(context, objects), repeat)
+    result['legacy_restore_time'] = TimeFunction(lambda: LegacyRestore(context, legacy_records), repeat)
+    result['array_record_time'] = TimeFunction(lambda: record_utils.RecordObjectStates(context, objects), repeat)
+    result['array_restore_time'] = TimeFunction(lambda: record_utils.RestoreObjectStates(context, array_records), repeat)
+
+    return result
+
+
+def main(argv = None):
+    """
+    The command line entry point.  Returns the process exit code.
+    """
+
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    args = ParseArguments(argv)
+    result = RunBenchmark(bpy.context, args.objects, args.constraint_ratio, args.repeat)
+    output = json.dumps(result, indent = 2)
+
+    if args.result is None:
+        print(output)
+    else:
+        with open(args.result, 'w') as result_file:
+            result_file.write(output)
+    
+    return 0
+
+
+
+if __name__ == "__main__":
+    EnableAddon()
+    sys.exit(main())
@@ -0,0 +1,229 @@
+# ///////////////////////////////////////////////////////////////////
+# Compares Capsule's fast STL writer against Blender's STL export operator.
+# ///////////////////////////////////////////////////////////////////
+
+# Usage (the Capsule addon must be installed and enabled in the user preferences):
+#
+#   blender -b --factory-startup --python <addon folder>/benchmarks/stl_benchmark.py -- --result stl_bench.json
+#   blender -b --factory-startup --python <addon folder>/benchmarks/stl_benchmark.py -- --triangles 4000000 --ascii
+#
+# A dense grid mesh is generated for each triangle count, then exported with both the operator and the
+# fast writer using the same STL settings.  Results are written as JSON so runs can be compared.
+
+import bpy, json, os, shutil, struct, sys, tempfile, time
+
+
+# The benchmarks folder isn't on sys.path when a script is run with "blender --python".
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from _addon import ADDON_NAME, EnableAddon, ImportAddonModule
+
+
+# The triangle counts that are benchmarked when --triangles isn't given.
+DEFAULT_TRIANGLE_COUNTS = (100000, 1000000, 4000000)
+
+
+def ParseArguments(argv):
+    """
+    Parses the arguments that were given after Blender's "--" separator.
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog = "stl_benchmark.py",
+        description = "Times Capsule's fast STL writer against Blender's STL export operator.",
+    )
+
+    parser.add_argument("--triangles", type = int, action = 'append', default = None,
+        help = "The number of triangles to export.  Can be given more than once.")
+    parser.add_argument("--objects", type = int, default = 1,
+        help = "How many objects the triangles are split between.")
+    parser.add_argument("--ascii", action = 'store_true',
+        help = "Exports ASCII STL files instead of binary ones.")
+    parser.add_argument("--no-modifiers", action = 'store_true',
+        help = "Exports the meshes without applying modifiers.")
+    parser.add_argument("--repeat", type = int, default = 3,
+        help = "How many times each export is timed.  The fastest run is reported.")
+    parser.add_argument("--result", default = None,
+        help = "Where to write the JSON results.  Defaults to printing them.")
+
+    return parser.parse_args(argv)
+
+
+def ClearScene(context):
+    """
+    Removes every object from the current scene, along with their meshes.
+    """
+
+    bpy.data.batch_remove(list(context.scene.objects))
+    bpy.data.batch_remove([m for m in bpy.data.meshes if m.users == 0])
+
+
+def BuildScene(context, triangle_count, object_count):
+    """
+    Creates grid meshes with roughly the given number of triangles between them, with a triangulate
+    modifier and a negative scale on every other object so both are exercised.  Returns the objects.
+    """
+
+    # Each grid quad becomes two triangles.
+    quads_per_object = max(1, triangle_count // (object_count * 2))
+    size = max(1, int(quads_per_object ** 0.5))
+
+    objects = []
+    for i in range(0, object_count):
+        mesh = bpy.data.meshes.new("STL Benchmark." + str(i))
+        vertices = [(x, y, (x * y) % 3 * 0.1) for y in range(0, size + 1) for x in range(0, size + 1)]
+        faces = [(y * (size + 1) + x, y * (size + 1) + x + 1, (y + 1) * (size + 1) + x + 1, (y + 1) * (size + 1) + x)
+            for y in range(0, size) for x in range(0, size)]
+        mesh.from_pydata(vertices, [], faces)
+        mesh.update()
+
+        item = bpy.data.objects.new("STL Benchmark." + str(i), mesh)
+        item.location = (i * (size + 1), 0.0, 0.0)
+        if i % 2 == 1:
+            item.scale = (-1.0, 1.0, 1.0)
+        item.modifiers.new("Triangulate", 'TRIANGULATE')
+
+        context.scene.collection.objects.link(item)
+        objects.append(item)
+
+    context.view_layer.update()
+    return objects
+
+
+def CreateSTLData(args):
+    """
+    Creates an Export Preset holding the STL settings used by both export paths.
+    """
+
+    preferences = bpy.context.preferences
+    addon_prefs = preferences.addons[ADDON_NAME].preferences
+
+    datablock = bpy.data.objects.new(addon_prefs.default_datablock, None)
+    bpy.context.scene.collection.objects.link(datablock)
+    datablock.hide_viewport = True
+
+    export_preset = datablock.CAPFile.export_presets.add()
+    export_preset.name = "STL Benchmark"
+    export_preset.format_type = 'STL'
+    export_preset.apply_modifiers = not args.no_modifiers
+
+    stl_data = export_preset.data_stl
+    stl_data.save_as_ascii = args.ascii
+    stl_data.global_scale = 2.0
+    stl_data.forward_axis = '-Z'
+    stl_data.up_axis = 'Y'
+
+    return datablock, export_preset
+
+
+def GetBinaryTriangleCount(file_path):
+    """
+    Reads the triangle count from the header of a binary STL file.
+    """
+
+    with open(file_path, 'rb') as file:
+        file.seek(80)
+        return struct.unpack('<I', file.read(4))[0]
+
+
+def TimeFunction(function, repeat):
+    """
+    Runs a function a number of times and returns the fastest time in seconds.
+    """
+
+    times = []
+    for i in range(0, repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def RunBenchmark(context, args, triangle_count, export_directory):
+    """
+    Exports the same scene with both STL paths.  Returns a dictionary of results.
+    """
+
+    stl_writer = ImportAddonModule("export_formats.stl_writer")
+
+    ClearScene(context)
+    objects = BuildScene(context, triangle_count, args.objects)
+    datablock, export_preset = CreateSTLData(args)
+    stl_data = export_preset.data_stl
+
+    bpy.ops.object.select_all(action = 'DESELECT')
+    for item in objects:
+        item.select_set(True)
+
+    print(">> BENCHMARKING " + str(triangle_count) + " TRIANGLES <<")
+
+    operator_path = os.path.join(export_directory, "operator")
+    writer_path = os.path.join(export_directory, "writer")
+
+    result = {}
+    result['triangles_requested'] = triangle_count
+    result['objects'] = len(objects)
+    result['ascii'] = stl_data.save_as_ascii
+    result['operator_time'] = TimeFunction(lambda: stl_data.export(context, export_preset, operator_path), args.repeat)
+    result['writer_time'] = TimeFunction(lambda: stl_writer.WriteSTL(context, objects, writer_path + ".stl",
+        stl_data, export_preset.apply_modifiers), args.repeat)
+    result['speedup'] = result['operator_time'] / result['writer_time'] if result['writer_time'] > 0 else None
+    result['operator_file_size'] = os.path.getsize(operator_path + ".stl")
+    result['writer_file_size'] = os.path.getsize(writer_path + ".stl")
+
+    # Both files should hold the same triangles, so their sizes and triangle counts are compared as a sanity check.
+    if stl_data.save_as_ascii is False:
+        result['operator_triangles'] = GetBinaryTriangleCount(operator_path + ".stl")
+        result['writer_triangles'] = GetBinaryTriangleCount(writer_path + ".stl")
+        result['matches'] = result['operator_triangles'] == result['writer_triangles'] \
+            and result['operator_file_size'] == result['writer_file_size']
+
+    bpy.data.objects.remove(datablock)
+
+    return result
+
+
+def main(argv = None):
+    """
+    The command line entry point.  Returns the process exit code.
+    """
+
+    addon = ImportAddonModule()
+
+    if argv is None:
+        argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+
+    args = ParseArguments(argv)
+    triangle_counts = args.triangles if args.triangles is not None else DEFAULT_TRIANGLE_COUNTS
+
+    output = {}
+    output['blender_version'] = bpy.app.version_string
+    output['capsule_version'] = ".".join(str(v) for v in addon.bl_info['version'])
+    output['time'] = time.strftime("%Y-%m-%dT%H:%M:%S")
+    output['results'] = []
+
+    export_directory = tempfile.mkdtemp(prefix = "capsule_stl_benchmark_")
+
+    try:
+        for triangle_count in triangle_counts:
+            output['results'].append(RunBenchmark(bpy.context, args, triangle_count, export_directory))
+    finally:
+        shutil.rmtree(export_directory, ignore_errors = True)
+
+    output = json.dumps(output, indent = 2)
+
+    if args.result is None:
+        print(output)
+    else:
+        with open(args.result, 'w') as result_file:
+            result_file.write(output)
+
+    return 0
+
+
+
+if __name__ == "__main__":
+    EnableAddon()
+    sys.exit(main())
@@ -1,14 +1,26 @@
 
 from bpy.utils import register_class
 
-from .export_format import CAP_ExportFormat
-from .export_format_fbx import CAP_FormatData_FBX
-from .export_format_obj import CAP_FormatData_OBJ
-from .export_format_gltf import CAP_FormatData_GLTF
-from .export_format_abc import CAP_FormatData_Alembic
-from .export_format_dae import CAP_FormatData_Collada
-from .export_format_stl import CAP_FormatData_STL
-from .export_format_usd import CAP_FormatData_USD
+from .export_format import CAP_ExportFormat, RegisterExporter, UnregisterExporter, GetExporter
+from .export_format_fbx import CAP_FormatData_FBX, CAP_Exporter_FBX
+from .export_format_obj import CAP_FormatData_OBJ, CAP_Exporter_OBJ
+from .export_format_gltf import CAP_FormatData_GLTF, CAP_Exporter_GLTF
+from .export_format_abc import CAP_FormatData_Alembic, CAP_Exporter_Alembic
+from .export_format_dae import CAP_FormatData_Collada, CAP_Exporter_Collada
+from .export_format_stl import CAP_FormatData_STL, CAP_Exporter_STL
+from .export_format_usd import CAP_FormatData_USD, CAP_Exporter_USD
+
+# The exporters Capsule uses by default.  Other exporters can be added or swapped in with RegisterExporter.
+for exporter in (
+    CAP_Exporter_FBX(),
+    CAP_Exporter_OBJ(),
+    CAP_Exporter_GLTF(),
+    CAP_Exporter_Alembic(),
+    CAP_Exporter_Collada(),
+    CAP_Exporter_STL(),
+    CAP_Exporter_USD(),
+    ):
+    RegisterExporter(exporter)
 
 # classes = (
 #     # CAP_ExportFormat,
@@ -1,5 +1,6 @@
 
-import bpy
+import bpy, os
+from abc import ABC, abstractmethod
 from bpy.props import IntProperty, FloatProperty, BoolProperty, StringProperty, PointerProperty, CollectionProperty, EnumProperty
 from bpy.types import AddonPreferences, PropertyGroup
 from bpy.types import UILayout
@@ -15,20 +16,106 @@ class CAP_FormatData_Undefined(PropertyGroup):
            default = True,
         )
 
-# This is imported but not used anywhere.  Hmm...
-class CAP_ExportFormat:
+# Every exporter Capsule can use, keyed by the Export Preset format type it exports.
+exporters = {}
+
+
+class CAP_ExportFormat(ABC):
 	"""
-	Defines a single export format that Capsule can export to.
+	Defines a single export format that Capsule can export to.  Export tasks only talk to exporters
+	through this interface, so new formats and custom writers just need a subclass registered with RegisterExporter.
+	Subclasses must implement export(), or they can't be created.
 	"""
 
-	def __init__(self):
-		self.type = 'Undefined'
+	# The Export Preset format_type this exporter handles.
+	format_type = 'Undefined'
+
+	# The Export Preset property that holds the settings for this format.
+	data_name = None
+
+	# Every file extension the exporter can write, used to find the files it wrote.
+	file_extensions = ()
+
+	# Whether the format can store animation data.
+	supports_animation = False
+
+	def get_format_data(self, export_preset):
+		"""
+		Returns the format settings stored on an Export Preset.
+		"""
+
+		if self.data_name is None:
+			return None
+		return getattr(export_preset, self.data_name)
+
+	def prepare(self, context, export_preset, export_task):
+		"""
+		Called before anything is exported for an export task.  Returns a dictionary of any state
+		the export needs, which is passed to export().
+		"""
+
+		return {}
+
+	@abstractmethod
+	def export(self, context, export_preset, export_task, state):
+		"""
+		Exports the currently selected objects to the export task's directory and name.
+		Returns a dictionary of exporter statistics, or None.
+		"""
+
+	def get_file_times(self, export_task):
+		"""
+		Returns the modification time of every file the export task could write, keyed by path.
+		Files that don't exist are left out.
+		"""
+
+		file_path = export_task['export_directory'] + export_task['export_name']
+		file_times = {}
+
+		for extension in self.file_extensions:
+			try:
+				file_times[file_path + extension] = os.stat(file_path + extension).st_mtime_ns
+			except OSError:
+				continue
 
-	def draw_addon_preferences(self, layout):
+		return file_times
+
+	def get_output_files(self, export_task, previous_file_times):
+		"""
+		Returns the paths of every file the export task wrote, which are the files that are new or
+		were modified since previous_file_times was taken.  Files left over from earlier exports are ignored.
+		"""
+
+		file_times = self.get_file_times(export_task)
+		return [path for path, mtime in file_times.items() if previous_file_times.get(path) != mtime]
+
+	def perform_export(self, context, export_preset, export_task):
+		"""
+		Prepares and performs an export, then reports what was written.
+
+		Returns a dictionary with the list of output 'files' and any exporter 'stats'.
+		"""
+
+		state = self.prepare(context, export_preset, export_task)
+		previous_file_times = self.get_file_times(export_task)
+		stats = self.export(context, export_preset, export_task, state)
+
+		result = {}
+		result['files'] = self.get_output_files(export_task, previous_file_times)
+		result['stats'] = stats if stats is not None else {}
+		return result
+
+	def draw_addon_preferences(self, layout, export_preset, cap_file):
 		"""
 		Draws the panel that represents all the options that the export format has.
+		By default this is drawn by the format settings.
 		"""
 
+		format_data = self.get_format_data(export_preset)
+		if format_data is not None:
+			format_data.draw_addon_preferences(layout, format_data, cap_file, export_preset)
+			return
+
 		column = layout.column(align= True)
 		column.label(text= "This export type is undefined, someone let a base class here! D:")
 		return
@@ -44,4 +131,31 @@ class CAP_ExportFormat:
 		return
 
 
+def RegisterExporter(exporter):
+	"""
+	Makes an exporter available to Export Presets with a matching format type, replacing any
+	exporter that was already registered for it.
+	"""
+
+	exporters[exporter.format_type] = exporter
+
+
+def UnregisterExporter(format_type):
+	"""
+	Removes the exporter for a format type.
+	"""
+
+	exporters.pop(format_type, None)
+
+
+def GetExporter(format_type):
+	"""
+	Returns the exporter registered for a format type.
+	"""
+
+	try:
+		return exporters[format_type]
+	except KeyError:
+		raise Exception("Capsule has no exporter for the " + format_type + " format.")
+
 
@@ -415,3 +415,22 @@ class CAP_FormatData_Alembic(PropertyGroup):
 		
 		# right padding
 		export_area.separator()
+
+
+class CAP_Exporter_Alembic(CAP_ExportFormat):
+	"""
+	Exports Alembic files using Blender's built-in exporter.
+	"""
+
+	format_type = 'Alembic'
+	data_name = 'data_abc'
+	file_extensions = ('.abc',)
+	supports_animation = True
+
+	def export(self, context, export_preset, export_task, state):
+		"""
+		Exports the selected objects with the Alembic settings of the Export Preset.
+		"""
+
+		file_path = export_task['export_directory'] + export_task['export_name']
+		export_preset.data_abc.export(context, export_preset, file_path)
@@ -442,3 +442,22 @@ class CAP_FormatData_Collada(PropertyGroup):
 
 
 	
+
+
+class CAP_Exporter_Collada(CAP_ExportFormat):
+	"""
+	Exports Collada files using Blender's built-in exporter.
+	"""
+
+	format_type = 'Collada'
+	data_name = 'data_dae'
+	file_extensions = ('.dae',)
+	supports_animation = True
+
+	def export(self, context, export_preset, export_task, state):
+		"""
+		Exports the selected objects with the Collada settings of the Export Preset.
+		"""
+
+		file_path = export_task['export_directory'] + export_task['export_name']
+		export_preset.data_dae.export(export_preset, file_path)
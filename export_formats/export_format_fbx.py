@@ -492,3 +492,20 @@ class CAP_FormatData_FBX(PropertyGroup):
 		export_area.separator()
 
 
+class CAP_Exporter_FBX(CAP_ExportFormat):
+	"""
+	Exports FBX files using Blender's built-in exporter.
+	"""
+
+	format_type = 'FBX'
+	data_name = 'data_fbx'
+	file_extensions = ('.fbx',)
+	supports_animation = True
+
+	def export(self, context, export_preset, export_task, state):
+		"""
+		Exports the selected objects with the FBX settings of the Export Preset.
+		"""
+
+		file_path = export_task['export_directory'] + export_task['export_name']
+		export_preset.data_fbx.export(export_preset, file_path)
@@ -17,6 +17,8 @@ from bpy.types import (
 	PropertyGroup,
 )
 
+from .export_format import CAP_ExportFormat
+
 class CAP_FormatData_GLTF(PropertyGroup):
 
 	instance_id: IntProperty(default=-1)
@@ -629,3 +631,22 @@ class CAP_FormatData_GLTF(PropertyGroup):
 		
 		# right padding
 		export_area.separator()
+
+
+class CAP_Exporter_GLTF(CAP_ExportFormat):
+	"""
+	Exports GLTF files using Blender's built-in exporter.
+	"""
+
+	format_type = 'GLTF'
+	data_name = 'data_gltf'
+	file_extensions = ('.gltf', '.glb', '.bin')
+	supports_animation = True
+
+	def export(self, context, export_preset, export_task, state):
+		"""
+		Exports the selected objects with the GLTF Export module, which names the file itself.
+		"""
+
+		export_preset.data_gltf.export(context, export_preset, export_task['export_directory'], 
+			export_task['export_name'])
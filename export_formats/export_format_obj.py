@@ -5,6 +5,7 @@ from bpy.types import AddonPreferences, PropertyGroup
 from bpy.types import UILayout
 
 from .export_format import CAP_ExportFormat
+from . import obj_writer
 
 class CAP_FormatData_OBJ(PropertyGroup):
 
@@ -139,6 +140,15 @@ class CAP_FormatData_OBJ(PropertyGroup):
 	)
 
 
+	# writer
+
+	use_fast_writer: BoolProperty(
+		name = "Use Fast Writer",
+		description = "Writes the OBJ and MTL files directly from the evaluated mesh data instead of using Blender's OBJ exporter.  Much faster for static meshes, but Blender's exporter will still be used if any settings the fast writer doesn't support are enabled",
+		default = False,
+	)
+
+
 	# animation
 
 	start_frame: IntProperty(
@@ -244,6 +254,19 @@ class CAP_FormatData_OBJ(PropertyGroup):
 			eval_mode_option = export_options.column(align = True)
 			eval_mode_option.prop(exportData, "evaluation_mode")
 			eval_mode_option.separator()
+			eval_mode_option.separator()
+
+			writer_option = export_options.column(align = True)
+			writer_option.prop(exportData, "use_fast_writer")
+			writer_option.separator()
+
+			if exportData.use_fast_writer is True:
+				unsupported_options = obj_writer.GetUnsupportedOptions(exportData, preset)
+				if len(unsupported_options) > 0:
+					writer_warning = export_options.box()
+					writer_warning.label(text= "The fast writer doesn't support " + ", ".join(unsupported_options) + ".")
+					writer_warning.label(text= "Blender's OBJ exporter will be used instead.")
+					export_options.separator()
 
 
 		if cap_file.obj_menu_options == 'Scene':
@@ -309,4 +332,36 @@ class CAP_FormatData_OBJ(PropertyGroup):
 		
 		# right padding
 		export_area.separator()
-	
\ No newline at end of file
+	
+
+
+class CAP_Exporter_OBJ(CAP_ExportFormat):
+	"""
+	Exports OBJ files using Blender's built-in exporter, or Capsule's own writer if the
+	Export Preset uses the fast writer and only has settings it supports.
+	"""
+
+	format_type = 'OBJ'
+	data_name = 'data_obj'
+	file_extensions = ('.obj', '.mtl')
+	supports_animation = True
+
+	def export(self, context, export_preset, export_task, state):
+		"""
+		Exports the selected objects with the OBJ settings of the Export Preset.
+		"""
+
+		file_path = export_task['export_directory'] + export_task['export_name']
+		obj_data = export_preset.data_obj
+
+		if obj_data.use_fast_writer is True and len(obj_writer.GetUnsupportedOptions(obj_data, export_preset)) == 0:
+			stats = obj_writer.WriteOBJ(context.evaluated_depsgraph_get(), context.selected_objects,
+				file_path + ".obj", obj_data, export_preset.apply_modifiers)
+
+			result = {}
+			result['fast_writer_exports'] = 1
+			result['vertices'] = stats['vertices']
+			result['faces'] = stats['faces']
+			return result
+
+		obj_data.export(export_preset, file_path)
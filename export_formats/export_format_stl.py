@@ -13,6 +13,7 @@ from bpy.props import (
 )
 
 from .export_format import CAP_ExportFormat
+from . import stl_writer
 
 class CAP_FormatData_STL(PropertyGroup):
 
@@ -70,7 +71,13 @@ class CAP_FormatData_STL(PropertyGroup):
 		default = 'Z',
 	)
 
-    
+
+    use_fast_writer: BoolProperty(
+        name = "Use Fast Writer",
+        description = "Writes the STL file directly from the evaluated mesh data instead of using Blender's STL exporter.  Much faster for very dense meshes",
+        default = False,
+    )
+
     
     def export(self, context, export_preset, filePath):
         """
@@ -121,6 +128,7 @@ class CAP_FormatData_STL(PropertyGroup):
             export_options.separator()
 
         export_options.separator()
+        export_options.prop(exportData, "use_fast_writer")
         export_options.prop(exportData, "save_as_ascii")
         export_options.prop(exportData, "use_scene_unit")
         export_options.separator()
@@ -136,3 +144,33 @@ class CAP_FormatData_STL(PropertyGroup):
         # right padding
         export_area.separator()
 
+
+class CAP_Exporter_STL(CAP_ExportFormat):
+    """
+    Exports STL files using Blender's built-in exporter, or Capsule's own writer if the
+    Export Preset uses the fast writer.
+    """
+
+    format_type = 'STL'
+    data_name = 'data_stl'
+    file_extensions = ('.stl',)
+    supports_animation = False
+
+    def export(self, context, export_preset, export_task, state):
+        """
+        Exports the selected objects with the STL settings of the Export Preset.
+        """
+
+        file_path = export_task['export_directory'] + export_task['export_name']
+        stl_data = export_preset.data_stl
+
+        if stl_data.use_fast_writer is True:
+            stats = stl_writer.WriteSTL(context, context.selected_objects, file_path + ".stl",
+                stl_data, export_preset.apply_modifiers)
+
+            result = {}
+            result['fast_writer_exports'] = 1
+            result['triangles'] = stats['triangles']
+            return result
+
+        stl_data.export(context, export_preset, file_path)
@@ -199,3 +199,21 @@ class CAP_FormatData_USD(PropertyGroup):
         # left padding
         export_area.separator()
 
+
+class CAP_Exporter_USD(CAP_ExportFormat):
+    """
+    Exports USD files using Blender's built-in exporter.
+    """
+
+    format_type = 'USD'
+    data_name = 'data_usd'
+    file_extensions = ('.usd', '.usda', '.usdc', '.usdz')
+    supports_animation = True
+
+    def export(self, context, export_preset, export_task, state):
+        """
+        Exports the selected objects with the USD settings of the Export Preset.
+        """
+
+        file_path = export_task['export_directory'] + export_task['export_name']
+        export_preset.data_usd.export(context, export_preset, file_path)
@@ -0,0 +1,356 @@
+# ///////////////////////////////////////////////////////////////////
+# Writes OBJ and MTL files directly from evaluated mesh data, without going through the OBJ export operator.
+# ///////////////////////////////////////////////////////////////////
+
+import bpy, os
+import numpy as np
+from bpy_extras.io_utils import axis_conversion
+from mathutils import Matrix
+
+from ..tk_utils import mesh_cache
+
+
+# How many lines are formatted and written at once.  Keeps memory use flat on very dense meshes.
+ROW_CHUNK_SIZE = 65536
+
+# The size of the file write buffer.
+WRITE_BUFFER_SIZE = 1048576
+
+# The OBJ settings the fast writer doesn't support, and the names they're reported with.
+UNSUPPORTED_OPTIONS = (
+    ('export_vertex_groups', "Export Vertex Groups"),
+    ('export_smooth_groups', "Export Smoothing Groups"),
+    ('export_colors', "Export Colors"),
+    ('export_curves_as_nurbs', "Export Curves as NURBs"),
+)
+
+
+def GetUnsupportedOptions(obj_data, export_preset):
+    """
+    Returns the names of any enabled settings the fast writer can't export.  If there are any,
+    Blender's OBJ exporter needs to be used instead.
+    """
+
+    unsupported = [name for option, name in UNSUPPORTED_OPTIONS if getattr(obj_data, option) is True]
+
+    if obj_data.evaluation_mode != 'DAG_EVAL_VIEWPORT':
+        unsupported.append("Render Evaluation Mode")
+    if export_preset.export_animation is True:
+        unsupported.append("Export Animation")
+
+    return unsupported
+
+
+def GetOBJName(name):
+    """
+    Returns a name that can be written as a single OBJ or MTL token.
+    """
+
+    return "_".join(name.split())
+
+
+def GetGlobalMatrix(obj_data):
+    """
+    Returns the matrix that converts world space into OBJ space, using the axis and scale settings
+    of the OBJ format data.
+    """
+
+    axis_matrix = axis_conversion(
+        to_forward = obj_data.forward_axis.replace('NEGATIVE_', '-'),
+        to_up = obj_data.up_axis.replace('NEGATIVE_', '-'),
+    ).to_4x4()
+
+    return axis_matrix @ Matrix.Scale(obj_data.global_scale, 4)
+
+
+def GetMeshData(depsgraph, item, global_matrix, obj_data, use_mesh_modifiers):
+    """
+    Gets the mesh of an object as NumPy arrays, transformed into OBJ space.
+    Returns None if the object has no mesh.
+    """
+
+    arrays = mesh_cache.GetMeshArrays(item, depsgraph, use_mesh_modifiers)
+    if arrays is None:
+        return None
+
+    mesh_data = {}
+    mesh_data['loop_vertices'] = arrays['loop_vertices']
+
+    # Faces are stored as a flat list of loop indices, with the number of loops each face uses.
+    if obj_data.export_triangulated_mesh is True:
+        mesh_data['face_loops'] = arrays['triangle_loops']
+        mesh_data['face_sizes'] = np.full(len(arrays['triangle_materials']), 3, dtype = np.int32)
+        mesh_data['face_materials'] = arrays['triangle_materials']
+
+    else:
+        face_sizes = arrays['polygon_sizes']
+        face_offsets = np.cumsum(face_sizes) - face_sizes
+
+        mesh_data['face_loops'] = np.arange(face_sizes.sum(), dtype = np.int32) \
+            + np.repeat(arrays['polygon_loop_starts'] - face_offsets, face_sizes)
+        mesh_data['face_sizes'] = face_sizes
+        mesh_data['face_materials'] = arrays['polygon_materials']
+
+    matrix = np.array(global_matrix @ item.matrix_world, dtype = np.float64)
+    mesh_data['coordinates'] = arrays['coordinates'] @ matrix[:3, :3].T + matrix[:3, 3]
+
+    mesh_data['uvs'] = None
+    if obj_data.export_uv is True:
+        mesh_data['uvs'] = arrays['uvs']
+
+    mesh_data['normals'] = None
+    if obj_data.export_normals is True:
+        normals = arrays['normals'] @ np.linalg.inv(matrix[:3, :3])
+        lengths = np.linalg.norm(normals, axis = 1)
+        np.divide(normals, lengths[:, None], out = normals, where = lengths[:, None] > 0)
+        mesh_data['normals'] = normals
+
+    # Where each face starts in the list of face loops.
+    face_sizes = mesh_data['face_sizes']
+    mesh_data['face_offsets'] = np.cumsum(face_sizes) - face_sizes
+
+    # Negative scales turn the mesh inside out, so the loops of every face are reversed.
+    if np.linalg.det(matrix[:3, :3]) < 0:
+        face_ends = np.repeat(mesh_data['face_offsets'] + face_sizes, face_sizes)
+        face_offsets = np.repeat(mesh_data['face_offsets'], face_sizes)
+        reverse_order = face_ends - 1 - (np.arange(len(face_ends)) - face_offsets)
+        mesh_data['face_loops'] = mesh_data['face_loops'][reverse_order]
+
+    mesh_data['name'] = item.name
+    mesh_data['mesh_name'] = item.data.name if item.data is not None else item.name
+    mesh_data['materials'] = [slot.material for slot in item.material_slots]
+
+    return mesh_data
+
+
+def GetUniqueRows(values, decimals):
+    """
+    Removes duplicate rows once rounded to the precision they're written with.
+    Returns the unique rows and the index of the unique row for every original row.
+    """
+
+    unique, inverse = np.unique(np.round(values, decimals), axis = 0, return_inverse = True)
+    return unique, inverse.reshape(-1)
+
+
+def WriteRows(file, row_format, values):
+    """
+    Formats and writes every row of a 2D array using the same format string, a chunk at a time.
+    """
+
+    for start in range(0, len(values), ROW_CHUNK_SIZE):
+        chunk = values[start:start + ROW_CHUNK_SIZE]
+        file.write((row_format * len(chunk)) % tuple(chunk.ravel().tolist()))
+
+
+def WriteFaces(file, face_indices, mesh_data, loop_columns):
+    """
+    Writes a set of faces, using the given per-loop index columns for each face corner.
+    """
+
+    face_sizes = mesh_data['face_sizes'][face_indices]
+    face_offsets = mesh_data['face_offsets'][face_indices]
+    corner_format = "/".join("%d" if column is not None else "" for column in loop_columns).rstrip("/")
+    columns = [column for column in loop_columns if column is not None]
+
+    # Faces with the same number of corners share a format string, so they're written together.
+    for face_size in np.unique(face_sizes):
+        matching = face_sizes == face_size
+        loops = mesh_data['face_loops'][face_offsets[matching][:, None] + np.arange(face_size)]
+
+        corners = np.stack([column[loops] for column in columns], axis = -1)
+        WriteRows(file, "f" + (" " + corner_format) * int(face_size) + "\n", corners.reshape(len(loops), -1))
+
+
+def WriteMeshData(file, mesh_data, offsets, obj_data, used_materials):
+    """
+    Writes a single object into an OBJ file.  Offsets holds the number of vertices, UVs and normals
+    written so far and is updated as this object's are written.
+    """
+
+    if obj_data.export_object_groups is True:
+        object_name = GetOBJName(mesh_data['name'] + "_" + mesh_data['mesh_name'])
+    else:
+        object_name = GetOBJName(mesh_data['name'])
+
+    file.write("o " + object_name + "\n")
+    WriteRows(file, "v %f %f %f\n", mesh_data['coordinates'])
+
+    # OBJ indices start at 1 and count every vertex, UV and normal written before them in the file.
+    loop_columns = [mesh_data['loop_vertices'] + offsets['vertices'] + 1, None, None]
+    offsets['vertices'] += len(mesh_data['coordinates'])
+
+    if mesh_data['uvs'] is not None:
+        uvs, uv_indices = GetUniqueRows(mesh_data['uvs'], 6)
+        WriteRows(file, "vt %f %f\n", uvs)
+        loop_columns[1] = uv_indices + offsets['uvs'] + 1
+        offsets['uvs'] += len(uvs)
+
+    if mesh_data['normals'] is not None:
+        normals, normal_indices = GetUniqueRows(mesh_data['normals'], 4)
+        WriteRows(file, "vn %.4f %.4f %.4f\n", normals)
+        loop_columns[2] = normal_indices + offsets['normals'] + 1
+        offsets['normals'] += len(normals)
+
+    # Faces are grouped by material so each material only needs to be named once.
+    face_materials = mesh_data['face_materials']
+    for material_index in np.unique(face_materials):
+        material = None
+        if material_index < len(mesh_data['materials']):
+            material = mesh_data['materials'][material_index]
+
+        if obj_data.export_material_groups is True:
+            material_name = material.name if material is not None else "NONE"
+            file.write("g " + GetOBJName(mesh_data['name'] + "_" + mesh_data['mesh_name'] + "_" + material_name) + "\n")
+
+        if obj_data.export_materials is True and material is not None:
+            file.write("usemtl " + GetOBJName(material.name) + "\n")
+            used_materials[material.name] = material
+
+        WriteFaces(file, np.flatnonzero(face_materials == material_index), mesh_data, loop_columns)
+
+
+def GetPrincipledNode(material):
+    """
+    Returns the Principled BSDF node of a material, or None if it doesn't use one.
+    """
+
+    if material.use_nodes is False or material.node_tree is None:
+        return None
+
+    for node in material.node_tree.nodes:
+        if node.type == 'BSDF_PRINCIPLED':
+            return node
+
+    return None
+
+
+def GetSocketValue(node, names, default):
+    """
+    Returns the value of the first input socket found with one of the given names.
+    Socket names change between Blender versions, so several can be given.
+    """
+
+    for name in names:
+        socket = node.inputs.get(name)
+        if socket is not None:
+            return socket.default_value
+
+    return default
+
+
+def GetImagePath(node, socket_name, directory):
+    """
+    Returns the path of an image texture linked directly into a socket, relative to the export directory
+    if possible.  Returns None if there isn't one.
+    """
+
+    socket = node.inputs.get(socket_name)
+    if socket is None or socket.is_linked is False:
+        return None
+
+    image_node = socket.links[0].from_node
+    if image_node.type != 'TEX_IMAGE' or image_node.image is None:
+        return None
+
+    image_path = bpy.path.abspath(image_node.image.filepath, library = image_node.image.library)
+
+    try:
+        return os.path.relpath(image_path, directory)
+
+    # Paths on different drives can't be made relative.
+    except ValueError:
+        return image_path
+
+
+def WriteMTL(file_path, materials, obj_data):
+    """
+    Writes an MTL library for the given materials, using the values of their Principled BSDF nodes.
+    """
+
+    directory = os.path.dirname(file_path)
+
+    with open(file_path, 'w', buffering = WRITE_BUFFER_SIZE) as file:
+        file.write("# Blender " + bpy.app.version_string + " MTL File\n")
+        file.write("# www.blender.org\n")
+
+        for name, material in materials.items():
+            node = GetPrincipledNode(material)
+
+            if node is not None:
+                base_color = GetSocketValue(node, ("Base Color",), material.diffuse_color)
+                roughness = GetSocketValue(node, ("Roughness",), material.roughness)
+                metallic = GetSocketValue(node, ("Metallic",), material.metallic)
+                ior = GetSocketValue(node, ("IOR",), 1.45)
+                alpha = GetSocketValue(node, ("Alpha",), 1.0)
+                emission = GetSocketValue(node, ("Emission Color", "Emission"), (0.0, 0.0, 0.0, 1.0))
+                emission_strength = GetSocketValue(node, ("Emission Strength",), 1.0)
+                specular = GetSocketValue(node, ("Specular IOR Level", "Specular"), 0.5)
+            else:
+                base_color = material.diffuse_color
+                roughness = material.roughness
+                metallic = material.metallic
+                ior = 1.45
+                alpha = material.diffuse_color[3]
+                emission = (0.0, 0.0, 0.0, 1.0)
+                emission_strength = 1.0
+                specular = material.specular_intensity
+
+            file.write("\nnewmtl " + GetOBJName(name) + "\n")
+            file.write("Ns %.6f\n" % ((1.0 - roughness) ** 2 * 1000.0))
+            file.write("Ka %.6f %.6f %.6f\n" % (metallic, metallic, metallic))
+            file.write("Kd %.6f %.6f %.6f\n" % tuple(base_color[:3]))
+            file.write("Ks %.6f %.6f %.6f\n" % (specular, specular, specular))
+            file.write("Ke %.6f %.6f %.6f\n" % tuple(channel * emission_strength for channel in emission[:3]))
+            file.write("Ni %.6f\n" % ior)
+            file.write("d %.6f\n" % alpha)
+            file.write("illum 2\n")
+
+            if obj_data.export_pbr_extensions is True:
+                file.write("Pr %.6f\n" % roughness)
+                file.write("Pm %.6f\n" % metallic)
+
+            if node is not None:
+                image_path = GetImagePath(node, "Base Color", directory)
+                if image_path is not None:
+                    file.write("map_Kd " + image_path + "\n")
+
+
+def WriteOBJ(depsgraph, objects, file_path, obj_data, use_mesh_modifiers):
+    """
+    Writes every object into a single OBJ file using the settings of the OBJ format data, along with an
+    MTL library if materials are exported.  Doesn't rely on the selection or any operator context.
+
+    Returns a dictionary with the number of objects, vertices and faces written.
+    """
+
+    global_matrix = GetGlobalMatrix(obj_data)
+    stats = {'objects': 0, 'vertices': 0, 'faces': 0}
+    offsets = {'vertices': 0, 'uvs': 0, 'normals': 0}
+    used_materials = {}
+
+    mtl_path = os.path.splitext(file_path)[0] + ".mtl"
+
+    with open(file_path, 'w', buffering = WRITE_BUFFER_SIZE) as file:
+        file.write("# Blender " + bpy.app.version_string + "\n")
+        file.write("# www.blender.org\n")
+
+        if obj_data.export_materials is True:
+            file.write("mtllib " + os.path.basename(mtl_path) + "\n")
+
+        # Meshes are read one at a time as they're written, so only one is held in memory at once.
+        for item in objects:
+            mesh_data = GetMeshData(depsgraph, item, global_matrix, obj_data, use_mesh_modifiers)
+            if mesh_data is None:
+                continue
+
+            WriteMeshData(file, mesh_data, offsets, obj_data, used_materials)
+
+            stats['objects'] += 1
+            stats['vertices'] += len(mesh_data['coordinates'])
+            stats['faces'] += len(mesh_data['face_sizes'])
+
+    if obj_data.export_materials is True:
+        WriteMTL(mtl_path, used_materials, obj_data)
+
+    return stats
@@ -0,0 +1,167 @@
+# ///////////////////////////////////////////////////////////////////
+# Writes STL files directly from evaluated mesh data, without going through the STL export operator.
+# ///////////////////////////////////////////////////////////////////
+
+import bpy, struct
+import numpy as np
+from bpy_extras.io_utils import axis_conversion
+from mathutils import Matrix
+
+from ..tk_utils import mesh_cache
+
+
+# How many triangles are converted and written at once.  Keeps memory use flat on very dense meshes.
+BINARY_CHUNK_SIZE = 262144
+ASCII_CHUNK_SIZE = 32768
+
+# A binary STL triangle record - a normal, three vertices and an unused attribute count, with no padding.
+BINARY_TRIANGLE = np.dtype([
+    ('normal', '<f4', (3,)),
+    ('vertices', '<f4', (3, 3)),
+    ('attribute', '<u2'),
+])
+
+ASCII_TRIANGLE = (
+    "facet normal %f %f %f\n"
+    "outer loop\n"
+    "vertex %f %f %f\n"
+    "vertex %f %f %f\n"
+    "vertex %f %f %f\n"
+    "endloop\n"
+    "endfacet\n"
+)
+
+
+def GetSTLHeader():
+    """
+    Returns the header text written by Blender's own STL exporter, so files from either path look the same.
+    """
+
+    return "Exported from Blender-" + bpy.app.version_string
+
+
+def GetGlobalMatrix(context, stl_data):
+    """
+    Returns the matrix that converts world space into STL space, using the axis, scale and unit
+    settings of the STL format data.
+    """
+
+    global_scale = stl_data.global_scale
+    if stl_data.use_scene_unit is True:
+        global_scale *= context.scene.unit_settings.scale_length
+
+    axis_matrix = axis_conversion(to_forward = stl_data.forward_axis, to_up = stl_data.up_axis).to_4x4()
+    return axis_matrix @ Matrix.Scale(global_scale, 4)
+
+
+def GetMeshTriangles(context, item, global_matrix, use_mesh_modifiers):
+    """
+    Gets the triangulated mesh of an object as NumPy arrays, transformed into STL space.
+
+    Returns a tuple of vertex positions and triangle vertex indices, or None if the object has no mesh.
+    """
+
+    arrays = mesh_cache.GetMeshArrays(item, context.evaluated_depsgraph_get(), use_mesh_modifiers)
+    if arrays is None:
+        return None
+
+    matrix = np.array(global_matrix @ item.matrix_world, dtype = np.float64)
+    coordinates = arrays['coordinates'] @ matrix[:3, :3].T + matrix[:3, 3]
+    triangles = arrays['loop_vertices'][arrays['triangle_loops']].reshape(-1, 3)
+
+    # Negative scales turn the mesh inside out, so the winding order is flipped back.
+    if np.linalg.det(matrix[:3, :3]) < 0:
+        triangles = triangles[:, ::-1]
+
+    return coordinates, triangles
+
+
+def GetTriangleChunks(coordinates, triangles, chunk_size):
+    """
+    Yields the vertex positions and normals of the triangles in chunks, as (n, 3, 3) and (n, 3) arrays.
+    """
+
+    for start in range(0, len(triangles), chunk_size):
+        vertices = coordinates[triangles[start:start + chunk_size]]
+
+        normals = np.cross(vertices[:, 1] - vertices[:, 0], vertices[:, 2] - vertices[:, 0])
+        lengths = np.linalg.norm(normals, axis = 1)
+
+        # Degenerate triangles keep a zero normal, like the STL export operator gives them.
+        np.divide(normals, lengths[:, None], out = normals, where = lengths[:, None] > 0)
+
+        yield vertices, normals
+
+
+def WriteBinarySTL(file, meshes):
+    """
+    Streams the triangles of every mesh into a binary STL file.  Returns the number of triangles written.
+    """
+
+    file.write(GetSTLHeader().encode('ascii', 'replace')[:80].ljust(80, b'\0'))
+
+    # The triangle count comes before the triangles, so it's filled in once they've all been written.
+    count_position = file.tell()
+    file.write(struct.pack('<I', 0))
+
+    triangle_count = 0
+    for coordinates, triangles in meshes:
+        for vertices, normals in GetTriangleChunks(coordinates, triangles, BINARY_CHUNK_SIZE):
+            records = np.zeros(len(vertices), dtype = BINARY_TRIANGLE)
+            records['normal'] = normals
+            records['vertices'] = vertices
+            file.write(records.tobytes())
+            triangle_count += len(vertices)
+
+    file.seek(count_position)
+    file.write(struct.pack('<I', triangle_count))
+
+    return triangle_count
+
+
+def WriteASCIISTL(file, meshes):
+    """
+    Streams the triangles of every mesh into an ASCII STL file.  Returns the number of triangles written.
+    """
+
+    header = GetSTLHeader()
+    file.write("solid " + header + "\n")
+
+    triangle_count = 0
+    for coordinates, triangles in meshes:
+        for vertices, normals in GetTriangleChunks(coordinates, triangles, ASCII_CHUNK_SIZE):
+            values = np.concatenate((normals, vertices.reshape(-1, 9)), axis = 1)
+            file.write((ASCII_TRIANGLE * len(values)) % tuple(values.ravel().tolist()))
+            triangle_count += len(values)
+
+    file.write("endsolid " + header + "\n")
+
+    return triangle_count
+
+
+def WriteSTL(context, objects, file_path, stl_data, use_mesh_modifiers):
+    """
+    Writes every object into a single STL file using the settings of the STL format data.
+
+    Returns a dictionary with the number of objects and triangles written.
+    """
+
+    global_matrix = GetGlobalMatrix(context, stl_data)
+    stats = {'objects': 0, 'triangles': 0}
+
+    # Meshes are read one at a time as they're written, so only one is held in memory at once.
+    def GetMeshes():
+        for item in objects:
+            mesh_data = GetMeshTriangles(context, item, global_matrix, use_mesh_modifiers)
+            if mesh_data is not None:
+                stats['objects'] += 1
+                yield mesh_data
+
+    if stl_data.save_as_ascii is True:
+        with open(file_path, 'w') as file:
+            stats['triangles'] = WriteASCIISTL(file, GetMeshes())
+    else:
+        with open(file_path, 'wb') as file:
+            stats['triangles'] = WriteBinarySTL(file, GetMeshes())
+
+    return stats
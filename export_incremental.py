@@ -0,0 +1,442 @@
+
+# ///////////////////////////////////////////////////////////////////
+# Hashes export task inputs so unchanged exports can be skipped.
+# ///////////////////////////////////////////////////////////////////
+
+import bpy, glob, hashlib, json, os
+import numpy as np
+
+from datetime import datetime
+
+
+# The manifest saved in each export directory, listing the hash of every export made to it.
+MANIFEST_NAME = ".capsule_manifest.json"
+
+# Increment this whenever the hashed inputs change, so old manifests are ignored.
+MANIFEST_VERSION = 2
+
+# UI-only properties that don't change what gets exported.
+IGNORED_PROPERTIES = {'rna_type', 'show_expanded', 'is_active', 'show_in_editmode', 'show_on_cage'}
+
+# Node properties that only change how a node tree looks in the node editor.
+IGNORED_NODE_PROPERTIES = IGNORED_PROPERTIES | {'location', 'width', 'height', 'dimensions', 'select', 'hide',
+    'label', 'color', 'use_custom_color', 'show_options', 'show_preview', 'show_texture', 'width_hidden'}
+
+# ID properties that track how a datablock is used rather than what it contains.
+IGNORED_ID_PROPERTIES = IGNORED_PROPERTIES | {'users', 'use_fake_user', 'use_extra_user', 'tag', 'is_evaluated',
+    'original', 'session_uid', 'is_runtime_data', 'is_missing', 'is_embedded_data', 'is_library_indirect',
+    'is_editmode', 'preview', 'name_full', 'id_type', 'asset_data', 'override_library', 'library_weak_reference'}
+
+# The foreach_get attribute and width used to read each generic attribute data type.
+ATTRIBUTE_VALUES = {
+    'FLOAT': ('value', np.float32, 1),
+    'INT': ('value', np.int32, 1),
+    'BOOLEAN': ('value', np.bool_, 1),
+    'FLOAT_VECTOR': ('vector', np.float32, 3),
+    'FLOAT2': ('vector', np.float32, 2),
+    'FLOAT_COLOR': ('color', np.float32, 4),
+    'BYTE_COLOR': ('color', np.float32, 4),
+}
+
+
+def HashPropertyGroup(hasher, data, depth = 0, dependencies = None, ignored = IGNORED_PROPERTIES):
+    """
+    Hashes every readable RNA property in a struct.  ID pointers are hashed by name and added to
+    dependencies if it's given, so their contents can be hashed as well.  Other pointers are followed
+    a couple of levels deep, which covers export presets and their format data.
+    """
+
+    for prop in data.bl_rna.properties:
+        if prop.identifier in ignored or prop.type == 'COLLECTION':
+            continue
+
+        value = getattr(data, prop.identifier, None)
+
+        if prop.type == 'POINTER':
+            if value is None:
+                hasher.update(b'None')
+            elif isinstance(value, bpy.types.ID):
+                hasher.update(value.name_full.encode())
+                if dependencies is not None:
+                    dependencies.append(value)
+            elif depth < 2:
+                HashPropertyGroup(hasher, value, depth + 1, dependencies, ignored)
+            continue
+
+        # Enum flags are returned as sets, which don't have a stable order.
+        if isinstance(value, set):
+            value = sorted(value)
+        elif getattr(prop, 'is_array', False) is True:
+            value = tuple(value)
+
+        hasher.update(prop.identifier.encode())
+        hasher.update(repr(value).encode())
+
+
+def HashCollectionProperty(hasher, collection, attribute, dtype, width):
+    """
+    Hashes a single attribute of every item in a bpy collection using foreach_get.
+    """
+
+    values = np.empty(len(collection) * width, dtype = dtype)
+    collection.foreach_get(attribute, values)
+    hasher.update(values.tobytes())
+
+
+def HashMeshData(hasher, mesh):
+    """
+    Hashes the geometry of a mesh datablock including UVs and shape keys.
+    """
+
+    HashCollectionProperty(hasher, mesh.vertices, 'co', np.float32, 3)
+    HashCollectionProperty(hasher, mesh.edges, 'vertices', np.int32, 2)
+    HashCollectionProperty(hasher, mesh.loops, 'vertex_index', np.int32, 1)
+    HashCollectionProperty(hasher, mesh.polygons, 'loop_total', np.int32, 1)
+    HashCollectionProperty(hasher, mesh.polygons, 'material_index', np.int32, 1)
+    HashCollectionProperty(hasher, mesh.polygons, 'use_smooth', np.bool_, 1)
+
+    for uv_layer in mesh.uv_layers:
+        hasher.update(uv_layer.name.encode())
+        HashCollectionProperty(hasher, uv_layer.data, 'uv', np.float32, 2)
+
+    for attribute in mesh.color_attributes:
+        hasher.update(attribute.name.encode())
+        HashCollectionProperty(hasher, attribute.data, 'color', np.float32, 4)
+
+    if mesh.shape_keys is not None:
+        for key_block in mesh.shape_keys.key_blocks:
+            hasher.update(key_block.name.encode())
+            hasher.update(repr(key_block.value).encode())
+            HashCollectionProperty(hasher, key_block.data, 'co', np.float32, 3)
+
+
+def HashCurveData(hasher, curve, dependencies):
+    """
+    Hashes the splines and settings of a curve, surface or text datablock.
+    """
+
+    HashPropertyGroup(hasher, curve, dependencies = dependencies, ignored = IGNORED_ID_PROPERTIES)
+
+    for spline in curve.splines:
+        HashPropertyGroup(hasher, spline)
+        HashCollectionProperty(hasher, spline.points, 'co', np.float32, 4)
+        HashCollectionProperty(hasher, spline.points, 'radius', np.float32, 1)
+        HashCollectionProperty(hasher, spline.bezier_points, 'co', np.float32, 3)
+        HashCollectionProperty(hasher, spline.bezier_points, 'handle_left', np.float32, 3)
+        HashCollectionProperty(hasher, spline.bezier_points, 'handle_right', np.float32, 3)
+        HashCollectionProperty(hasher, spline.bezier_points, 'radius', np.float32, 1)
+        HashCollectionProperty(hasher, spline.bezier_points, 'tilt', np.float32, 1)
+
+
+def HashAttributes(hasher, attributes):
+    """
+    Hashes the values of every generic attribute, which is how hair curves and point clouds store their geometry.
+    """
+
+    for attribute in attributes:
+        hasher.update(attribute.name.encode())
+        hasher.update(attribute.data_type.encode())
+        hasher.update(attribute.domain.encode())
+
+        if attribute.data_type in ATTRIBUTE_VALUES:
+            name, dtype, width = ATTRIBUTE_VALUES[attribute.data_type]
+            HashCollectionProperty(hasher, attribute.data, name, dtype, width)
+
+
+def HashObjectData(hasher, target, dependencies):
+    """
+    Hashes the geometry or settings of an object's data.
+    """
+
+    data = target.data
+    hasher.update(data.name_full.encode())
+
+    if target.type == 'MESH':
+        HashMeshData(hasher, data)
+
+    elif target.type == 'ARMATURE':
+        HashCollectionProperty(hasher, data.bones, 'head_local', np.float32, 3)
+        HashCollectionProperty(hasher, data.bones, 'tail_local', np.float32, 3)
+
+    elif target.type in ('CURVE', 'SURFACE', 'FONT'):
+        HashCurveData(hasher, data, dependencies)
+
+    elif target.type == 'META':
+        HashPropertyGroup(hasher, data, ignored = IGNORED_ID_PROPERTIES)
+        for element in data.elements:
+            HashPropertyGroup(hasher, element)
+
+    else:
+        HashPropertyGroup(hasher, data, dependencies = dependencies, ignored = IGNORED_ID_PROPERTIES)
+        if hasattr(data, 'attributes'):
+            HashAttributes(hasher, data.attributes)
+
+
+def HashNodeTree(hasher, node_tree, dependencies):
+    """
+    Hashes the nodes, socket values and links of a node tree.  Node groups, images and objects the
+    nodes use are added to dependencies.
+    """
+
+    for node in node_tree.nodes:
+        hasher.update(node.bl_idname.encode())
+        hasher.update(node.name.encode())
+        HashPropertyGroup(hasher, node, dependencies = dependencies, ignored = IGNORED_NODE_PROPERTIES)
+
+        for socket in node.inputs:
+            if socket.is_linked is True or hasattr(socket, 'default_value') is False:
+                continue
+
+            value = socket.default_value
+            if isinstance(value, bpy.types.ID):
+                hasher.update(value.name_full.encode())
+                dependencies.append(value)
+            elif hasattr(value, '__len__') and not isinstance(value, str):
+                hasher.update(repr(tuple(value)).encode())
+            else:
+                hasher.update(repr(value).encode())
+
+    for link in node_tree.links:
+        hasher.update(link.from_node.name.encode())
+        hasher.update(link.from_socket.identifier.encode())
+        hasher.update(link.to_node.name.encode())
+        hasher.update(link.to_socket.identifier.encode())
+        hasher.update(repr(link.is_muted).encode())
+
+
+def HashAnimationData(hasher, animation_data):
+    """
+    Hashes the keyframes of the action assigned to an animation data block.
+    """
+
+    if animation_data is None or animation_data.action is None:
+        hasher.update(b'None')
+        return
+
+    hasher.update(animation_data.action.name_full.encode())
+
+    for fcurve in animation_data.action.fcurves:
+        hasher.update(fcurve.data_path.encode())
+        hasher.update(repr(fcurve.array_index).encode())
+        HashCollectionProperty(hasher, fcurve.keyframe_points, 'co', np.float32, 2)
+
+
+def HashObject(hasher, target, export_preset, dependencies):
+    """
+    Hashes everything about a single object that can change the contents of an export.  Any datablocks
+    it uses through its modifiers, constraints, materials and data are added to dependencies.
+    """
+
+    hasher.update(target.name_full.encode())
+    hasher.update(target.type.encode())
+
+    matrix_world = np.array(target.matrix_world, dtype = np.float32)
+    hasher.update(matrix_world.tobytes())
+
+    # Modifier stacks, including Geometry Nodes inputs which are stored as ID properties.
+    for modifier in target.modifiers:
+        HashPropertyGroup(hasher, modifier, dependencies = dependencies)
+
+        for key in modifier.keys():
+            hasher.update(key.encode())
+            hasher.update(str(modifier[key]).encode())
+
+            if isinstance(modifier[key], bpy.types.ID):
+                dependencies.append(modifier[key])
+
+    for constraint in target.constraints:
+        HashPropertyGroup(hasher, constraint, dependencies = dependencies)
+
+    for slot in target.material_slots:
+        if slot.material is not None:
+            hasher.update(slot.material.name_full.encode())
+            dependencies.append(slot.material)
+        hasher.update(slot.link.encode())
+
+    # Poses deform meshes through Armature modifiers.
+    if target.pose is not None:
+        HashCollectionProperty(hasher, target.pose.bones, 'matrix', np.float32, 16)
+
+    if target.data is not None:
+        HashObjectData(hasher, target, dependencies)
+
+    if export_preset.export_animation is True:
+        HashAnimationData(hasher, target.animation_data)
+
+
+def HashDependency(hasher, dependency, export_preset, dependencies):
+    """
+    Hashes the contents of a datablock an export target uses, adding anything it uses in turn to dependencies.
+    """
+
+    hasher.update(type(dependency).__name__.encode())
+    hasher.update(dependency.name_full.encode())
+
+    if isinstance(dependency, bpy.types.Object):
+        HashObject(hasher, dependency, export_preset, dependencies)
+
+    elif isinstance(dependency, bpy.types.NodeTree):
+        HashNodeTree(hasher, dependency, dependencies)
+
+    elif isinstance(dependency, bpy.types.Material):
+        HashPropertyGroup(hasher, dependency, dependencies = dependencies, ignored = IGNORED_ID_PROPERTIES)
+
+    elif isinstance(dependency, bpy.types.Collection):
+        for item in sorted(dependency.all_objects, key = lambda t: t.name_full):
+            dependencies.append(item)
+
+    elif isinstance(dependency, bpy.types.Image):
+        hasher.update(dependency.filepath_raw.encode())
+        hasher.update(dependency.source.encode())
+        hasher.update(repr(tuple(dependency.size)).encode())
+        hasher.update(repr(dependency.is_dirty).encode())
+
+    elif isinstance(dependency, bpy.types.VectorFont):
+        hasher.update(dependency.filepath.encode())
+
+
+def HashDependencies(hasher, dependencies, export_preset, visited):
+    """
+    Hashes every datablock in dependencies and everything they use in turn, skipping any in visited.
+    """
+
+    while len(dependencies) > 0:
+        dependency = dependencies.pop(0)
+        key = dependency.as_pointer()
+
+        if key in visited:
+            continue
+        visited.add(key)
+
+        HashDependency(hasher, dependency, export_preset, dependencies)
+
+
+def HashExportTask(context, export_task):
+    """
+    Creates a hash from every input of an export task - the target objects, the resolved export preset,
+    the output path and the pack script.  GetExportTaskDirectory must be called on the task first.
+
+    Returns the hash as a hex string.
+    """
+
+    preferences = context.preferences
+    addon_prefs = preferences.addons[__package__].preferences
+    export_preset = export_task['export_preset']
+
+    hasher = hashlib.sha1()
+    hasher.update(repr(MANIFEST_VERSION).encode())
+    hasher.update(export_task['export_directory'].encode())
+    hasher.update(export_task['export_name'].encode())
+
+    HashPropertyGroup(hasher, export_preset)
+
+    if export_task['origin_object'] is not None:
+        hasher.update(export_task['origin_object'].name_full.encode())
+
+    if addon_prefs.use_pack_scripts is True and export_task['pack_script'] is not None:
+        hasher.update(export_task['pack_script'].as_string().encode())
+
+    targets = sorted(export_task['targets'], key = lambda t: t.name_full)
+    dependencies = []
+    for target in targets:
+        HashObject(hasher, target, export_preset, dependencies)
+
+    # Node groups, materials and any objects used by modifiers and constraints can all change the
+    # exported result, so everything the targets use is hashed too.
+    visited = set(target.as_pointer() for target in targets)
+    HashDependencies(hasher, dependencies, export_preset, visited)
+
+    return hasher.hexdigest()
+
+
+def GetManifestKey(export_task):
+    """
+    Returns the key an export task is stored under in its directory manifest.
+    """
+
+    return export_task['export_name'] + "." + export_task['export_preset'].format_type
+
+
+def LoadManifest(export_manifests, export_directory):
+    """
+    Loads the manifest for an export directory, caching it for the rest of the export.
+    """
+
+    if export_directory in export_manifests:
+        return export_manifests[export_directory]
+
+    manifest = {'version': MANIFEST_VERSION, 'exports': {}}
+    manifest_path = os.path.join(export_directory, MANIFEST_NAME)
+
+    if os.path.exists(manifest_path):
+        try:
+            with open(manifest_path, 'r') as manifest_file:
+                saved_manifest = json.load(manifest_file)
+
+            if saved_manifest.get('version') == MANIFEST_VERSION:
+                manifest = saved_manifest
+
+        except (OSError, ValueError):
+            print("Capsule couldn't read the export manifest at " + manifest_path + ", it will be replaced.")
+
+    manifest['_changed'] = False
+    export_manifests[export_directory] = manifest
+    return manifest
+
+
+def IsExportTaskUnchanged(context, export_task, export_manifests):
+    """
+    Hashes the export task and compares it with the hash from the last export.  The new hash is stored
+    in the export task as 'export_hash' so it can be recorded once the export succeeds.
+
+    Returns True if the hash matches and the previously exported file still exists.
+    """
+
+    export_task['export_hash'] = HashExportTask(context, export_task)
+
+    manifest = LoadManifest(export_manifests, export_task['export_directory'])
+    entry = manifest['exports'].get(GetManifestKey(export_task))
+
+    if entry is None or entry['hash'] != export_task['export_hash']:
+        return False
+
+    # If the exported file was removed it needs exporting again.
+    file_pattern = glob.escape(export_task['export_directory'] + export_task['export_name']) + ".*"
+    return len(glob.glob(file_pattern)) > 0
+
+
+def RecordExportTask(export_task, export_manifests):
+    """
+    Records the hash of a successfully exported task in its directory manifest.
+    """
+
+    if 'export_hash' not in export_task:
+        return
+
+    manifest = LoadManifest(export_manifests, export_task['export_directory'])
+    manifest['exports'][GetManifestKey(export_task)] = {
+        'hash': export_task['export_hash'],
+        'time': datetime.now().isoformat(),
+    }
+    manifest['_changed'] = True
+
+
+def SaveManifests(export_manifests):
+    """
+    Writes every manifest that changed during the export back to disk.
+    """
+
+    for export_directory, manifest in export_manifests.items():
+        if manifest['_changed'] is False:
+            continue
+
+        manifest_path = os.path.join(export_directory, MANIFEST_NAME)
+        saved_manifest = {k: v for k, v in manifest.items() if not k.startswith('_')}
+
+        # Write to a temporary file first so an interrupted export can't leave a broken manifest.
+        temp_path = manifest_path + ".tmp"
+        with open(temp_path, 'w') as manifest_file:
+            json.dump(saved_manifest, manifest_file, indent = 1)
+
+        os.replace(temp_path, manifest_path)
+        manifest['_changed'] = False
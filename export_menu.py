@@ -49,7 +49,7 @@ class CAPSULE_OT_LocationSelectObject(Operator):
     def execute(self, context):
         if self.loc != -1:
             proxy = context.scene.CAPProxy
-            proxy.obj_location_preset = str(self.loc + 1)
+            proxy.obj_location_preset = str(self.loc)
         return {'FINISHED'}
 
 class CAPSULE_OT_LocationSelectCollection(Operator):
@@ -61,7 +61,7 @@ class CAPSULE_OT_LocationSelectCollection(Operator):
     def execute(self, context):
         if self.loc != -1:
             proxy = context.scene.CAPProxy
-            proxy.col_location_preset = str(self.loc + 1)
+            proxy.col_location_preset = str(self.loc)
 
         return {'FINISHED'}
 
@@ -83,7 +83,7 @@ class CAPSULE_MT_PieLocationObject(Menu):
 
         i = 0
         for loc in cap_file.location_presets:
-            pie.operator("capsule.location_select_object", text=cap_file.location_presets[i].name, icon = "FILE_FOLDER").loc = i
+            pie.operator("capsule.location_select_object", text=cap_file.location_presets[i].name, icon = "FILE_FOLDER").loc = cap_file.location_presets[i].instance_id
             i += 1
 
 class CAPSULE_MT_PieLocationCollection(Menu):
@@ -104,7 +104,7 @@ class CAPSULE_MT_PieLocationCollection(Menu):
 
         i = 0
         for loc in cap_file.location_presets:
-            pie.operator("capsule.location_select_collection", text=cap_file.location_presets[i].name, icon = "FILE_FOLDER").loc = i
+            pie.operator("capsule.location_select_collection", text=cap_file.location_presets[i].name, icon = "FILE_FOLDER").loc = cap_file.location_presets[i].instance_id
             i += 1
 
 class CAPSULE_OT_ExportSelectObject(Operator):
@@ -119,7 +119,7 @@ class CAPSULE_OT_ExportSelectObject(Operator):
     def execute(self, context):
         if self.loc != -1:
             proxy = context.scene.CAPProxy
-            proxy.obj_export_preset = str(self.loc + 1)
+            proxy.obj_export_preset = str(self.loc)
         return {'FINISHED'}
 
 class CAPSULE_OT_ExportSelectCollection(Operator):
@@ -134,7 +134,7 @@ class CAPSULE_OT_ExportSelectCollection(Operator):
     def execute(self, context):
         if self.loc != -1:
             proxy = context.scene.CAPProxy
-            proxy.col_export_preset = str(self.loc + 1)
+            proxy.col_export_preset = str(self.loc)
 
         return {'FINISHED'}
 
@@ -156,7 +156,7 @@ class CAPSULE_MT_PieExportObject(Menu):
 
         i = 0
         for loc in cap_file.export_presets:
-            pie.operator("capsule.export_select_object", text=cap_file.export_presets[i].name, icon = "PREFERENCES").loc = i
+            pie.operator("capsule.export_select_object", text=cap_file.export_presets[i].name, icon = "PREFERENCES").loc = cap_file.export_presets[i].instance_id
             i += 1
 
 class CAPSULE_MT_PieExportCollection(Menu):
@@ -177,7 +177,7 @@ class CAPSULE_MT_PieExportCollection(Menu):
 
         i = 0
         for loc in cap_file.export_presets:
-            pie.operator("capsule.export_select_collection", text=cap_file.export_presets[i].name, icon = "PREFERENCES").loc = i
+            pie.operator("capsule.export_select_collection", text=cap_file.export_presets[i].name, icon = "PREFERENCES").loc = cap_file.export_presets[i].instance_id
             i += 1
 
 class CAPSULE_OT_PieObjectMenu(Menu):
@@ -1,5 +1,5 @@
 
-import bpy, bmesh, os, platform, sys, time
+import bpy, bmesh, glob, os, platform, sys, time
 
 from datetime import datetime
 from mathutils import Vector
@@ -14,7 +14,15 @@ from .tk_utils import locations as loc_utils
 from .tk_utils import object_ops
 from .tk_utils import object_transform
 from .tk_utils import paths as path_utils
+from .tk_utils import presets as preset_utils
 from .tk_utils import record as record_utils
+from .tk_utils import trace as trace_utils
+from .tk_utils import dependencies
+from .tk_utils import mesh_cache
+from . import export_parallel
+from . import export_incremental
+from . import export_packscripts
+from .export_formats import GetExporter
 
 
 
@@ -40,151 +48,545 @@ class CAPSULE_OT_Export(Operator):
     )
 
     def execute(self, context):
-        
+
+        print('>> EXPORT OPERATOR <<')
+
+        use_workers = self.start_export(context)
+
+        if use_workers is True:
+            export_result = export_parallel.ExportTargetsParallel(context, self.export_targets[0], 
+                self.export_targets[1], self.worker_count)
+        else:
+            export_result = ExportTargets(context, self.export_targets[0], self.export_targets[1])
+
+        self.finish_export(context, export_result)
+
+        return {'FINISHED'}
+    
+
+    def invoke(self, context, event):
+
         preferences = context.preferences
         addon_prefs = preferences.addons[__package__].preferences
-        cap_scn = context.scene.CAPScn
-        cap_file = None
 
-        # /////////////////////////////////////////////////
-        # FETCH
+        # Exports only run in the background when asked to and when there's a window to report progress in.
+        if addon_prefs.use_modal_export is False or context.window is None:
+            return self.execute(context)
+        
+        print('>> EXPORT OPERATOR (MODAL) <<')
 
-        # Fetch objects and collections for export
-        # (fetching MUST be done first to preserve selection data)
+        use_workers = self.start_export(context)
 
-        print('>> EXPORT OPERATOR <<')
+        # Parallel exports already leave the work to other Blender processes.
+        if use_workers is True:
+            export_result = export_parallel.ExportTargetsParallel(context, self.export_targets[0], 
+                self.export_targets[1], self.worker_count)
+            self.finish_export(context, export_result)
+            return {'FINISHED'}
+
+        self.export_job = StartExportJob(context, self.export_targets[0], self.export_targets[1])
+
+        if len(self.export_job['tasks']) == 0:
+            self.finish_export(context, FinishExportJob(context, self.export_job))
+            return {'FINISHED'}
+
+        export_status = context.scene.CAPStatus
+        export_status.is_exporting = True
+        export_status.export_count = len(self.export_job['tasks'])
+
+        window_manager = context.window_manager
+        window_manager.progress_begin(0, len(self.export_job['tasks']))
+        self.update_progress(context)
+
+        # One export task is performed every time the timer fires, letting the UI redraw in between.
+        self.timer = window_manager.event_timer_add(0.01, window = context.window)
+        window_manager.modal_handler_add(self)
+
+        return {'RUNNING_MODAL'}
+
+
+    def modal(self, context, event):
 
-        export_objects = []
-        export_collections = []
+        if event.type == 'ESC' and event.value == 'PRESS':
+            print(">> EXPORT CANCELLED <<")
+            self.finish_modal_export(context, True)
+            return {'CANCELLED'}
         
-        # Set baseline export statistics
-        export_stats = {}
-        export_stats['obj_exported'] = 0
-        export_stats['col_exported'] = 0
-        export_stats['obj_hidden'] = 0
-        export_stats['col_hidden'] = 0
-        # timers
-        export_stats['_last_time'] = time.time()
-        export_stats['scene_setup_time'] = 0.0
-        export_stats['export_process_time'] = 0.0
-        export_stats['export_task_process_time'] = 0.0
-        export_stats['export_pack_script_time'] = 0.0
-        export_stats['export_task_api_time'] = 0.0
-        export_stats['scene_restore_time'] = 0.0
-
-        print(">> FETCHING TARGETS <<")
-
-        if self.set_mode == 'ALL':
-            for object in context.scene.objects:
-                if object.CAPObj.enable_export is True:
-                    export_objects.append(object)
-            
-            for collection in search_utils.GetSceneCollections(context.scene, False):
-                if collection.CAPCol.enable_export is True:
-                    export_collections.append(collection)
+        # The scene is in an export state, so every other event is blocked until the export is over.
+        if event.type != 'TIMER' or event.timer is not self.timer:
+            return {'RUNNING_MODAL'}
         
-        # this is for the pie menu!
-        elif self.set_mode == 'SELECTED_ALL':
-            for object in context.selected_objects:
-                if object.CAPObj.enable_export is True:
-                    export_objects.append(object)
-            
-            for collection in search_utils.GetSelectedCollections():
-                if collection.CAPCol.enable_export is True:
-                    export_collections.append(collection)
+        try:
+            tasks_remaining = PerformNextExportJobTask(context, self.export_job)
+        except Exception:
+            self.finish_modal_export(context, True)
+            raise
+
+        self.update_progress(context)
+
+        if tasks_remaining is True:
+            return {'RUNNING_MODAL'}
+
+        self.finish_modal_export(context, False)
+        return {'FINISHED'}
+
+
+    def start_export(self, context):
+        """
+        Starts the export trace and fetches the objects and collections to export.
+        Returns True if the export should be performed by parallel workers.
+        """
+
+        preferences = context.preferences
+        addon_prefs = preferences.addons[__package__].preferences
+
+        # Discard any trace left behind by an export that failed part way through.
+        trace_utils.StopTrace()
+
+        if addon_prefs.use_export_trace is True:
+            trace_utils.StartTrace("Capsule Export")
         
-        # this is for the object tab of the 3D view menu
-        elif self.set_mode == 'SELECTED_OBJECTS':
-            for object in context.selected_objects:
-                if object.CAPObj.enable_export is True:
-                    export_objects.append(object)
+        trace_utils.BeginSpan("CAPSULE_OT_Export.execute", set_mode = self.set_mode)
+
+        # Fetch objects and collections for export
+        # (fetching MUST be done first to preserve selection data)
+        with trace_utils.Span("GetExportTargets"):
+            self.export_targets = GetExportTargets(context, self.set_mode)
+
+        use_workers = False
+        self.worker_count = addon_prefs.export_worker_count
+
+        if self.worker_count > 1:
+            parallel_check = export_parallel.CanExportInParallel(context)
+            use_workers = parallel_check[0]
+
+            if use_workers is False:
+                print(parallel_check[1] + "  Exporting in this Blender session instead.")
         
-        # this is for the collections tab of the 3D view menu
-        elif self.set_mode == 'SELECTED_COLLECTIONS':
-            for collection in search_utils.GetSelectedCollections():
-                if collection.CAPCol.enable_export is True:
-                    export_collections.append(collection)
+        return use_workers
+
+
+    def finish_export(self, context, export_result):
+        """
+        Saves the export trace if one was recorded and reports the result of the export.
+        """
+
+        trace_utils.EndSpan(status = export_result['status'], exports = len(export_result['tasks']))
         
-        # this is for the list menu
-        elif self.set_mode == 'ACTIVE_LIST':
-            list_tab = int(str(cap_scn.list_switch))
+        trace = trace_utils.StopTrace()
+        if trace is not None:
+            WriteExportTrace(trace, export_result['tasks'])
+
+        self.report({export_result['status']}, export_result['message'])
+    
+
+    def update_progress(self, context):
+        """
+        Updates the progress bar and the export status shown in the Capsule panels.
+        """
 
-            if list_tab == 1:
-                index = cap_scn.object_list_index
-                export_objects.append(cap_scn.object_list[index].object)
+        export_job = self.export_job
+        export_status = context.scene.CAPStatus
 
-            elif list_tab == 2:
-                index = cap_scn.collection_list_index
-                export_collections.append(cap_scn.collection_list[index].collection)
+        export_status.export_index = export_job['task_index']
+        export_status.export_progress = (export_job['task_index'] / len(export_job['tasks'])) * 100
 
+        time_remaining = GetExportJobTimeRemaining(export_job)
+        export_status.time_remaining = -1.0 if time_remaining is None else time_remaining
+
+        # Pack Scripts rely on the target name during an export task, so it's only set between them.
+        if export_job['task_index'] < len(export_job['tasks']):
+            export_status.target_name = export_job['tasks'][export_job['task_index']]['export_name']
+
+        context.window_manager.progress_update(export_job['task_index'])
+
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+    def finish_modal_export(self, context, cancelled):
+        """
+        Stops the timer and progress bar, then restores the scene and reports the result.
+        """
+
+        window_manager = context.window_manager
+        window_manager.event_timer_remove(self.timer)
+        window_manager.progress_end()
+
+        export_status = context.scene.CAPStatus
+        export_status.is_exporting = False
+        export_status.target_name = ""
+        export_status.export_index = 0
+        export_status.export_count = 0
+        export_status.export_progress = 0.0
+        export_status.time_remaining = -1.0
+
+        self.finish_export(context, FinishExportJob(context, self.export_job, cancelled))
+
+        for area in context.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
+
+
+
+def GetExportTargets(context, set_mode):
+    """
+    Fetches the objects and collections that should be exported for the given export mode.
+    Modes match the ones used by CAPSULE_OT_Export.
+
+    Returns a list containing the export objects and export collections.
+    """
+
+    cap_scn = context.scene.CAPScn
+    export_objects = []
+    export_collections = []
+
+    print(">> FETCHING TARGETS <<")
+
+    if set_mode == 'ALL':
+        for object in context.scene.objects:
+            if object.CAPObj.enable_export is True:
+                export_objects.append(object)
+        
+        for collection in search_utils.GetSceneCollections(context.scene, False):
+            if collection.CAPCol.enable_export is True:
+                export_collections.append(collection)
+    
+    # this is for the pie menu!
+    elif set_mode == 'SELECTED_ALL':
+        for object in context.selected_objects:
+            if object.CAPObj.enable_export is True:
+                export_objects.append(object)
         
-        # print(export_objects)
-        # print(export_collections)
+        for collection in search_utils.GetSelectedCollections():
+            if collection.CAPCol.enable_export is True:
+                export_collections.append(collection)
+    
+    # this is for the object tab of the 3D view menu
+    elif set_mode == 'SELECTED_OBJECTS':
+        for object in context.selected_objects:
+            if object.CAPObj.enable_export is True:
+                export_objects.append(object)
+    
+    # this is for the collections tab of the 3D view menu
+    elif set_mode == 'SELECTED_COLLECTIONS':
+        for collection in search_utils.GetSelectedCollections():
+            if collection.CAPCol.enable_export is True:
+                export_collections.append(collection)
+    
+    # this is for the list menu
+    elif set_mode == 'ACTIVE_LIST':
+        list_tab = int(str(cap_scn.list_switch))
 
-        # /////////////////////////////////////////////////
-        # SETUP
+        if list_tab == 1:
+            index = cap_scn.object_list_index
+            export_objects.append(cap_scn.object_list[index].object)
+
+        elif list_tab == 2:
+            index = cap_scn.collection_list_index
+            export_collections.append(cap_scn.collection_list[index].collection)
+
+    # print(export_objects)
+    # print(export_collections)
     
-        # For the new pie menu, we need to see if any data exists before continuing
-        try:
-            cap_file = bpy.data.objects[addon_prefs.default_datablock].CAPFile
-        except KeyError:
-            self.report({'WARNING'}, "No Capsule Data for this blend file exists.  Please create it using the Toolshelf or Addon Preferences menu.")
-            return {'FINISHED'}
+    return [export_objects, export_collections]
 
-        print(">> BUILDING SCENE CONTEXT <<")
 
-        # Make a record of the scene before we do anything
-        global_record = record_utils.BuildSceneContext(context)
+def CreateExportStats():
+    """
+    Returns a new set of baseline export statistics.
+    """
 
-        # We need to make a separate definition set for preserving and restoring scene data.
-        result = record_utils.CheckCapsuleErrors(context)
+    export_stats = {}
+    export_stats['obj_exported'] = 0
+    export_stats['col_exported'] = 0
+    export_stats['obj_hidden'] = 0
+    export_stats['col_hidden'] = 0
+    export_stats['exports_unchanged'] = 0
+    export_stats['origin_moves_direct'] = 0
+    export_stats['origin_moves_operator'] = 0
+    export_stats['scene_scope_objects'] = 0
+    # compiled pack scripts are reused for the whole export
+    export_stats['pack_scripts'] = {}
+    # exports, files written and any other statistics reported by each exporter
+    export_stats['exporters'] = {}
+    # evaluated meshes that were reused, evaluated and removed from the mesh cache
+    export_stats['mesh_cache_hits'] = 0
+    export_stats['mesh_cache_misses'] = 0
+    export_stats['mesh_cache_evictions'] = 0
+    export_stats['mesh_cache_peak_bytes'] = 0
+    export_stats['_pack_script_cache'] = {}
+    # timers
+    export_stats['_last_time'] = time.time()
+    export_stats['scene_setup_time'] = 0.0
+    export_stats['export_process_time'] = 0.0
+    export_stats['export_task_process_time'] = 0.0
+    export_stats['export_pack_script_time'] = 0.0
+    export_stats['export_task_api_time'] = 0.0
+    export_stats['scene_restore_time'] = 0.0
 
-        if result is not None:
-            record_utils.RestoreSceneContext(context, global_record)
-            self.report({'WARNING'}, result)
-            return {'FINISHED'}
+    return export_stats
 
-        export_stats['scene_setup_time'] = time.time() - export_stats['_last_time']
-        export_stats['_last_time'] = time.time()
 
+@trace_utils.Traced
+def ExportTargets(context, export_objects, export_collections, use_incremental = None):
+    """
+    Records the scene, builds and performs export tasks for the given objects and collections
+    and then restores the scene.  This is shared by the export operator and headless exports.
+
+    If use_incremental is None, the "Skip Unchanged Exports" preference decides whether
+    exports with unchanged inputs are skipped.
 
-        # /////////////////////////////////////////////////
-        # EXPORT TASK PROCESSING
+    Returns a dictionary with the report status and message, the export statistics and the
+    export tasks that were performed.
+    """
 
-        object_export_result = BuildObjectExportTasks(context, cap_file, export_objects, global_record, export_stats)
-        export_stats = object_export_result[1]
-        collection_export_result = BuildCollectionExportTasks(context, cap_file, export_collections, global_record, export_stats)
-        export_stats = collection_export_result[1]
+    export_job = StartExportJob(context, export_objects, export_collections, use_incremental)
+
+    # If an export task fails, the scene still has to be restored before the error is passed on.
+    cancelled = True
+    try:
+        while PerformNextExportJobTask(context, export_job) is True:
+            pass
+        cancelled = False
+
+    finally:
+        export_result = FinishExportJob(context, export_job, cancelled)
+
+    return export_result
+
+
+def StartExportJob(context, export_objects, export_collections, use_incremental = None):
+    """
+    Checks for errors, builds export tasks for the given objects and collections and records the scene,
+    leaving the export tasks to be performed one at a time with PerformNextExportJobTask.
+    FinishExportJob must always be called afterwards to restore the scene.
+
+    Returns the export job as a dictionary.  If the export can't go ahead, the job has no
+    scene record or export tasks and its result explains why.
+    """
+
+    preferences = context.preferences
+    addon_prefs = preferences.addons[__package__].preferences
+    cap_file = None
+
+    if use_incremental is None:
+        use_incremental = addon_prefs.use_incremental_export
+
+    export_result = {}
+    export_result['status'] = 'INFO'
+    export_result['message'] = ''
+    export_result['stats'] = {}
+    export_result['tasks'] = []
+
+    export_stats = CreateExportStats()
+    export_result['stats'] = export_stats
+
+    export_job = {}
+    export_job['result'] = export_result
+    export_job['stats'] = export_stats
+    export_job['tasks'] = []
+    export_job['task_index'] = 0
+    export_job['task_times'] = []
+    export_job['record'] = None
+    export_job['manifests'] = {}
+    export_job['use_incremental'] = use_incremental
+
+    # /////////////////////////////////////////////////
+    # SETUP
 
-        export_tasks = object_export_result[0] + collection_export_result[0]
-        export_stats['export_process_time'] = time.time() - export_stats['_last_time']
+    # Collections can change between the depsgraph updates that clear the collection indexes, 
+    # so every export starts with fresh ones.
+    search_utils.ClearSceneCollectionIndexes()
+
+    # Resolved paths hold object and collection names, so they're only kept for one export.
+    path_utils.ClearPathTemplates()
+
+    # For the new pie menu, we need to see if any data exists before continuing
+    try:
+        cap_file = bpy.data.objects[addon_prefs.default_datablock].CAPFile
+    except KeyError:
+        export_result['status'] = 'WARNING'
+        export_result['message'] = "No Capsule Data for this blend file exists.  Please create it using the Toolshelf or Addon Preferences menu."
+        return export_job
+
+    # Errors are checked before building export tasks, as tasks can't be built from invalid presets.
+    result = record_utils.CheckCapsuleErrors(context, export_objects, export_collections)
+
+    if result is not None:
+        export_result['status'] = 'WARNING'
+        export_result['message'] = result
+        return export_job
+
+
+    # /////////////////////////////////////////////////
+    # EXPORT TASK PROCESSING
+
+    # Render visibility is found once for every export task that needs it.
+    render_hidden = None
+    if any(export_preset.filter_by_rendering for export_preset in cap_file.export_presets):
+        render_hidden = search_utils.GetRenderHiddenObjects(context)
+
+    object_export_result = BuildObjectExportTasks(context, cap_file, export_objects, None, export_stats, render_hidden)
+    export_stats = object_export_result[1]
+    collection_export_result = BuildCollectionExportTasks(context, cap_file, export_collections, None, export_stats, 
+        render_hidden)
+    export_stats = collection_export_result[1]
+
+    export_tasks = object_export_result[0] + collection_export_result[0]
+    export_result['tasks'] = export_tasks
+    export_job['tasks'] = export_tasks
+    export_stats['export_process_time'] = time.time() - export_stats['_last_time']
+    export_stats['_last_time'] = time.time()
+
+
+    # /////////////////////////////////////////////////
+    # SCENE SETUP
+
+    print(">> BUILDING SCENE CONTEXT <<")
+
+    # If anything fails from here, the shared indexes and any scene changes need undoing before the error is passed on.
+    try:
+        # Dependencies are searched for many times during an export, so they're indexed once here.
+        dependencies.StartDependencyIndex()
+
+        # Only the objects the export tasks can affect are recorded, unless they need the whole scene.
+        scene_scope = record_utils.GetSceneContextScope(context, export_tasks)
+        export_stats['scene_scope_objects'] = len(context.scene.objects)
+        if scene_scope is not None:
+            export_stats['scene_scope_objects'] = len(scene_scope)
+
+        # Make a record of the scene before we do anything
+        export_job['record'] = record_utils.BuildSceneContext(context, scene_scope)
+
+        # Evaluated meshes are kept for the whole export, so objects exported more than once are only evaluated once.
+        mesh_cache.StartMeshCache(addon_prefs.mesh_cache_size * 1048576)
+
+        export_stats['scene_setup_time'] = time.time() - export_stats['_last_time']
         export_stats['_last_time'] = time.time()
 
         # /////////////////////////////////////////////////
-        # EXPORT TASKS
+        # EXPORT DIRECTORIES
+
+        # Every export directory is found first, so each unique directory is only created once.
+        with trace_utils.Span("CreateDirectories"):
+            for export_task in export_tasks:
+                GetExportTaskDirectory(context, export_task, False)
+
+            path_utils.CreateDirectories([export_task['export_directory'] for export_task in export_tasks])
 
-        for export_task in export_tasks:
+    except Exception:
+        FinishExportJob(context, export_job, True)
+        raise
+
+    return export_job
+
+
+def PerformNextExportJobTask(context, export_job):
+    """
+    Performs the next export task in an export job, keeping track of how long it took.
+
+    Returns True if there are more export tasks left to perform.
+    """
 
-            GetExportTaskDirectory(context, export_task)
+    export_tasks = export_job['tasks']
+    export_stats = export_job['stats']
+    use_incremental = export_job['use_incremental']
+
+    if export_job['task_index'] >= len(export_tasks):
+        return False
+
+    export_task = export_tasks[export_job['task_index']]
+    task_start = time.time()
+
+    with trace_utils.Span(export_task['export_name'], 'export_task', 
+            export_type = export_task['export_type'], targets = len(export_task['targets'])) as task_span:
+
+        if use_incremental is True and export_incremental.IsExportTaskUnchanged(context, export_task, 
+                export_job['manifests']):
+            SkipExportTask(export_task, export_stats)
+            task_span['skipped'] = True
+
+        else:
             PerformExportTask(context, export_task, export_stats)
 
-        # /////////////////////////////////////////////////
-        # EXPORT SUMMARY  
+            if use_incremental is True:
+                export_incremental.RecordExportTask(export_task, export_job['manifests'])
+            
+            if trace_utils.IsTracing():
+                task_span['file_size'] = GetExportTaskFileSize(export_task)
+    
+    export_job['task_times'].append(time.time() - task_start)
+    export_job['task_index'] += 1
+
+    return export_job['task_index'] < len(export_tasks)
 
-        print(">> RESTORING SCENE <<")
-        export_info = GetExportSummary(export_stats)
-        self.report({export_info[0]}, export_info[1])
 
-        record_utils.RestoreSceneContext(context, global_record)
+def GetExportJobTimeRemaining(export_job):
+    """
+    Estimates how many seconds the rest of an export job will take from the export tasks performed so far.
+    Returns None if no export tasks have been performed yet.
+    """
 
-        export_stats['scene_restore_time'] += time.time() - export_stats['_last_time']
-        print(export_stats)
+    task_times = export_job['task_times']
+    if len(task_times) == 0:
+        return None
 
-        return {'FINISHED'}
+    remaining_tasks = len(export_job['tasks']) - export_job['task_index']
+    return (sum(task_times) / len(task_times)) * remaining_tasks
+
+
+def FinishExportJob(context, export_job, cancelled = False):
+    """
+    Saves the export manifests, summarises and restores the scene for an export job.
+    If the job was cancelled, any export tasks that weren't performed are left out of the result.
+
+    Returns a dictionary with the report status and message, the export statistics and the
+    export tasks that were performed.
+    """
+
+    export_result = export_job['result']
+    export_stats = export_job['stats']
+
+    # The export never got as far as changing the scene.
+    if export_job['record'] is None:
+        dependencies.StopDependencyIndex()
+        mesh_cache.StopMeshCache()
+        return export_result
+
+    export_incremental.SaveManifests(export_job['manifests'])
+
+    # /////////////////////////////////////////////////
+    # EXPORT SUMMARY  
+
+    print(">> RESTORING SCENE <<")
+    export_info = GetExportSummary(export_stats)
+    export_result['status'] = export_info[0]
+    export_result['message'] = export_info[1]
+
+    if cancelled is True:
+        export_result['tasks'] = export_job['tasks'][:export_job['task_index']]
+        export_result['status'] = 'WARNING'
+        export_result['message'] = "Export cancelled after " + str(export_job['task_index']) + " of " \
+            + str(len(export_job['tasks'])) + " exports."
+
+    # The shared indexes are always discarded, even if the scene couldn't be restored.
+    try:
+        record_utils.RestoreSceneContext(context, export_job['record'])
+    finally:
+        dependencies.StopDependencyIndex()
+        export_stats.update(mesh_cache.StopMeshCache())
 
+    export_stats['scene_restore_time'] += time.time() - export_stats['_last_time']
+    print(export_stats)
 
+    return export_result
 
-def BuildObjectExportTasks(context, cap_file, object_list, global_record, export_stats):
+
+
+@trace_utils.Traced
+def BuildObjectExportTasks(context, cap_file, object_list, global_record, export_stats, render_hidden = None):
     """
     Builds an initial list of export tasks given a list of objects, allowing export tasks
     to contain additional data and be modified as needed.
@@ -192,6 +594,9 @@ def BuildObjectExportTasks(context, cap_file, object_list, global_record, export
     This is separated to allow test functions to use the same sorting and preparation
     systems as the main export function.
 
+    render_hidden is a set from search_utils.GetRenderHiddenObjects, which is built here if it's
+    needed and wasn't given.
+
     Returns a list of export tasks and some statistics.
     """
     export_tasks = []
@@ -201,31 +606,16 @@ def BuildObjectExportTasks(context, cap_file, object_list, global_record, export
         export_task['export_start_time'] = datetime.now()
 
         # Get the export preset for the object
-        export_preset_index = int(item.CAPObj.export_preset) - 1
-        export_preset = cap_file.export_presets[export_preset_index]
+        export_preset = preset_utils.FindPreset(cap_file, 'export_preset', item.CAPObj.export_preset)
         targets = search_utils.GetObjectParentTree(context, item, item.CAPObj.object_children)
         targets += [item]
 
         # Filter by rendering
         if export_preset.filter_by_rendering is True:
-            renderable = []
-
-            for target in targets:
-                object_hidden = False
-
-                if target.hide_render is True:
-                    object_hidden = True
-
-                else:
-                    for render_search_col in target.users_collection:
-                        if render_search_col.hide_render is True:
-                            object_hidden = True
-                            break
-                
-                if object_hidden == False:
-                    renderable.append(target)
-            
-            targets = renderable
+            if render_hidden is None:
+                render_hidden = search_utils.GetRenderHiddenObjects(context)
+
+            targets = [target for target in targets if target not in render_hidden]
         
         # If our targets list is empty this collection shouldn't be included.
         if len(targets) == 0:
@@ -235,10 +625,12 @@ def BuildObjectExportTasks(context, cap_file, object_list, global_record, export
 
         # SUCCESSFUL INCLUSION
         export_task['export_name'] = item.name
+        export_task['export_type'] = 'OBJECT'
+        export_task['export_source'] = item
         export_task['export_preset'] = export_preset
         export_task['targets'] = targets
-        location_preset_index = int(item.CAPObj.location_preset) - 1
-        export_task['location_preset'] = cap_file.location_presets[location_preset_index]
+        export_task['location_preset'] = preset_utils.FindPreset(cap_file, 'location_preset', 
+            item.CAPObj.location_preset)
 
         export_task['origin_object'] = None
         if item.CAPObj.origin_point == 'Object':
@@ -253,7 +645,8 @@ def BuildObjectExportTasks(context, cap_file, object_list, global_record, export
     return [export_tasks, export_stats]
 
 
-def BuildCollectionExportTasks(context, cap_file, collection_list, global_record, export_stats):
+@trace_utils.Traced
+def BuildCollectionExportTasks(context, cap_file, collection_list, global_record, export_stats, render_hidden = None):
     """
     Builds an initial list of export tasks given a list of objects, allowing export tasks
     to contain additional data and be modified as needed.
@@ -261,6 +654,9 @@ def BuildCollectionExportTasks(context, cap_file, collection_list, global_record
     This is separated to allow test functions to use the same sorting and preparation
     systems as the main export function.
 
+    render_hidden is a set from search_utils.GetRenderHiddenObjects, which is built here if it's
+    needed and wasn't given.
+
     Returns a list of export tasks and some statistics.
     """
 
@@ -271,35 +667,19 @@ def BuildCollectionExportTasks(context, cap_file, collection_list, global_record
         export_task['export_start_time'] = datetime.now()
 
         # Get the export default for the object
-        export_preset_index = int(collection.CAPCol.export_preset) - 1
-        export_preset = cap_file.export_presets[export_preset_index]
+        export_preset = preset_utils.FindPreset(cap_file, 'export_preset', collection.CAPCol.export_preset)
 
         # Collect all objects that are applicable for this export
         collection_children = collection.CAPCol.collection_children
         targets = search_utils.GetCollectionObjectTree(context, collection, collection_children)
 
-        
-        # TODO : Find an efficient way to filter out objects that have rendering turned off by the collections they're in.
+
         # Filter by rendering
         if export_preset.filter_by_rendering is True:
-            renderable = []
-
-            for target in targets:
-                object_hidden = False
-
-                if target.hide_render is True:
-                    object_hidden = True
-
-                else:
-                    for render_search_col in target.users_collection:
-                        if render_search_col.hide_render is True:
-                            object_hidden = True
-                            break
-                
-                if object_hidden == False:
-                    renderable.append(target)
-            
-            targets = renderable
+            if render_hidden is None:
+                render_hidden = search_utils.GetRenderHiddenObjects(context)
+
+            targets = [target for target in targets if target not in render_hidden]
 
         # If our targets list is empty this collection shouldn't be included.
         if len(targets) == 0:
@@ -309,11 +689,13 @@ def BuildCollectionExportTasks(context, cap_file, collection_list, global_record
         
         # SUCCESSFUL INCLUSION
         export_task['export_name'] = collection.name
+        export_task['export_type'] = 'COLLECTION'
+        export_task['export_source'] = collection
         export_task['export_preset'] = export_preset
         export_task['targets'] = targets
 
-        location_preset_index = int(collection.CAPCol.location_preset) - 1
-        export_task['location_preset'] = cap_file.location_presets[location_preset_index]
+        export_task['location_preset'] = preset_utils.FindPreset(cap_file, 'location_preset', 
+            collection.CAPCol.location_preset)
 
         export_task['origin_object'] = None
         if collection.CAPCol.origin_point == 'Object':
@@ -328,15 +710,16 @@ def BuildCollectionExportTasks(context, cap_file, collection_list, global_record
     return [export_tasks, export_stats]
 
 
-def GetExportTaskDirectory(context, export_task):
+def GetExportTaskDirectory(context, export_task, create_directory = True):
     """
     Gets and sets the file path using information in the export task.
+    If create_directory is False, the directory needs to be created with path_utils.CreateDirectories.
     """
     preferences = context.preferences
     addon_prefs = preferences.addons[__package__].preferences
 
     export_directory = path_utils.CreateFilePath(export_task["location_preset"], export_task["targets"], 
-        None, addon_prefs.substitute_directories, export_task)
+        None, addon_prefs.substitute_directories, export_task, create_directory)
 
     if addon_prefs.substitute_directories is True:
         export_task['export_name'] = path_utils.SubstituteNameCharacters(export_task['export_name'])
@@ -345,6 +728,56 @@ def GetExportTaskDirectory(context, export_task):
 
 
 
+def SkipExportTask(export_task, export_stats):
+    """
+    Marks an export task as skipped because it hasn't changed since it was last exported.
+    """
+
+    print('>> SKIPPING UNCHANGED EXPORT - ' + export_task['export_name'] + ' <<')
+
+    export_task['export_skipped'] = True
+    export_stats['exports_unchanged'] += 1
+
+    if export_task['export_type'] == 'OBJECT':
+        export_stats['obj_exported'] -= 1
+    else:
+        export_stats['col_exported'] -= 1
+
+
+
+def GetExportTaskFileSize(export_task):
+    """
+    Returns the combined size in bytes of every file written by an export task.
+    """
+
+    if 'export_files' in export_task:
+        return sum(os.path.getsize(file_path) for file_path in export_task['export_files'])
+
+    file_pattern = glob.escape(export_task['export_directory'] + export_task['export_name']) + ".*"
+    return sum(os.path.getsize(file_path) for file_path in glob.glob(file_pattern))
+
+
+def WriteExportTrace(trace, export_tasks):
+    """
+    Saves an export trace as capsule_trace.json in the folder that contains every export directory.
+    """
+
+    export_directories = [task['export_directory'] for task in export_tasks if 'export_directory' in task]
+    if len(export_directories) == 0:
+        return
+    
+    try:
+        trace_directory = os.path.commonpath([os.path.abspath(d) for d in export_directories])
+    except ValueError:
+        # Exports on different drives have no common folder.
+        trace_directory = os.path.abspath(export_directories[0])
+    
+    trace_path = os.path.join(trace_directory, "capsule_trace.json")
+    trace_utils.WriteTrace(trace, trace_path)
+    print("Export trace saved to " + trace_path)
+
+
+
 def PerformExportTask(context, export_task, export_stats):
     """
     Exports a selection of objects into a single file.
@@ -366,25 +799,36 @@ def PerformExportTask(context, export_task, export_stats):
     # SETUP SCENE
 
     print("EXPORT TASK - Setup")
+    trace_utils.BeginSpan("Setup")
 
     # TODO 1.2 : Is this needed anymore?
     if export_preset.preserve_armature_constraints == True:
         export_task['armature_record'] = record_utils.MuteArmatureConstraints(context)
 
+        # Muted constraints change how armatures deform meshes, so cached meshes can't be used.
+        mesh_cache.ClearMeshCache()
+
     origin_location = {}
     if export_task["origin_object"] is not None:
 
         export_task["origin_object_loc"] = GetOriginObjectLocation(context, export_task['export_name'], export_task['origin_object'])
         
-        # TODO - If the targets have no modifiers, constraints or parent relationships that can cause problems,
-        # only move the target objects to improve performance.
-        object_transform.MoveAllFailsafe(context, export_task["origin_object"], [0.0, 0.0, 0.0])
+        # Only the targets and anything they depend on are moved, unless the scene requires a full move.
+        export_task['relocation_record'] = object_transform.RelocateObjects(context, export_task['targets'],
+            export_task["origin_object"], [0.0, 0.0, 0.0], export_task.get('relocation_plan'))
+        
+        if export_task['relocation_record']['plan']['use_operators'] is True:
+            export_stats['origin_moves_operator'] += 1
+        else:
+            export_stats['origin_moves_direct'] += 1
     
 
     # ////////////////////////////////
     # PACK SCRIPT INTRO
 
+    trace_utils.EndSpan()
     print("EXPORT TASK - Pack Script")
+    trace_utils.BeginSpan("Pack Script In")
 
     export_stats['export_task_process_time'] += time.time() - export_stats['_last_time']
     export_stats['_last_time'] = time.time()
@@ -398,11 +842,10 @@ def PerformExportTask(context, export_task, export_stats):
     bpy.ops.object.select_all(action= 'DESELECT')
 
     if addon_prefs.use_pack_scripts is True and pack_script is not None:
-        code = pack_script.as_string()
         
         # Perform code execution in a try block to catch issues and revert the export state early.
         try:
-            exec(code)
+            export_packscripts.RunPackScript(pack_script, export_stats, globals(), locals())
         except Exception as e:
             message = getattr(e, 'message', repr(e))
             
@@ -414,6 +857,10 @@ def PerformExportTask(context, export_task, export_stats):
                 " ", message)
 
 
+        # Pack Scripts can change anything, so meshes and collections indexed before it ran can't be used.
+        mesh_cache.ClearMeshCache()
+        search_utils.ClearSceneCollectionIndexes()
+
         if len(export_status['target_output']) == 0:
             return "A Pack Script used provided no target objects to export."
 
@@ -432,33 +879,23 @@ def PerformExportTask(context, export_task, export_stats):
     # ////////////////////////////////
     # EXPORT ! ! ! 
 
+    trace_utils.EndSpan()
     print("EXPORT TASK - Export API")
+    trace_utils.BeginSpan("Export " + export_preset.format_type)
 
     export_stats['export_pack_script_time'] += time.time() - export_stats['_last_time']
     export_stats['_last_time'] = time.time()
 
-    # based on the export location, send it to the right place
-    if export_preset.format_type == 'FBX':
-        export_preset.data_fbx.export(export_preset, object_file_path)
-
-    elif export_preset.format_type == 'OBJ':
-        export_preset.data_obj.export(export_preset, object_file_path)
-
-    elif export_preset.format_type == 'GLTF':
-        export_preset.data_gltf.export(context, export_preset, 
-            export_task['export_directory'], export_task['export_name'])
-
-    elif export_preset.format_type == 'Alembic':
-        export_preset.data_abc.export(context, export_preset, object_file_path)
+    # The exporter for the preset's format does the rest.
+    exporter = GetExporter(export_preset.format_type)
+    export_output = exporter.perform_export(context, export_preset, export_task)
+    export_task['export_files'] = export_output['files']
 
-    elif export_preset.format_type == 'Collada':
-        export_preset.data_dae.export(export_preset, object_file_path)
-    
-    elif export_preset.format_type == 'STL':
-        export_preset.data_stl.export(context, export_preset, object_file_path)
-
-    elif export_preset.format_type == 'USD':
-        export_preset.data_usd.export(context, export_preset, object_file_path)
+    format_stats = export_stats['exporters'].setdefault(export_preset.format_type, {'exports': 0, 'files': 0})
+    format_stats['exports'] += 1
+    format_stats['files'] += len(export_output['files'])
+    for key, value in export_output['stats'].items():
+        format_stats[key] = format_stats.get(key, 0) + value
     
     export_stats['export_task_api_time'] += time.time() - export_stats['_last_time']
     export_stats['_last_time'] = time.time()
@@ -467,15 +904,18 @@ def PerformExportTask(context, export_task, export_stats):
     # ////////////////////////////////
     # PACK SCRIPT OUTRO
 
+    trace_utils.EndSpan()
     print("EXPORT TASK - Pack Script Out")
+    trace_utils.BeginSpan("Pack Script Out")
 
     export_status = context.scene.CAPStatus
     export_status.target_name = export_task['export_name']
     export_status.target_status = 'AFTER_EXPORT'
 
     if addon_prefs.use_pack_scripts is True and export_task['pack_script'] is not None:
-        code = pack_script.as_string()
-        exec(code)
+        export_packscripts.RunPackScript(pack_script, export_stats, globals(), locals())
+        mesh_cache.ClearMeshCache()
+        search_utils.ClearSceneCollectionIndexes()
 
     # Reset the Export Status state
     export_status = context.scene.CAPStatus
@@ -491,20 +931,20 @@ def PerformExportTask(context, export_task, export_stats):
     # /////////////////////////////////////////////////
     # RESTORE SCENE
 
+    trace_utils.EndSpan()
     print("EXPORT TASK - Restore Scene")
+    trace_utils.BeginSpan("Restore")
 
     # Reverse movement and rotation
     if export_task["origin_object"] is not None:
-
-        # TODO - If the targets have no modifiers, constraints or parent relationships that can cause problems,
-        # only move the target objects to improve performance.
-        object_transform.MoveAllFailsafe(context, export_task["origin_object"], 
-            export_task["origin_object_loc"]['location'])
+        object_transform.RestoreRelocation(context, export_task['relocation_record'])
 
     # Cleans up any armature constraint modification (only works if Preserve Armature Constraints is off)
     if export_preset.preserve_armature_constraints == True:
         record_utils.RestoreArmatureConstraints(context, export_task["armature_record"])
+        mesh_cache.ClearMeshCache()
     
+    trace_utils.EndSpan()
     export_stats['export_task_process_time'] += time.time() - export_stats['_last_time']
     export_stats['_last_time'] = time.time()
 
@@ -535,18 +975,15 @@ def EmergencySceneRestore(context, export_task):
     # RESTORE SCENE
 
     # Reverse movement and rotation
-    if export_task["origin_object"] is not None:
-        
-        # TODO - If the targets have no modifiers, constraints or parent relationships that can cause problems,
-        # only move the target objects to improve performance.
-
-        object_transform.MoveAllFailsafe(context, export_task["origin_object"], 
-            export_task["origin_object_loc"]['location'])
+    if 'relocation_record' in export_task:
+        object_transform.RestoreRelocation(context, export_task['relocation_record'])
 
     # Cleans up any armature constraint modification (only works if Preserve Armature Constraints is off)
     if export_task['export_preset'].preserve_armature_constraints == True:
         record_utils.RestoreArmatureConstraints(context, export_task['armature_record'])
 
+    mesh_cache.ClearMeshCache()
+
 
 
 def GetOriginObjectLocation(context, export_name, origin_target):
@@ -583,10 +1020,15 @@ def GetExportSummary(stats):
     output_status = 'INFO'
 
     total_hide_count = stats['obj_hidden'] + stats['col_hidden']
+    unchanged_count = stats.get('exports_unchanged', 0)
 
     # If we didn't get anywhere, return early
     if stats['obj_exported'] == 0 and stats['col_exported'] == 0:
-        if total_hide_count > 1:
+        if unchanged_count > 0:
+            output = 'Nothing has changed since the last export, ' + str(unchanged_count) + ' exports were skipped.'
+            return [output_status, output]
+
+        elif total_hide_count > 1:
             output_status = 'WARNING'
             output = 'All exportables were hidden from the Render and excluded for export.  Uncheck "Filter by Render Visibility" in your Export Presets or edit your scene.'
             return [output_status, output]
@@ -629,6 +1071,13 @@ def GetExportSummary(stats):
             output += str(total_hide_count) + " file was not"
         
         output += " exported as their contents were hidden from the Render."
+    
+    if unchanged_count > 0:
+        output += "  "
+        if unchanged_count > 1:
+            output += str(unchanged_count) + " unchanged exports were skipped."
+        else:
+            output += str(unchanged_count) + " unchanged export was skipped."
 
     return [output_status, output]
 
@@ -0,0 +1,64 @@
+
+# ///////////////////////////////////////////////////////////////////
+# Compiles and runs pack scripts, reusing compiled scripts for the rest of an export.
+# ///////////////////////////////////////////////////////////////////
+
+import hashlib, time
+
+
+def GetPackScriptStats(pack_script, export_stats):
+    """
+    Returns the compile and run statistics for a single pack script, creating them if needed.
+    """
+
+    script_stats = export_stats['pack_scripts'].get(pack_script.name_full)
+
+    if script_stats is None:
+        script_stats = {'compiles': 0, 'compile_time': 0.0, 'runs': 0, 'run_time': 0.0}
+        export_stats['pack_scripts'][pack_script.name_full] = script_stats
+    
+    return script_stats
+
+
+def CompilePackScript(pack_script, export_stats):
+    """
+    Returns the compiled code for a pack script.  Compiled scripts are cached in the export statistics
+    by Text datablock and a hash of the text, so each script is only compiled again if it changes.
+    """
+
+    script_cache = export_stats['_pack_script_cache']
+    script_stats = GetPackScriptStats(pack_script, export_stats)
+
+    source = pack_script.as_string()
+    source_hash = hashlib.sha1(source.encode()).hexdigest()
+    cache_entry = script_cache.get(pack_script.name_full)
+
+    if cache_entry is None or cache_entry['hash'] != source_hash:
+        start_time = time.perf_counter()
+
+        # Using the Text name as the file name makes errors point to the right script.
+        code = compile(source, pack_script.name_full, 'exec')
+
+        script_stats['compiles'] += 1
+        script_stats['compile_time'] += time.perf_counter() - start_time
+
+        cache_entry = {'hash': source_hash, 'code': code}
+        script_cache[pack_script.name_full] = cache_entry
+    
+    return cache_entry['code']
+
+
+def RunPackScript(pack_script, export_stats, script_globals, script_locals):
+    """
+    Compiles (if needed) and runs a pack script with the given globals and locals, recording how long it took.
+    """
+
+    code = CompilePackScript(pack_script, export_stats)
+    script_stats = GetPackScriptStats(pack_script, export_stats)
+    start_time = time.perf_counter()
+
+    try:
+        exec(code, script_globals, script_locals)
+    finally:
+        script_stats['runs'] += 1
+        script_stats['run_time'] += time.perf_counter() - start_time
@@ -0,0 +1,257 @@
+
+# ///////////////////////////////////////////////////////////////////
+# Splits export tasks into shards and exports them with background Blender workers.
+# ///////////////////////////////////////////////////////////////////
+
+import bpy, json, os, subprocess, sys, tempfile, time
+
+from .tk_utils import record as record_utils
+from .tk_utils import search as search_utils
+from . import export_incremental
+
+
+def CanExportInParallel(context):
+    """
+    Returns a list with a boolean for whether the current file can be exported by background workers,
+    and a message explaining why if it can't.
+
+    Workers open the .blend file from disk, so it needs to be saved and have no unsaved changes.
+    """
+
+    if bpy.data.filepath == "":
+        return [False, "Parallel exports need the .blend file to be saved first."]
+
+    if bpy.data.is_dirty is True:
+        return [False, "Parallel exports need the .blend file to have no unsaved changes."]
+
+    return [True, ""]
+
+
+def BuildExportShards(export_tasks, shard_count):
+    """
+    Splits export tasks into a number of shards that each contain a similar number of target objects.
+    Tasks are only referred to by name, so shards can be handed to other Blender processes.
+
+    Returns a list of shard dictionaries with 'objects' and 'collections' name lists.
+    """
+
+    shards = []
+    shard_weights = []
+    for i in range(0, shard_count):
+        shards.append({'objects': [], 'collections': []})
+        shard_weights.append(0)
+
+    # Assign the heaviest tasks first to the lightest shard to keep workers evenly loaded.
+    sorted_tasks = sorted(export_tasks, key = lambda task: len(task['targets']), reverse = True)
+
+    for export_task in sorted_tasks:
+        lightest = shard_weights.index(min(shard_weights))
+
+        if export_task['export_type'] == 'OBJECT':
+            shards[lightest]['objects'].append(export_task['export_source'].name)
+        else:
+            shards[lightest]['collections'].append(export_task['export_source'].name)
+
+        shard_weights[lightest] += len(export_task['targets'])
+
+    return [shard for shard in shards if len(shard['objects']) + len(shard['collections']) > 0]
+
+
+def GetWorkerCommand(shard_path, result_path):
+    """
+    Returns the command used to launch a background Blender worker for a single shard.
+    """
+
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "headless_export.py")
+
+    return [
+        bpy.app.binary_path,
+        "-b", bpy.data.filepath,
+        "--python", script_path,
+        "--",
+        "--shard", shard_path,
+        "--result", result_path,
+    ]
+
+
+def MergeWorkerStats(export_stats, worker_stats):
+    """
+    Adds the statistics from a single worker into the combined export statistics.
+    Timers are summed, so they represent the total time spent across every worker.
+    """
+
+    for key, value in worker_stats.items():
+        if key.startswith('_') or key.endswith('_hidden'):
+            continue
+
+        if isinstance(value, (int, float)):
+            export_stats[key] = export_stats.get(key, 0) + value
+        
+        # Per-exporter and per-script statistics are merged the same way.
+        elif isinstance(value, dict):
+            MergeWorkerStats(export_stats.setdefault(key, {}), value)
+
+
+def ExportTargetsParallel(context, export_objects, export_collections, worker_count):
+    """
+    Exports the given objects and collections by splitting their export tasks between a number
+    of background Blender processes that each open the same .blend file.
+
+    Returns a dictionary in the same format as ExportTargets, with an additional 'exports' list
+    of records reported by each worker and an 'errors' list for any workers that failed.
+    """
+
+    # Imported here to avoid a circular import with the export operator module.
+    from .export_operators import (
+        BuildObjectExportTasks,
+        BuildCollectionExportTasks,
+        GetExportSummary,
+        CreateExportStats,
+        GetExportTaskDirectory,
+        SkipExportTask,
+    )
+
+    preferences = context.preferences
+    addon_prefs = preferences.addons[__package__].preferences
+
+    export_result = {}
+    export_result['status'] = 'INFO'
+    export_result['message'] = ''
+    export_result['tasks'] = []
+    export_result['exports'] = []
+    export_result['errors'] = []
+
+    export_stats = CreateExportStats()
+    export_stats['export_worker_count'] = 0
+    export_stats['export_wall_time'] = 0.0
+    export_result['stats'] = export_stats
+
+    try:
+        cap_file = bpy.data.objects[addon_prefs.default_datablock].CAPFile
+    except KeyError:
+        export_result['status'] = 'WARNING'
+        export_result['message'] = "No Capsule Data for this blend file exists.  Please create it using the Toolshelf or Addon Preferences menu."
+        return export_result
+
+    # Errors are checked once here rather than failing in every worker.
+    result = record_utils.CheckCapsuleErrors(context, export_objects, export_collections)
+    if result is not None:
+        export_result['status'] = 'WARNING'
+        export_result['message'] = result
+        return export_result
+
+
+    # /////////////////////////////////////////////////
+    # BUILD SHARDS
+
+    # Hidden exports are counted here, workers only receive the ones that will be exported.
+    render_hidden = None
+    if any(export_preset.filter_by_rendering for export_preset in cap_file.export_presets):
+        render_hidden = search_utils.GetRenderHiddenObjects(context)
+
+    object_export_result = BuildObjectExportTasks(context, cap_file, export_objects, None, export_stats, render_hidden)
+    collection_export_result = BuildCollectionExportTasks(context, cap_file, export_collections, None, export_stats,
+        render_hidden)
+    export_tasks = object_export_result[0] + collection_export_result[0]
+    export_result['tasks'] = export_tasks
+
+    # Unchanged exports are skipped here, and the manifests are only updated by this process
+    # so workers never write to the same manifest at once.
+    export_manifests = {}
+    if addon_prefs.use_incremental_export is True:
+        changed_tasks = []
+
+        for export_task in export_tasks:
+            GetExportTaskDirectory(context, export_task)
+
+            if export_incremental.IsExportTaskUnchanged(context, export_task, export_manifests):
+                SkipExportTask(export_task, export_stats)
+            else:
+                changed_tasks.append(export_task)
+
+        export_tasks = changed_tasks
+
+    export_stats['obj_exported'] = 0
+    export_stats['col_exported'] = 0
+    export_stats['scene_setup_time'] = time.time() - export_stats['_last_time']
+    export_stats['_last_time'] = time.time()
+
+    shards = BuildExportShards(export_tasks, max(1, min(worker_count, len(export_tasks))))
+    export_stats['export_worker_count'] = len(shards)
+
+
+    # /////////////////////////////////////////////////
+    # RUN WORKERS
+
+    print(">> STARTING " + str(len(shards)) + " EXPORT WORKERS <<")
+
+    with tempfile.TemporaryDirectory(prefix = "capsule_") as shard_dir:
+        workers = []
+
+        for i, shard in enumerate(shards):
+            shard_path = os.path.join(shard_dir, "shard_" + str(i) + ".json")
+            result_path = os.path.join(shard_dir, "result_" + str(i) + ".json")
+            log_path = os.path.join(shard_dir, "log_" + str(i) + ".txt")
+
+            with open(shard_path, 'w') as shard_file:
+                json.dump(shard, shard_file)
+
+            # Output goes to a file so a chatty worker can't fill and block a pipe.
+            log_file = open(log_path, 'w')
+            process = subprocess.Popen(GetWorkerCommand(shard_path, result_path),
+                stdout = log_file, stderr = subprocess.STDOUT)
+
+            workers.append({'index': i, 'process': process, 'log_file': log_file,
+                'log_path': log_path, 'result_path': result_path})
+
+        for worker in workers:
+            worker['process'].wait()
+            worker['log_file'].close()
+
+            worker_result = None
+            if os.path.exists(worker['result_path']):
+                with open(worker['result_path'], 'r') as result_file:
+                    worker_result = json.load(result_file)
+
+            if worker_result is None or worker_result['status'] == 'ERROR':
+                with open(worker['log_path'], 'r') as log_file:
+                    log_tail = log_file.read()[-2000:]
+
+                message = "Worker " + str(worker['index']) + " failed"
+                if worker_result is not None:
+                    message += ": " + worker_result['message']
+
+                print(message)
+                print(log_tail)
+                export_result['errors'].append({'worker': worker['index'], 'message': message, 'log': log_tail})
+
+            if worker_result is not None:
+                MergeWorkerStats(export_stats, worker_result['stats'])
+                export_result['exports'] += worker_result['exports']
+
+                if worker_result['status'] != 'ERROR':
+                    exported_names = set(record['export_name'] for record in worker_result['exports'])
+                    for export_task in export_tasks:
+                        if export_task['export_name'] in exported_names:
+                            export_incremental.RecordExportTask(export_task, export_manifests)
+
+    export_incremental.SaveManifests(export_manifests)
+
+    export_stats['export_wall_time'] = time.time() - export_stats['_last_time']
+    export_stats['_last_time'] = time.time()
+
+
+    # /////////////////////////////////////////////////
+    # EXPORT SUMMARY
+
+    export_info = GetExportSummary(export_stats)
+    export_result['status'] = export_info[0]
+    export_result['message'] = export_info[1]
+
+    if len(export_result['errors']) > 0:
+        export_result['status'] = 'ERROR'
+        export_result['message'] += "  " + str(len(export_result['errors'])) + " of " + str(len(shards)) \
+            + " export workers failed, check the console for details."
+
+    print(export_stats)
+    return export_result
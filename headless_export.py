@@ -0,0 +1,232 @@
+
+# ///////////////////////////////////////////////////////////////////
+# Runs Capsule exports from the command line without a 3D View.
+# ///////////////////////////////////////////////////////////////////
+
+# Usage (the Capsule addon must be installed and enabled in the user preferences):
+#
+#   blender -b --python <addon folder>/headless_export.py -- path/to/file.blend --mode ALL --result result.json
+#
+# The .blend file can also be passed to Blender directly instead of after the "--".
+# The process exits with code 0 when the export succeeds and 1 when it doesn't, and the
+# result file contains the export status, message, statistics and every exported file.  Exports skipped by
+# incremental exporting because nothing changed are listed separately under "skipped".
+
+import bpy, json, os, sys, time
+
+from datetime import datetime
+
+
+EXPORT_MODES = ('ALL', 'SELECTED_ALL', 'SELECTED_OBJECTS', 'SELECTED_COLLECTIONS')
+
+
+def ParseArguments(argv):
+    """
+    Parses the arguments that were given after Blender's "--" separator.
+    """
+
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog = "headless_export.py",
+        description = "Exports a .blend file with Capsule in a background Blender session.",
+    )
+
+    parser.add_argument("blend_file", nargs = "?", default = None,
+        help = "The .blend file to open and export.  If not given, the file Blender was opened with is used.")
+    parser.add_argument("--mode", choices = EXPORT_MODES, default = 'ALL',
+        help = "The Capsule export mode to use.")
+    parser.add_argument("--result", default = None,
+        help = "Where to write the JSON export result.  Defaults to printing it.")
+    parser.add_argument("--incremental", action = "store_true",
+        help = "Skips exports that haven't changed since they were last exported.")
+    parser.add_argument("--trace", action = "store_true",
+        help = "Saves a capsule_trace.json file of export timings next to the exported files.")
+    parser.add_argument("--workers", type = int, default = 1,
+        help = "Splits the export between this many background Blender processes.")
+    parser.add_argument("--shard", default = None,
+        help = "(Internal) A JSON file of object and collection names to export instead of using --mode.")
+
+    return parser.parse_args(argv)
+
+
+def GetScriptArguments():
+    """
+    Returns only the command line arguments meant for this script.
+    """
+
+    if "--" in sys.argv:
+        return sys.argv[sys.argv.index("--") + 1:]
+
+    return []
+
+
+def GetShardTargets(context, shard_path):
+    """
+    Loads the object and collection names from a shard file created by a parallel export.
+
+    Returns a list containing the export objects and export collections.
+    """
+
+    with open(shard_path, 'r') as shard_file:
+        shard = json.load(shard_file)
+
+    export_objects = [context.scene.objects[name] for name in shard['objects']]
+    export_collections = [bpy.data.collections[name] for name in shard['collections']]
+
+    return [export_objects, export_collections]
+
+
+def BuildExportRecord(export_task):
+    """
+    Converts a performed export task into a JSON-friendly dictionary.
+    """
+
+    export_preset = export_task['export_preset']
+    record = {}
+    record['export_name'] = export_task['export_name']
+    record['export_preset'] = export_preset.name
+    record['format_type'] = export_preset.format_type
+    record['location_preset'] = export_task['location_preset'].name
+    record['export_directory'] = export_task.get('export_directory', '')
+    record['targets'] = [target.name for target in export_task['targets']]
+    record['files'] = export_task.get('export_files', [])
+    record['skipped'] = export_task.get('export_skipped', False)
+
+    return record
+
+
+def RunHeadlessExport(blend_file = None, set_mode = 'ALL', worker_count = 1, shard_path = None, 
+        use_incremental = False, use_trace = False):
+    """
+    Opens the given .blend file if needed and runs the same export process as CAPSULE_OT_Export.
+
+    Returns a JSON-friendly dictionary describing the result.
+    """
+
+    from .export_operators import GetExportTargets, ExportTargets, WriteExportTrace
+    from .tk_utils import trace as trace_utils
+    from .export_parallel import CanExportInParallel, ExportTargetsParallel
+
+    result = {}
+    result['blend_file'] = blend_file
+    result['mode'] = set_mode
+    result['status'] = 'ERROR'
+    result['message'] = ''
+    result['stats'] = {}
+    result['exports'] = []
+    result['skipped'] = []
+    result['start_time'] = datetime.now().isoformat()
+
+    start_time = time.time()
+
+    try:
+        if blend_file is not None:
+            bpy.ops.wm.open_mainfile(filepath = os.path.abspath(blend_file))
+
+        result['blend_file'] = bpy.data.filepath
+        context = bpy.context
+
+        # Preferences aren't saved in background sessions, so this only lasts for this export.
+        addon_prefs = context.preferences.addons[__package__].preferences
+        if use_incremental is True:
+            addon_prefs.use_incremental_export = True
+        
+        if use_trace is True or addon_prefs.use_export_trace is True:
+            trace_utils.StartTrace("Capsule Headless Export")
+
+        # Fetching MUST be done first to preserve selection data.
+        if shard_path is not None:
+            export_targets = GetShardTargets(context, shard_path)
+        else:
+            export_targets = GetExportTargets(context, set_mode)
+
+        if worker_count > 1 and shard_path is None and CanExportInParallel(context)[0] is True:
+            export_result = ExportTargetsParallel(context, export_targets[0], export_targets[1], worker_count)
+        elif shard_path is not None:
+            # Workers never skip exports themselves, the process that created the shards does.
+            export_result = ExportTargets(context, export_targets[0], export_targets[1], False)
+        else:
+            export_result = ExportTargets(context, export_targets[0], export_targets[1])
+
+        trace = trace_utils.StopTrace()
+        if trace is not None:
+            WriteExportTrace(trace, export_result['tasks'])
+
+        result['status'] = export_result['status']
+        result['message'] = export_result['message']
+        result['stats'] = {k: v for k, v in export_result['stats'].items() if not k.startswith('_')}
+
+        # Parallel exports already return records built by each worker, and only
+        # the tasks skipped by this process are left to record.
+        export_records = [BuildExportRecord(task) for task in export_result['tasks']]
+        result['skipped'] = [record for record in export_records if record['skipped'] is True]
+
+        if 'exports' in export_result:
+            result['exports'] = export_result['exports']
+            result['errors'] = export_result['errors']
+        else:
+            result['exports'] = [record for record in export_records if record['skipped'] is False]
+
+    except Exception as e:
+        result['status'] = 'ERROR'
+        result['message'] = getattr(e, 'message', repr(e))
+
+    result['total_time'] = time.time() - start_time
+    return result
+
+
+def WriteResult(result, result_path):
+    """
+    Writes the export result as JSON, or prints it if no path is given.
+    """
+
+    output = json.dumps(result, indent = 4, default = str)
+
+    if result_path is None:
+        print(output)
+        return
+
+    result_dir = os.path.dirname(os.path.abspath(result_path))
+    if not os.path.exists(result_dir):
+        os.makedirs(result_dir)
+
+    with open(result_path, 'w') as result_file:
+        result_file.write(output)
+
+
+def main(argv = None):
+    """
+    The command line entry point.  Returns the process exit code.
+    """
+
+    if argv is None:
+        argv = GetScriptArguments()
+
+    args = ParseArguments(argv)
+    result = RunHeadlessExport(args.blend_file, args.mode, args.workers, args.shard, args.incremental, args.trace)
+    WriteResult(result, args.result)
+
+    print(">> HEADLESS EXPORT " + result['status'] + " << " + result['message'])
+
+    print(">> " + str(len(result['exports'])) + " EXPORTED, " + str(len(result['skipped'])) + " UNCHANGED <<")
+
+    # Unchanged exports that were skipped aren't failures, but they don't count as exports either.
+    if result['status'] == 'ERROR' or (result['status'] == 'WARNING' and len(result['exports']) == 0):
+        return 1
+
+    return 0
+
+
+
+# When run with "blender --python", this file isn't imported as part of the addon package,
+# so the installed addon is enabled and the packaged version of this module is used instead.
+# The addon's module name is the name of the folder it was installed into, which isn't always "Capsule".
+if __name__ == "__main__":
+    import addon_utils, importlib
+
+    addon_name = os.path.basename(os.path.dirname(os.path.abspath(__file__)))
+    addon_utils.enable(addon_name, default_set = False)
+    headless_export = importlib.import_module(addon_name + ".headless_export")
+
+    sys.exit(headless_export.main())
@@ -6,6 +6,7 @@ from bpy.props import EnumProperty
 from .tk_utils import search as search_utils
 from .tk_utils import select as select_utils
 from .tk_utils import object_ops
+from .tk_utils import dependencies
 from .export_formats import CAP_ExportFormat
 
 
@@ -82,13 +83,20 @@ class CAPSULE_OT_PackScript_CreateTest(Operator):
         #             print(props)
 
         # object_ops.DuplicateWithDatablocks(context, target_object, target_object.name + " CAP")
-        object_tree = search_utils.GetObjectReferenceTree(target_object)
-        
-        # print(object_tree)
-        # print([m for m in bpy.data.materials 
-        #        if target_object.user_of_id(m)])
 
-        search_utils.FindObjectDependencies(context, object_tree)
+        # Both searches share one dependency index, rather than each building their own.
+        dependencies.StartDependencyIndex()
+
+        try:
+            object_tree = search_utils.GetObjectReferenceTree(target_object)
+            
+            # print(object_tree)
+            # print([m for m in bpy.data.materials 
+            #        if target_object.user_of_id(m)])
+
+            search_utils.FindObjectDependencies(context, object_tree)
+        finally:
+            dependencies.StopDependencyIndex()
 
         return {'FINISHED'}
         
@@ -23,6 +23,18 @@ from ..export_formats import (
 )
 
 
+from ..tk_utils.presets import InvalidatePresetEnumItems
+
+
+def CAP_Update_PresetName(self, context):
+    """
+    Rebuilds the preset menus when a preset is renamed.
+    """
+
+    InvalidatePresetEnumItems()
+    return None
+
+
 class CAPSULE_ExportPreset(PropertyGroup):
     # Used to define properties for a single export preset.
     # Export presets include Capsule-specific features as well as .FBX exporter features
@@ -31,12 +43,13 @@ class CAPSULE_ExportPreset(PropertyGroup):
     name: StringProperty(
         name = "Preset Name",
         description = "The name of the export preset.",
-        default = ""
+        default = "",
+        update = CAP_Update_PresetName,
     )
 
     instance_id: IntProperty(
         name = "Instance ID",
-        description = "INTERNAL ONLY - Unique ID used to pair with format data, that holds the full export settings for the chosen file type."
+        description = "INTERNAL ONLY - Unique ID that objects and collections use to refer to this preset, so it stays the same when presets are added, removed or reordered"
     )
 
     description: StringProperty(
@@ -133,7 +146,8 @@ class CAPSULE_LocationPreset(PropertyGroup):
 
     name: StringProperty(
         name = "",
-        description = "The name of the file path default."
+        description = "The name of the file path default.",
+        update = CAP_Update_PresetName,
     )
 
     path: StringProperty(
@@ -143,6 +157,11 @@ class CAPSULE_LocationPreset(PropertyGroup):
         subtype = "FILE_PATH"
     )
 
+    instance_id: IntProperty(
+        name = "Instance ID",
+        description = "INTERNAL ONLY - Unique ID that objects and collections use to refer to this preset, so it stays the same when presets are added, removed or reordered"
+    )
+
 
 class CAPSULE_FileData(PropertyGroup):
     """
@@ -153,6 +172,9 @@ class CAPSULE_FileData(PropertyGroup):
     # the version of Capsule this datablock was created with
     version_number: FloatProperty(default= 1.31)
 
+    # the version of the preset references used by objects and collections (see tk_utils.presets)
+    preset_id_version: IntProperty(default= 0)
+
     # the available file presets
     export_presets: CollectionProperty(type=CAPSULE_ExportPreset)
 
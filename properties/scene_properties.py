@@ -12,10 +12,19 @@ from ..update.update_list import (
     CAP_Update_CollectionListExport, 
     CAP_Update_FocusCollection, 
     CAP_Update_SelectCollection, 
-    CAP_Update_CollectionListRemove
+    CAP_Update_CollectionListRemove,
+
+    CAP_Update_ObjectEnableExport,
+    CAP_Update_CollectionEnableExport,
+)
+
+from ..update.update_objects import (
+    CAP_Update_LocationPresetUser,
+    CAP_Update_ExportPresetUser,
 )
 
 from ..tk_utils.search import GetSelectedCollections
+from ..tk_utils.presets import GetPresetEnumItems, NO_PRESET_ITEMS
 
 class ObjectListItem(PropertyGroup):
     """
@@ -194,9 +203,7 @@ class CAPSULE_Scene_Preferences(PropertyGroup):
 
 def GetLocationPresets(scene, context):
 
-    items = [
-        ("0", "None",  "", 0),
-    ]
+    items = NO_PRESET_ITEMS
 
     preferences = context.preferences
     addon_prefs = preferences.addons['Capsule'].preferences
@@ -205,18 +212,11 @@ def GetLocationPresets(scene, context):
     except KeyError:
         return items
 
-    u = 1
-
-    for i,x in enumerate(cap_file.location_presets):
-        items.append((str(i+1), x.name, x.name, i+1))
-
-    return items
+    return GetPresetEnumItems(cap_file, 'location_presets')
 
 def GetExportDefaults(scene, context):
 
-    items = [
-        ("0", "None",  "", 0),
-        ]
+    items = NO_PRESET_ITEMS
 
     preferences = context.preferences
     addon_prefs = preferences.addons['Capsule'].preferences
@@ -226,12 +226,7 @@ def GetExportDefaults(scene, context):
         return items
 
 
-    u = 1
-
-    for i,x in enumerate(cap_file.export_presets):
-        items.append((str(i+1), x.name, x.name, i+1))
-
-    return items
+    return GetPresetEnumItems(cap_file, 'export_presets')
 
 class CAPSULE_Object_Preferences(PropertyGroup):
     """
@@ -243,6 +238,7 @@ class CAPSULE_Object_Preferences(PropertyGroup):
         name = "Enable Export",
         description = "Enable or disable exports of this Object using Capsule",
         default = False,
+        update = CAP_Update_ObjectEnableExport,
     )
 
     origin_point: EnumProperty(
@@ -271,12 +267,14 @@ class CAPSULE_Object_Preferences(PropertyGroup):
         name = "Export Location",
         description = "Set the file path that the object will be exported to",
         items = GetLocationPresets,
+        update = CAP_Update_LocationPresetUser,
     )
 
     export_preset: EnumProperty(
         name = "Export Preset",
         description = "Set the Export Preset used to export the object",
         items = GetExportDefaults,
+        update = CAP_Update_ExportPresetUser,
     )
 
     pack_script: PointerProperty(
@@ -305,6 +303,7 @@ class CAPSULE_Collection_Preferences(PropertyGroup):
         name = "Export Collection",
         description = "Enable or disable exports of this Collection using Capsule",
         default = False,
+        update = CAP_Update_CollectionEnableExport,
     )
     
     origin_point: EnumProperty(
@@ -356,12 +355,14 @@ class CAPSULE_Collection_Preferences(PropertyGroup):
         name = "Export Location",
         description = "Select the file path that the collection will be exported to",
         items = GetLocationPresets,
+        update = CAP_Update_LocationPresetUser,
     )
 
     export_preset: EnumProperty(
         name = "Export Preset",
         description = "Select the Export Preset used to export the collection",
         items = GetExportDefaults,
+        update = CAP_Update_ExportPresetUser,
     )
     
     pack_script: PointerProperty(
@@ -413,6 +414,39 @@ class CAPSULE_Export_Status(PropertyGroup):
         default = 'NONE',
     )
 
+    is_exporting: BoolProperty(
+        name = "Is Exporting",
+        description = "(Internal Only) True while an export is running in the background of the interface",
+        default = False,
+    )
+
+    export_index: IntProperty(
+        name = "Exports Completed",
+        description = "The number of Export Targets that have been exported so far",
+        default = 0,
+    )
+
+    export_count: IntProperty(
+        name = "Export Count",
+        description = "The number of Export Targets being exported",
+        default = 0,
+    )
+
+    export_progress: FloatProperty(
+        name = "Export Progress",
+        description = "How much of the current export has been completed",
+        subtype = 'PERCENTAGE',
+        default = 0.0,
+        min = 0.0,
+        max = 100.0,
+    )
+
+    time_remaining: FloatProperty(
+        name = "Time Remaining",
+        description = "An estimate of how many seconds are left in the current export, based on how long previous Export Targets took.  This is -1 until one has been exported",
+        default = -1.0,
+    )
+
 
 
 
@@ -10,6 +10,8 @@ from bpy.props import (
     CollectionProperty,
 )
 
+from ..tk_utils.presets import GetPresetEnumItems, NO_PRESET_ITEMS
+
 from ..update.update_objects import (
     CAP_Update_ProxyObj_EnableExport, 
     CAP_Update_ProxyObj_OriginPoint, 
@@ -34,9 +36,7 @@ from bpy.types import PropertyGroup
 
 def GetLocationPresets(scene, context):
 
-    items = [
-        ("0", "None",  "", 0),
-        ]
+    items = NO_PRESET_ITEMS
 
     preferences = context.preferences
     addon_prefs = preferences.addons['Capsule'].preferences
@@ -46,18 +46,11 @@ def GetLocationPresets(scene, context):
         return items
 
 
-    u = 1
-
-    for i,x in enumerate(cap_file.location_presets):
-        items.append((str(i+1), x.name, x.name, i+1))
-
-    return items
+    return GetPresetEnumItems(cap_file, 'location_presets')
 
 def GetExportDefaults(scene, context):
 
-    items = [
-        ("0", "None",  "", 0),
-        ]
+    items = NO_PRESET_ITEMS
 
     preferences = context.preferences
     addon_prefs = preferences.addons['Capsule'].preferences
@@ -67,12 +60,7 @@ def GetExportDefaults(scene, context):
         return items
 
 
-    u = 1
-
-    for i,x in enumerate(cap_file.export_presets):
-        items.append((str(i+1), x.name, x.name, i+1))
-
-    return items
+    return GetPresetEnumItems(cap_file, 'export_presets')
 
 class CAPSULE_Proxy_Properties(PropertyGroup):
     """
@@ -82,7 +70,7 @@ class CAPSULE_Proxy_Properties(PropertyGroup):
     # TODO: Ensure this works properly with the new Collection selection code.
     disable_updates: BoolProperty(
         name = "(INTERNAL) Disable Updates",
-        description = "Used by CheckSelectedObject to update the currently stored proxy properties without triggering update functions.",
+        description = "Used by SyncSelectedObject to update the currently stored proxy properties without triggering update functions.",
         default = False,
     )
 
@@ -158,42 +158,143 @@ def SearchConstraints(target, currentList):
 
     return object_list
 
+# The ID types tracked by the dependency index.
+INDEXED_ID_TYPES = {'OBJECT', 'MESH', 'MATERIAL', 'NODETREE', 'ACTION'}
+
+# The dependency index for the current export, if one was started.
+dependency_index = None
+
+
+def BuildDependencyIndex():
+    """
+    Builds an index of which datablocks use each other with a single bpy.data.user_map() call.
+
+    Returns a dictionary with 'users' (the datablocks that use each datablock) and 'uses' (the
+    datablocks each datablock uses) edges, an 'object_uses' subset containing only object to object edges, 
+    and a 'memo' dictionary of dependency searches that have already been made.
+    """
+
+    user_map = bpy.data.user_map(key_types = INDEXED_ID_TYPES, value_types = INDEXED_ID_TYPES)
+
+    index = {}
+    index['users'] = user_map
+    index['uses'] = {}
+    index['object_uses'] = {}
+    index['memo'] = {}
+
+    for used, users in user_map.items():
+        used_is_object = isinstance(used, bpy.types.Object)
+
+        for user in users:
+            index['uses'].setdefault(user, set()).add(used)
+
+            if used_is_object and isinstance(user, bpy.types.Object):
+                index['object_uses'].setdefault(user, set()).add(used)
+    
+    return index
+
+
+def StartDependencyIndex():
+    """
+    Builds a dependency index that every dependency search shares until StopDependencyIndex is called.
+    Used to build the index once for an entire export.
+    """
+
+    global dependency_index
+    dependency_index = BuildDependencyIndex()
+
+
+def StopDependencyIndex():
+    """
+    Discards the shared dependency index.
+    """
+
+    global dependency_index
+    dependency_index = None
+
+
+def GetDependencyIndex():
+    """
+    Returns the shared dependency index if one was started, otherwise builds a new one.
+    Anything that searches dependencies more than once should bracket the searches with
+    StartDependencyIndex and StopDependencyIndex, as building the index reads every datablock in the file.
+    """
+
+    if dependency_index is not None:
+        return dependency_index
+    
+    return BuildDependencyIndex()
+
+
+def GetObjectDependencies(index, item):
+    """
+    Returns the objects a single object uses directly.  Objects created after the index was built
+    are searched through their modifiers, constraints and parent instead.
+    """
+
+    if item in index['users']:
+        return index['object_uses'].get(item, ())
+    
+    found_list = SearchModifiers(item, []) + SearchConstraints(item, [])
+    if item.parent is not None:
+        found_list.append(item.parent)
+    
+    return found_list
+
+
 def GetDependencies(object_list):
     """
     Searches and returns a list of all objects that the given objects are dependant on for modifiers or constraints.
     """
 
-    #print(">>> Getting Dependencies <<<")
+    index = GetDependencyIndex()
+
+    memo_key = frozenset(object_list)
+    if memo_key in index['memo']:
+        return list(index['memo'][memo_key])
 
-    totalFoundList = []
-    totalFoundList += object_list
+    checked_list = []
+    checked_set = set()
+    current_list = list(object_list)
 
-    #print("object_list...", object_list)
+    # Parents, modifier and constraint targets are all found through the same edges.
+    while len(current_list) != 0:
+        item = current_list.pop()
+        if item in checked_set:
+            continue
 
-    checkedList = []
-    currentList = []
-    currentList += object_list
+        checked_list.append(item)
+        checked_set.add(item)
 
-    while len(currentList) != 0:
-        item = currentList.pop()
-        #print("Checking new objects...", item.name)
+        for dependency in GetObjectDependencies(index, item):
+            if dependency not in checked_set:
+                current_list.append(dependency)
 
-        modifierOutput = SearchModifiers(item, totalFoundList)
-        constraintOutput = SearchConstraints(item, totalFoundList)
+    index['memo'][memo_key] = checked_list
+    return list(checked_list)
+
+
+def GetDataDependencies(object_list):
+    """
+    Returns a list of every unique non-object datablock (meshes, materials, node groups and actions) 
+    that the given objects use, including datablocks used through other datablocks.
+    """
 
-        currentList += modifierOutput
-        currentList += constraintOutput
+    index = GetDependencyIndex()
 
-        checkedList.append(item)
-        totalFoundList.append(item)
+    found_list = []
+    checked_set = set(object_list)
+    current_list = list(object_list)
 
-        # Parents can affect the export indirectly, so it needs to be looked at.
-        if item.parent != None:
-            if (item.parent in totalFoundList) is False:
-                #print("Parent found in", item.name, ":", item.parent.name)
-                currentList.append(item.parent)
+    while len(current_list) != 0:
+        item = current_list.pop()
 
-    #print("Total found objects...", len(checkedList))
-    #print("Total found objects...", len(checkedList))
+        for used in index['uses'].get(item, ()):
+            if used in checked_set or isinstance(used, bpy.types.Object):
+                continue
 
-    return checkedList
\ No newline at end of file
+            checked_set.add(used)
+            found_list.append(used)
+            current_list.append(used)
+    
+    return found_list
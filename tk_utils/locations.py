@@ -1,72 +1,67 @@
-
 import bpy
+import numpy as np
 from math import pi, radians, degrees
 from mathutils import Vector
 
-from .select import FocusObject
-from .object_ops import SwitchObjectMode, Find3DViewContext
-
 #//////////////////// - BASIC DEFINITIONS - ///////////////////////
 
-def FindWorldSpaceObjectLocation(context, target):
-    """
-    Finds the given object location in world space, NO MATTER WHAT THE CIRCUMSTANCES.
-    """
+# These read locations from evaluated matrices rather than snapping the 3D cursor to a selection,
+# so they have no selection, cursor or mode side effects and work without a 3D View.
 
-    # Preserve the current 3D cursor
-    cursor_loc = bpy.data.scenes[bpy.context.scene.name].cursor.location
-    previous_cursor_loc = [cursor_loc[0], cursor_loc[1], cursor_loc[2]]
+def FindWorldSpaceObjectLocations(context, targets):
+    """
+    Finds the world space locations of many objects at once.
 
-    override = Find3DViewContext()
+    Returns an (N, 3) NumPy array in the same order as the given targets.
+    """
 
-    with context.temp_override(window = override['window'], area = override['area'], 
-            region = override['region']):
-        
-        # Calculate the translation vector using the 3D cursor
-        FocusObject(target)
-        bpy.ops.view3d.snap_cursor_to_selected()
-        cursor_location = bpy.data.scenes[bpy.context.scene.name].cursor.location
+    depsgraph = context.evaluated_depsgraph_get()
+    locations = np.empty((len(targets), 3), dtype = np.float64)
 
-        # Because vectors are pointers, we need to keep regenerating them
-        cursor_loc_copy = Vector((cursor_location[0], cursor_location[1], cursor_location[2]))
+    for i, target in enumerate(targets):
+        locations[i] = target.evaluated_get(depsgraph).matrix_world.translation
 
-        # Restore the original cursor location and matrix
-        bpy.data.scenes[bpy.context.scene.name].cursor.location = previous_cursor_loc
+    return locations
 
-    return cursor_loc_copy
 
-def FindWorldSpaceBoneLocation(target, context, bone):
+def FindWorldSpaceBoneLocations(context, target, bones = None):
     """
-    Finds the given bone location in world space, NO MATTER WHAT THE CIRCUMSTANCES.
+    Finds the world space head locations of many pose bones in an armature at once.
+    If no bones are given, every pose bone in the armature is used.
+
+    Returns an (N, 3) NumPy array in the same order as the given bones.
     """
 
-    # Preserve the current 3D cursor
-    cursor_loc = bpy.data.scenes[bpy.context.scene.name].cursor.location
-    previous_cursor_loc = [cursor_loc[0], cursor_loc[1], cursor_loc[2]]
+    depsgraph = context.evaluated_depsgraph_get()
+    target_eval = target.evaluated_get(depsgraph)
+    pose_bones = target_eval.pose.bones
 
-    override = Find3DViewContext()
+    # Bone heads are in armature space, so read them all and transform them in one go.
+    heads = np.empty(len(pose_bones) * 3, dtype = np.float32)
+    pose_bones.foreach_get('head', heads)
+    heads = heads.reshape((-1, 3)).astype(np.float64)
 
-    with context.temp_override(window = override['window'], area = override['area'], 
-            region = override['region']):
+    if bones is not None:
+        indices = [pose_bones.find(bone.name) for bone in bones]
+        heads = heads[indices]
 
-        # Calculate the translation vector using the 3D cursor
-        bpy.ops.object.select_all(action= 'DESELECT')
-        prev_mode = SwitchObjectMode('POSE', target)
-        bpy.data.objects[target.name].data.bones.active = bpy.data.objects[target.name].pose.bones[bone.name].bone
-        bpy.ops.view3d.snap_cursor_to_selected()
-    
-    cursor_location = Vector((0.0, 0.0, 0.0))
-    cursor_location = bpy.context.scene.cursor.location
+    matrix_world = np.array(target_eval.matrix_world, dtype = np.float64)
+    return heads @ matrix_world[:3, :3].T + matrix_world[:3, 3]
 
-    # Because vectors are pointers, we need to keep regenerating them
-    cursor_loc_copy = Vector((0.0, 0.0, 0.0))
-    cursor_loc_copy[0] = cursor_location[0]
-    cursor_loc_copy[1] = cursor_location[1]
-    cursor_loc_copy[2] = cursor_location[2]
 
-    SwitchObjectMode(prev_mode, target)
+def FindWorldSpaceObjectLocation(context, target):
+    """
+    Finds the given object location in world space, NO MATTER WHAT THE CIRCUMSTANCES.
+    """
+
+    location = FindWorldSpaceObjectLocations(context, [target])[0]
+    return Vector(location)
 
-    # Restore the original cursor location and matrix
-    bpy.data.scenes[bpy.context.scene.name].cursor.location = previous_cursor_loc
 
-    return cursor_loc_copy
+def FindWorldSpaceBoneLocation(target, context, bone):
+    """
+    Finds the given bone location in world space, NO MATTER WHAT THE CIRCUMSTANCES.
+    """
+
+    location = FindWorldSpaceBoneLocations(context, target, [bone])[0]
+    return Vector(location)
@@ -0,0 +1,190 @@
+# ///////////////////////////////////////////////////////////////////
+# Keeps evaluated mesh data for the length of an export, so objects that are exported several times are only evaluated once.
+# ///////////////////////////////////////////////////////////////////
+
+import numpy as np
+from collections import OrderedDict
+
+
+# The mesh cache for the current export, if one was started.
+mesh_cache = None
+
+
+def StartMeshCache(max_bytes):
+    """
+    Starts a mesh cache that GetMeshArrays shares until StopMeshCache is called.  Once the cached
+    meshes use more than max_bytes, the least recently used meshes are removed.
+    A max_bytes of 0 disables the cache.
+    """
+
+    global mesh_cache
+    mesh_cache = {}
+    mesh_cache['meshes'] = OrderedDict()
+    mesh_cache['max_bytes'] = max_bytes
+    mesh_cache['bytes'] = 0
+
+    mesh_cache['stats'] = {}
+    mesh_cache['stats']['mesh_cache_hits'] = 0
+    mesh_cache['stats']['mesh_cache_misses'] = 0
+    mesh_cache['stats']['mesh_cache_evictions'] = 0
+    mesh_cache['stats']['mesh_cache_peak_bytes'] = 0
+
+
+def StopMeshCache():
+    """
+    Discards the mesh cache.  Returns a dictionary of cache statistics for the export statistics,
+    or an empty dictionary if no cache was started.
+    """
+
+    global mesh_cache
+    if mesh_cache is None:
+        return {}
+
+    stats = mesh_cache['stats']
+    mesh_cache = None
+    return stats
+
+
+def ClearMeshCache():
+    """
+    Removes every cached mesh, keeping the cache statistics.  This needs to be called whenever
+    the scene changes in a way that could change evaluated meshes, such as after a Pack Script runs.
+    """
+
+    if mesh_cache is None:
+        return
+
+    mesh_cache['meshes'].clear()
+    mesh_cache['bytes'] = 0
+
+
+def ReadMeshArrays(mesh):
+    """
+    Reads the vertices, faces, triangles, active UV layer and loop normals of a mesh into NumPy arrays
+    in object space.  Everything any writer needs is read at once, so a cached mesh can be used by all of them.
+    """
+
+    arrays = {}
+
+    coordinates = np.empty(len(mesh.vertices) * 3, dtype = np.float32)
+    mesh.vertices.foreach_get('co', coordinates)
+    arrays['coordinates'] = coordinates.reshape(-1, 3)
+
+    loop_vertices = np.empty(len(mesh.loops), dtype = np.int32)
+    mesh.loops.foreach_get('vertex_index', loop_vertices)
+    arrays['loop_vertices'] = loop_vertices
+
+    polygon_sizes = np.empty(len(mesh.polygons), dtype = np.int32)
+    mesh.polygons.foreach_get('loop_total', polygon_sizes)
+    arrays['polygon_sizes'] = polygon_sizes
+
+    polygon_loop_starts = np.empty(len(mesh.polygons), dtype = np.int32)
+    mesh.polygons.foreach_get('loop_start', polygon_loop_starts)
+    arrays['polygon_loop_starts'] = polygon_loop_starts
+
+    polygon_materials = np.empty(len(mesh.polygons), dtype = np.int32)
+    mesh.polygons.foreach_get('material_index', polygon_materials)
+    arrays['polygon_materials'] = polygon_materials
+
+    mesh.calc_loop_triangles()
+
+    triangle_loops = np.empty(len(mesh.loop_triangles) * 3, dtype = np.int32)
+    mesh.loop_triangles.foreach_get('loops', triangle_loops)
+    arrays['triangle_loops'] = triangle_loops
+
+    triangle_materials = np.empty(len(mesh.loop_triangles), dtype = np.int32)
+    mesh.loop_triangles.foreach_get('material_index', triangle_materials)
+    arrays['triangle_materials'] = triangle_materials
+
+    arrays['uvs'] = None
+    if mesh.uv_layers.active is not None:
+        uvs = np.empty(len(mesh.loops) * 2, dtype = np.float32)
+        mesh.uv_layers.active.data.foreach_get('uv', uvs)
+        arrays['uvs'] = uvs.reshape(-1, 2)
+
+    # Loop normals match the face normal on flat faces, so they cover both flat and smooth shading.
+    if hasattr(mesh, 'calc_normals_split'):
+        mesh.calc_normals_split()
+
+    normals = np.empty(len(mesh.loops) * 3, dtype = np.float32)
+    mesh.loops.foreach_get('normal', normals)
+    arrays['normals'] = normals.reshape(-1, 3)
+
+    return arrays
+
+
+def EvaluateMeshArrays(item, depsgraph, use_mesh_modifiers):
+    """
+    Evaluates the mesh of an object and reads it into NumPy arrays.
+    Returns None if the object has no mesh.
+    """
+
+    if use_mesh_modifiers is True:
+        mesh_owner = item.evaluated_get(depsgraph)
+    else:
+        mesh_owner = item
+
+    try:
+        mesh = mesh_owner.to_mesh()
+    except RuntimeError:
+        return None
+
+    if mesh is None:
+        return None
+
+    try:
+        return ReadMeshArrays(mesh)
+    finally:
+        mesh_owner.to_mesh_clear()
+
+
+def GetMeshArraysSize(arrays):
+    """
+    Returns how many bytes a set of mesh arrays uses.
+    """
+
+    return sum(array.nbytes for array in arrays.values() if array is not None)
+
+
+def GetMeshArrays(item, depsgraph, use_mesh_modifiers):
+    """
+    Returns the evaluated mesh of an object as a dictionary of NumPy arrays in object space, reusing it
+    if the object was already evaluated with the same depsgraph mode and modifier setting during this export.
+    Returns None if the object has no mesh.
+
+    The arrays are shared between everything that uses the cache, so they must not be modified.
+    """
+
+    if mesh_cache is None or mesh_cache['max_bytes'] <= 0:
+        return EvaluateMeshArrays(item, depsgraph, use_mesh_modifiers)
+
+    meshes = mesh_cache['meshes']
+    stats = mesh_cache['stats']
+    key = (item.name_full, depsgraph.mode, use_mesh_modifiers)
+
+    if key in meshes:
+        meshes.move_to_end(key)
+        stats['mesh_cache_hits'] += 1
+        return meshes[key]['arrays']
+
+    stats['mesh_cache_misses'] += 1
+    arrays = EvaluateMeshArrays(item, depsgraph, use_mesh_modifiers)
+    if arrays is None:
+        return None
+
+    size = GetMeshArraysSize(arrays)
+
+    # Meshes too large for the cache are still returned, they just aren't kept.
+    if size > mesh_cache['max_bytes']:
+        return arrays
+
+    while mesh_cache['bytes'] + size > mesh_cache['max_bytes']:
+        evicted = meshes.popitem(last = False)[1]
+        mesh_cache['bytes'] -= evicted['size']
+        stats['mesh_cache_evictions'] += 1
+
+    meshes[key] = {'arrays': arrays, 'size': size}
+    mesh_cache['bytes'] += size
+    stats['mesh_cache_peak_bytes'] = max(stats['mesh_cache_peak_bytes'], mesh_cache['bytes'])
+
+    return arrays
@@ -6,6 +6,8 @@ def Find3DViewContext():
     """
     Builds and returns a context override for when you NEED TO MAKE SURE your operators
     are executing in a 3D View.
+
+    Returns None if no 3D View exists, such as when Blender is running in background mode.
     """
 
     def getArea(type):
@@ -14,23 +16,43 @@ def Find3DViewContext():
                 if area.type == type:
                     return area
 
+    # Background mode (blender -b) has no window, workspace or areas to override with.
+    if bpy.context.window is None or bpy.context.workspace is None:
+        return None
+
     # https://blender.stackexchange.com/questions/15118/how-do-i-override-context-for-bpy-ops-mesh-loopcut
     win      = bpy.context.window
     scr      = win.screen
-    areas3d  = [getArea('VIEW_3D')]
-    region   = [region for region in areas3d[0].regions if region.type == 'WINDOW']
+    area3d   = getArea('VIEW_3D')
+
+    if area3d is None:
+        return None
+
+    region   = [region for region in area3d.regions if region.type == 'WINDOW']
 
     override = {'window':win,
                 'screen':scr,
-                'area'  :getArea('VIEW_3D'),
+                'area'  :area3d,
                 'region':region[0],
                 'scene' :bpy.context.scene,
-                'space' :getArea('VIEW_3D').spaces[0],
+                'space' :area3d.spaces[0],
                 }
     
     return override
 
 
+def IsHeadless():
+    """
+    Returns True if Capsule is running without a usable 3D View, like a background (blender -b) session.
+    Operator-driven helpers use this to switch to their data-only fallbacks.
+    """
+
+    if bpy.app.background is True:
+        return True
+
+    return Find3DViewContext() is None
+
+
 
 def DuplicateObject(target):
     """
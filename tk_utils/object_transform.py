@@ -1,8 +1,16 @@
 
 import bpy
 from mathutils import Vector
-from .object_ops import SwitchObjectMode, Find3DViewContext
+from .object_ops import SwitchObjectMode, Find3DViewContext, IsHeadless
 from .select import FocusObject, SelectObject, ActivateObject
+from .dependencies import GetDependencies
+
+# Object constraints that never change an object's location, so roots using them can be offset directly.
+NON_LOCATION_CONSTRAINTS = {
+    'COPY_ROTATION', 'LIMIT_ROTATION', 'TRACK_TO', 'DAMPED_TRACK', 'LOCKED_TRACK',
+    'COPY_SCALE', 'LIMIT_SCALE', 'MAINTAIN_VOLUME',
+}
+
 
 def MoveAllFailsafe(context, move_target, destination):
     """
@@ -23,6 +31,11 @@ def MoveAllFailsafe(context, move_target, destination):
     location[1] = destination[1]
     location[2] = destination[2]
 
+    # Background sessions have no 3D View to translate in, so move the data directly instead.
+    if IsHeadless():
+        MoveAllHeadless(context, move_target, location)
+        return
+
     # Prevent auto keyframing and location lock from being active
     auto_key = context.scene.tool_settings.use_keyframe_insert_auto
     lock_location_record = move_target.lock_location
@@ -82,6 +95,148 @@ def MoveAllFailsafe(context, move_target, destination):
 
     print('Move finished.')
 
+def MoveAllHeadless(context, move_target, destination):
+    """
+    Moves every object in the scene so the move target sits at the destination, without using operators.
+    Only parentless objects are offset, children follow their parents as they would with a translate operator.
+    """
+
+    root_location = move_target.matrix_world.translation
+    location_diff = Vector((destination[0], destination[1], destination[2])) - root_location
+
+    for item in context.scene.objects:
+        if item.parent is None:
+            item.location += location_diff
+    
+    context.view_layer.update()
+
+def BuildRelocationPlan(context, targets):
+    """
+    Works out which objects need to move so the given targets can be relocated without operators.
+    The plan contains the parentless roots of the targets and of every object they depend on
+    through parents, constraints and modifiers.
+
+    If moving only those roots could change how the targets look, such as when a root has a constraint
+    that affects its location, 'use_operators' is set to True
+    and 'reason' explains why, meaning MoveAllFailsafe should be used instead.
+    """
+
+    plan = {}
+    plan['use_operators'] = False
+    plan['reason'] = ''
+    plan['roots'] = []
+
+    closure = set(GetDependencies(list(targets)))
+    closure.update(targets)
+
+    for item in closure:
+
+        # Drivers can read the transforms of objects that aren't being moved.
+        if item.animation_data is not None:
+            if len(item.animation_data.drivers) > 0:
+                plan['use_operators'] = True
+                plan['reason'] = item.name + " has drivers"
+                return plan
+
+        # Bone constraints aren't part of the dependency search.
+        if item.type == 'ARMATURE' and item.pose is not None:
+            for bone in item.pose.bones:
+                for constraint in bone.constraints:
+                    constraint_target = getattr(constraint, 'target', None)
+                    if constraint_target is not None and constraint_target not in closure:
+                        plan['use_operators'] = True
+                        plan['reason'] = item.name + " has a bone constraint targeting " + constraint_target.name
+                        return plan
+        
+        # Geometry Nodes can read other objects in ways that can't be easily searched.
+        for modifier in item.modifiers:
+            if modifier.type == 'NODES' and modifier.node_group is not None:
+                for node in modifier.node_group.nodes:
+                    if node.type in {'OBJECT_INFO', 'COLLECTION_INFO'}:
+                        plan['use_operators'] = True
+                        plan['reason'] = item.name + " uses Geometry Nodes that read other objects"
+                        return plan
+
+    # Collect the unique parentless roots of everything that needs to move.
+    roots = set()
+    for item in closure:
+        root = item
+        while root.parent is not None:
+            root = root.parent
+        roots.add(root)
+
+    # Animated roots would be reset to their keyframes whenever the scene is re-evaluated.
+    for root in roots:
+        if root.animation_data is not None and root.animation_data.action is not None:
+            plan['use_operators'] = True
+            plan['reason'] = root.name + " has an animated transform"
+            return plan
+
+        # A root's own constraints can move it again or clamp the offset, such as a Child Of
+        # or Copy Location constraint whose target also moves, or a Limit Location constraint.
+        for constraint in root.constraints:
+            if constraint.mute is True or constraint.influence == 0.0:
+                continue
+
+            if constraint.type not in NON_LOCATION_CONSTRAINTS:
+                plan['use_operators'] = True
+                plan['reason'] = root.name + " has a " + constraint.type.replace('_', ' ').title() + " constraint"
+                return plan
+
+    plan['roots'] = list(roots)
+    return plan
+
+
+def RelocateObjects(context, targets, move_target, destination, plan = None):
+    """
+    Moves the given targets so the move target's world location sits at the destination.
+    Uses BuildRelocationPlan to only offset the roots of the targets and their dependencies
+    using object data, and only falls back to MoveAllFailsafe if the plan requires it.
+    A plan that was already built for the same targets can be passed in to avoid building it twice.
+
+    Returns a record that RestoreRelocation uses to put everything back.
+    """
+
+    if plan is None:
+        plan = BuildRelocationPlan(context, targets)
+
+    record = {}
+    record['move_target'] = move_target
+    record['previous_location'] = move_target.matrix_world.translation.copy()
+    record['plan'] = plan
+    record['root_locations'] = []
+
+    if record['plan']['use_operators'] is True:
+        print("Using full scene move, " + record['plan']['reason'] + ".")
+        MoveAllFailsafe(context, move_target, destination)
+        return record
+
+    location_diff = Vector((destination[0], destination[1], destination[2])) - record['previous_location']
+
+    for root in record['plan']['roots']:
+        record['root_locations'].append((root, root.location.copy()))
+        root.location += location_diff
+
+    context.view_layer.update()
+    return record
+
+
+def RestoreRelocation(context, record):
+    """
+    Restores objects moved with RelocateObjects to their original locations.
+    """
+
+    if record['plan']['use_operators'] is True:
+        MoveAllFailsafe(context, record['move_target'], record['previous_location'])
+        return
+
+    # Original values are restored directly so no floating point drift can build up.
+    for root, location in record['root_locations']:
+        root.location = location
+
+    context.view_layer.update()
+
+
 def MoveObjectFailsafe(target, context, location):
     """
     Safely moves the given object to the given location.  Will ensure nothing is animated or screwed up in the process.
@@ -93,6 +248,14 @@ def MoveObjectFailsafe(target, context, location):
 
     #print(">>>>>> Moving Object <<<<<<")
 
+    # Background sessions have no 3D View to translate in, so set the world matrix directly instead.
+    if IsHeadless():
+        target_matrix = target.matrix_world.copy()
+        target_matrix.translation = Vector((location[0], location[1], location[2]))
+        target.matrix_world = target_matrix
+        context.view_layer.update()
+        return
+
     override = Find3DViewContext()
 
     with context.temp_override(window = override['window'], area = override['area'], 
@@ -161,6 +324,15 @@ def MoveBone(target, bone, context, location):
     copy_location[1] = location[1]
     copy_location[2] = location[2]
 
+    # Background sessions have no 3D View to translate in, so set the pose matrix directly instead.
+    if IsHeadless():
+        pose_bone = target.pose.bones[bone.name]
+        bone_matrix = pose_bone.matrix.copy()
+        bone_matrix.translation = target.matrix_world.inverted() @ copy_location
+        pose_bone.matrix = bone_matrix
+        context.view_layer.update()
+        return
+
     # Prevent auto keyframing from being active
     auto_key = context.scene.tool_settings.use_keyframe_insert_auto
     lock_transform = target.lock_location
@@ -1,162 +1,186 @@
-
-import bpy, os, platform
+import bpy, os, platform, re
 
 from datetime import datetime
 
 
-def CreateFilePath(location_preset, targets, collection, replace_invalid_chars, export_task):
-    """
-    Extracts and calculates a final path with which to export the target to.
-    """
+# The platform is checked once, rather than every time a path is built.
+SYSTEM = platform.system()
+PATH_SLASH = "\\" if SYSTEM == 'Windows' else "/"
 
-    # First fetch the path
-    location_path = location_preset.path
+# Characters that can't be used in names and full paths on each platform.
+NAME_INVALID_CHARACTERS = {
+    'Windows': ["\\", "/", "*", "?", "\"", "<", ">", "|", ":"],
+    'Darwin': [":", "/"],
+    'linux': [":", "/"],
+    'linux2': [":", "/"],
+}
 
-    if location_path == "":
-        raise Exception('WARNING: This location preset has no path defined, please define it!')
+PATH_INVALID_CHARACTERS = {
+    'Windows': ["*", "?", "<", ">", "|", ":"],
+    'Darwin': [":"],
+    'linux': [":"],
+    'linux2': [":"],
+}
 
-    elif location_path.find('//') != -1:
-        location_path = bpy.path.abspath(location_path)
+# Matches tags like ^export_name^ in location paths.
+TAG_PATTERN = re.compile(r"\^([a-z_]+)\^")
 
-    # If Windows, split the drive indicator
-    drive_indicator = ""
-    if platform.system() == 'Windows':
-        drive_index = location_path.find("\\")
+# Compiled location paths, keyed by the path and the blend file relative paths are resolved against.
+# These are cleared at the start of every export, so they only hold the paths of one export.
+path_templates = {}
 
-        if drive_index is not -1:
-            drive_split = location_path.split("\\", 1)
-            drive_indicator = drive_split[0]
-            location_path = drive_split[1]
-    
 
-    #print("Current Location Path - ", location_path)
+def ClearPathTemplates():
+    """
+    Removes every compiled location path and the paths resolved from them.
+    """
 
-    # Now substitute any tags
-    location_path = FillTags(location_path, targets, collection, replace_invalid_chars, export_task)
+    path_templates.clear()
 
-    # directory failsafe
-    if platform.system() == 'Windows':
-        if location_path.endswith("\\") == False:
-            location_path += "\\"
-    else:
-        if location_path.endswith("/") == False:
-            location_path += "/"
-    
-    if replace_invalid_chars is True:
-        location_path = SubstitutePathCharacters(location_path)
 
-    # Windows drive indicator re-stitch
-    if drive_indicator is not "":
-        location_path = drive_indicator + "\\" + location_path
-    
-    # Build the file path
-    if not os.path.exists(location_path):
-        os.makedirs(location_path)
-    
-    #print("Final Location Path - ", location_path)
-    
-    return location_path
+def GetExportNameTag(targets, collection, export_task):
+    if collection is not None:
+        return collection.name
+    return targets[0].name
 
+def GetBlendFileNameTag(targets, collection, export_task):
+    blend_name = bpy.path.basename(bpy.context.blend_data.filepath)
+    return blend_name.replace(".blend", "")
 
+def GetExportPresetNameTag(targets, collection, export_task):
+    return export_task['export_preset'].name
 
-def FillTags(location_path, targets, collection, replace_invalid_chars, export_task):
-    """
-    Searches for and substitutes the tags in a path name.
-    """
-
-    slash = "/"
-    if platform.system() == 'Windows':
-        slash = "\\"
 
-    if location_path.find('^export_name^'):
+# Every tag that can be used in a location path.  Each has a function that returns the tag's value,
+# and whether invalid characters should be substituted in that value.
+# New tags only need an entry here and in the "Add Path Tag" menu.
+PATH_TAGS = {
+    'export_name': (GetExportNameTag, True),
+    'object_name': (GetExportNameTag, True),
+    'blend_file_name': (GetBlendFileNameTag, True),
+    'export_preset_name': (GetExportPresetNameTag, True),
+    'export_date_ymd': (lambda targets, collection, export_task: export_task['export_start_time'].strftime('%Y-%m-%d'), False),
+    'export_date_dmy': (lambda targets, collection, export_task: export_task['export_start_time'].strftime('%d-%m-%Y'), False),
+    'export_date_mdy': (lambda targets, collection, export_task: export_task['export_start_time'].strftime('%m-%d-%Y'), False),
+    'export_time_hm': (lambda targets, collection, export_task: export_task['export_start_time'].strftime('%H.%M'), False),
+    'export_time_hms': (lambda targets, collection, export_task: export_task['export_start_time'].strftime('%H.%M.%S'), False),
+}
 
-        if collection is not None:
-            export_name = collection.name
-        else:
-            export_name = targets[0].name
 
-        if replace_invalid_chars is True:
-            export_name = SubstituteNameCharacters(export_name)
+def CompilePathTemplate(location_path):
+    """
+    Compiles a location path into a template that can be quickly filled in for each export.
+    Relative paths are made absolute, Windows drive indicators are split off and the path is split
+    into a list of text and tag parts.
 
-        location_path = location_path.replace('^object_name^', export_name)
-    
+    Returns the template as a dictionary.
+    """
 
-    # if location_path.find('^object_type^'):
+    template_key = (location_path, bpy.data.filepath)
+    if template_key in path_templates:
+        return path_templates[template_key]
 
-    #     type_name = targets[0].type
-    #     type_name = type_name.lower()
-    #     type_name = type_name.capitalize()
+    if location_path == "":
+        raise Exception('WARNING: This location preset has no path defined, please define it!')
 
-    #     if replace_invalid_chars is True:
-    #         type_name = SubstituteNameCharacters(type_name)
+    elif location_path.find('//') != -1:
+        location_path = bpy.path.abspath(location_path)
 
-    #     location_path = location_path.replace('^object_type^', type_name)
+    # If Windows, split the drive indicator
+    drive_indicator = ""
+    if SYSTEM == 'Windows':
+        if location_path.find("\\") != -1:
+            drive_split = location_path.split("\\", 1)
+            drive_indicator = drive_split[0]
+            location_path = drive_split[1]
     
-
-    # if location_path.find('^collection^'):
-        
-    #     collection_name = ''
-    #     if collection != None:
-    #         collection_name = collection.name
-    #     else:
-    #         if targets[0].users_collection[0]:
-    #             collection_name = targets[0].users_collection[0].name
-    #         else:
-    #             collection_name = "Unknown Collection"
+    # Split the path into text and tags.  Unknown tags are left as they are.
+    parts = []
+    last_end = 0
+    for match in TAG_PATTERN.finditer(location_path):
+        if match.group(1) not in PATH_TAGS:
+            continue
+
+        if match.start() > last_end:
+            parts.append(('TEXT', location_path[last_end:match.start()]))
         
-    #     if replace_invalid_chars is True:
-    #         collection_name = SubstituteNameCharacters(collection_name)
-                
-    #     location_path = location_path.replace('^collection^', collection_name)
-
+        parts.append(('TAG', match.group(1)))
+        last_end = match.end()
     
-    if location_path.find('^blend_file_name^'):
+    if last_end < len(location_path):
+        parts.append(('TEXT', location_path[last_end:]))
 
-        blend_name = bpy.path.basename(bpy.context.blend_data.filepath)
-        blend_name = blend_name.replace(".blend", "")
+    template = {}
+    template['drive_indicator'] = drive_indicator
+    template['parts'] = parts
+    template['tags'] = set(part[1] for part in parts if part[0] == 'TAG')
+    template['resolved'] = {}
 
-        if replace_invalid_chars is True:
-            blend_name = SubstituteNameCharacters(blend_name)
+    path_templates[template_key] = template
+    return template
 
-        location_path = location_path.replace('^blend_file_name^', blend_name)
-    
-    if location_path.find('^export_preset_name^'):
 
-        preset_name = export_task['export_preset'].name
+def ResolvePathTemplate(template, targets, collection, replace_invalid_chars, export_task):
+    """
+    Fills in a compiled path template for a single export.  Paths are cached by the tag values used,
+    so exports that share the same values share the same result.
+    """
 
-        if replace_invalid_chars is True:
-            blend_name = SubstituteNameCharacters(preset_name)
+    tag_values = {}
+    for tag in template['tags']:
+        tag_function, substitute = PATH_TAGS[tag]
+        value = tag_function(targets, collection, export_task)
 
-        location_path = location_path.replace('^export_preset_name^', preset_name)
+        if substitute is True and replace_invalid_chars is True:
+            value = SubstituteNameCharacters(value)
+        
+        tag_values[tag] = value
+
+    resolved_key = (tuple(sorted(tag_values.items())), replace_invalid_chars)
+    if resolved_key in template['resolved']:
+        return template['resolved'][resolved_key]
     
-    # DATE AND TIME
+    location_path = "".join(part[1] if part[0] == 'TEXT' else tag_values[part[1]] for part in template['parts'])
 
-    if location_path.find('export_date_ymd'):
+    # directory failsafe
+    if location_path.endswith(PATH_SLASH) == False:
+        location_path += PATH_SLASH
+    
+    if replace_invalid_chars is True:
+        location_path = SubstitutePathCharacters(location_path)
 
-        time = export_task['export_start_time'].strftime('%Y-%m-%d')
-        location_path = location_path.replace('^export_date_ymd^', time)
+    # Windows drive indicator re-stitch
+    if template['drive_indicator'] != "":
+        location_path = template['drive_indicator'] + "\\" + location_path
+    
+    template['resolved'][resolved_key] = location_path
+    return location_path
 
-    if location_path.find('export_date_dmy'):
 
-        time = export_task['export_start_time'].strftime('%d-%m-%Y')
-        location_path = location_path.replace('^export_date_dmy^', time)
+def CreateDirectories(directories):
+    """
+    Creates every directory in the given list that doesn't exist yet, checking each unique directory only once.
+    """
 
-    if location_path.find('export_date_mdy'):
+    for directory in set(directories):
+        if not os.path.exists(directory):
+            os.makedirs(directory)
 
-        time = export_task['export_start_time'].strftime('%m-%d-%Y')
-        location_path = location_path.replace('^export_date_mdy^', time)
-    
-    if location_path.find('export_time_hm'):
 
-        time = export_task['export_start_time'].strftime('%H.%M')
-        location_path = location_path.replace('^export_time_hm^', time)
+def CreateFilePath(location_preset, targets, collection, replace_invalid_chars, export_task, create_directory = True):
+    """
+    Extracts and calculates a final path with which to export the target to.
+    If create_directory is False, the directory isn't created and CreateDirectories needs to be used instead.
+    """
 
-    if location_path.find('export_time_hms'):
+    template = CompilePathTemplate(location_preset.path)
+    location_path = ResolvePathTemplate(template, targets, collection, replace_invalid_chars, export_task)
 
-        time = export_task['export_start_time'].strftime('%H.%M.%S')
-        location_path = location_path.replace('^export_time_hms^', time)
+    # Build the file path
+    if create_directory is True:
+        CreateDirectories([location_path])
     
-    return location_path    
+    return location_path
 
     
 def SubstituteNameCharacters(path):
@@ -164,20 +188,8 @@ def SubstituteNameCharacters(path):
 
   #print("Checking Directory...", path)
   result = path
-  if platform.system() == 'Windows':
-      invalid_characters = ["\\", "/", "*", "?", "\"", "<", ">", "|", ":"]
-      for char in invalid_characters:
-          result = result.replace(char, "_")
-
-  elif platform.system() == 'Darwin':
-      invalid_characters = [":", "/"]
-      for char in invalid_characters:
-          result = result.replace(char, "_")
-
-  elif platform.system() == 'linux' or platform.system() == 'linux2':
-      invalid_characters = [":", "/"]
-      for char in invalid_characters:
-          result = result.replace(char, "_")
+  for char in NAME_INVALID_CHARACTERS.get(SYSTEM, []):
+      result = result.replace(char, "_")
 
   return result
 
@@ -186,20 +198,8 @@ def SubstitutePathCharacters(path):
 
   #print("Checking Directory...", path)
   result = path
-  if platform.system() == 'Windows':
-      invalid_characters = ["*", "?", "<", ">", "|", ":"]
-      for char in invalid_characters:
-          result = result.replace(char, "_")
-
-  elif platform.system() == 'Darwin':
-      invalid_characters = [":"]
-      for char in invalid_characters:
-          result = result.replace(char, "_")
-
-  elif platform.system() == 'linux' or platform.system() == 'linux2':
-      invalid_characters = [":"]
-      for char in invalid_characters:
-          result = result.replace(char, "_")
+  for char in PATH_INVALID_CHARACTERS.get(SYSTEM, []):
+      result = result.replace(char, "_")
 
   return result
 
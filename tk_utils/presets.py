@@ -0,0 +1,302 @@
+# ///////////////////////////////////////////////////////////////////
+# Gives Export and Location Presets stable IDs and tracks which objects and collections use them.
+# ///////////////////////////////////////////////////////////////////
+
+import bpy, random
+
+
+# The object and collection properties that refer to presets, and the Capsule file data lists they refer to.
+PRESET_PROPERTIES = {
+    'export_preset': 'export_presets',
+    'location_preset': 'location_presets',
+}
+
+# The proxy properties that mirror each object and collection preset property.
+PROXY_PRESET_PROPERTIES = {
+    'export_preset': ['obj_export_preset', 'col_export_preset'],
+    'location_preset': ['obj_location_preset', 'col_location_preset'],
+}
+
+# The Capsule file data version where presets started being referred to by ID instead of list position.
+PRESET_ID_VERSION = 1
+
+# Enum values are stored as 32-bit integers, and 0 is used for "None".
+MAX_PRESET_ID = 2147483647
+
+# Maps the preset IDs in each preset list to their list positions, keyed by the preset list name.
+preset_id_indexes = {}
+
+# The objects and collections that have been seen using each preset, keyed by the preset property name
+# and then the preset ID.  Entries may be out of date, so they're checked whenever they're used.
+preset_user_indexes = {}
+
+# The enum items used when there are no presets to choose from.
+NO_PRESET_ITEMS = [
+    ("0", "None",  "", 0),
+]
+
+# Enum items built for each preset list, keyed by the list name.  Blender calls enum item functions on every
+# redraw and can crash if the strings they return are garbage collected, so items are kept here and reused.
+preset_enum_items = {}
+
+# Increased whenever presets are added, removed or renamed, so cached enum items know to rebuild.
+preset_enum_version = 0
+
+
+def GetPresetProperties(user):
+    """
+    Returns the Capsule properties of an object or collection.
+    """
+
+    if isinstance(user, bpy.types.Object):
+        return user.CAPObj
+    return user.CAPCol
+
+
+def GetPresetEnumValue(preset):
+    """
+    Returns the enum identifier used to refer to a preset.
+    """
+
+    return str(preset.instance_id)
+
+
+def BuildPresetEnumItems(presets):
+    """
+    Builds enum items for a list of presets, using the preset IDs as values so the enums keep pointing
+    at the same preset when presets are added, removed or reordered.
+    """
+
+    items = list(NO_PRESET_ITEMS)
+
+    for preset in presets:
+        if preset.instance_id > 0:
+            items.append((str(preset.instance_id), preset.name, preset.name, preset.instance_id))
+
+    return items
+
+
+def GetCachedEnumItems(cache_key, presets, BuildItems = BuildPresetEnumItems):
+    """
+    Returns the enum items for a list of presets, only building them again if presets have been added,
+    removed or renamed since they were last built.
+    """
+
+    cached = preset_enum_items.get(cache_key)
+
+    # The length is also checked in case presets were added or removed without InvalidatePresetEnumItems.
+    if cached is None or cached['version'] != preset_enum_version or cached['length'] != len(presets):
+        cached = {}
+        cached['version'] = preset_enum_version
+        cached['length'] = len(presets)
+        cached['items'] = BuildItems(presets)
+        preset_enum_items[cache_key] = cached
+
+    return cached['items']
+
+
+def GetPresetEnumItems(cap_file, list_name):
+    """
+    Returns the cached enum items for an Export or Location Preset list in the Capsule file data.
+    """
+
+    return GetCachedEnumItems(list_name, getattr(cap_file, list_name))
+
+
+def InvalidatePresetEnumItems():
+    """
+    Makes every cached preset enum item list rebuild the next time it's used.
+    This needs to be called whenever presets are added, removed or renamed.
+    """
+
+    global preset_enum_version
+    preset_enum_version += 1
+
+
+def AssignPresetID(presets, preset):
+    """
+    Gives a preset a new ID that isn't used by any other preset in the same list.
+    """
+
+    used_ids = set(item.instance_id for item in presets if item != preset)
+
+    new_id = random.randint(1, MAX_PRESET_ID)
+    while new_id in used_ids:
+        new_id = random.randint(1, MAX_PRESET_ID)
+
+    preset.instance_id = new_id
+    InvalidatePresetEnumItems()
+    return new_id
+
+
+def GetPresetIDIndex(cap_file, list_name):
+    """
+    Returns a dictionary of preset IDs to list positions for a preset list, building it if needed.
+    """
+
+    presets = getattr(cap_file, list_name)
+    index = preset_id_indexes.get(list_name)
+
+    if index is None or index['length'] != len(presets):
+        index = {}
+        index['length'] = len(presets)
+        index['ids'] = {preset.instance_id: i for i, preset in enumerate(presets) if preset.instance_id > 0}
+        preset_id_indexes[list_name] = index
+
+    return index['ids']
+
+
+def FindPreset(cap_file, preset_property, preset_value):
+    """
+    Finds the preset an object or collection preset property refers to.
+    Returns None if it's set to None or refers to a preset that doesn't exist.
+    """
+
+    # Invalid enum values are read as empty strings.
+    if preset_value == '' or preset_value == '0':
+        return None
+
+    preset_id = int(preset_value)
+    list_name = PRESET_PROPERTIES[preset_property]
+    presets = getattr(cap_file, list_name)
+
+    i = GetPresetIDIndex(cap_file, list_name).get(preset_id)
+    if i is None:
+        return None
+
+    # If the preset has moved, the index is out of date and needs rebuilding.
+    if i >= len(presets) or presets[i].instance_id != preset_id:
+        preset_id_indexes.pop(list_name, None)
+        i = GetPresetIDIndex(cap_file, list_name).get(preset_id)
+
+        if i is None:
+            return None
+
+    return presets[i]
+
+
+def GetPresetUserIndex(preset_property):
+    """
+    Returns the users of every preset for a preset property, building it from every object and collection
+    in the file if needed.
+    """
+
+    index = preset_user_indexes.get(preset_property)
+    if index is not None:
+        return index
+
+    index = {}
+    for users in (bpy.data.objects, bpy.data.collections):
+        for user in users:
+            # Raw values are read to avoid building the enum items for every object and collection.
+            preset_id = GetPresetProperties(user).get(preset_property, 0)
+            if preset_id > 0:
+                index.setdefault(preset_id, set()).add(user)
+
+    preset_user_indexes[preset_property] = index
+    return index
+
+
+def GetPresetUsers(preset_property, preset_id):
+    """
+    Returns every object and collection whose preset property refers to the given preset ID.
+    """
+
+    users = []
+    for user in GetPresetUserIndex(preset_property).get(preset_id, ()):
+        try:
+            if GetPresetProperties(user).get(preset_property, 0) == preset_id:
+                users.append(user)
+
+        # The object or collection was deleted.
+        except ReferenceError:
+            continue
+
+    return users
+
+
+def RecordPresetUser(user, preset_property, preset_value):
+    """
+    Records that an object or collection now uses a preset, if the users of that preset are being tracked.
+    """
+
+    index = preset_user_indexes.get(preset_property)
+    if index is None or preset_value == '' or preset_value == '0':
+        return
+
+    index.setdefault(int(preset_value), set()).add(user)
+
+
+def RemovePreset(cap_file, preset_property, preset_index):
+    """
+    Removes a preset from its list, setting the preset property of everything that used it to None.
+    """
+
+    list_name = PRESET_PROPERTIES[preset_property]
+    presets = getattr(cap_file, list_name)
+    preset_id = presets[preset_index].instance_id
+
+    if preset_id > 0:
+        for user in GetPresetUsers(preset_property, preset_id):
+            setattr(GetPresetProperties(user), preset_property, '0')
+
+        GetPresetUserIndex(preset_property).pop(preset_id, None)
+
+    presets.remove(preset_index)
+    preset_id_indexes.pop(list_name, None)
+    InvalidatePresetEnumItems()
+
+
+def ClearPresetIndexes():
+    """
+    Clears the preset ID and user indexes and the cached enum items.  This needs to be called whenever the
+    file changes underneath them, such as after an undo or when a new file is loaded.
+    """
+
+    preset_id_indexes.clear()
+    preset_user_indexes.clear()
+    InvalidatePresetEnumItems()
+
+
+def MigratePresetIDs(cap_file):
+    """
+    Converts preset properties that refer to presets by list position (from before presets had IDs)
+    into preset IDs.  Presets that don't have an ID yet, or share one with an earlier preset in the same list,
+    are given a new one first.  Does nothing if the file has already been converted.
+
+    Returns True if anything was converted.
+    """
+
+    if cap_file.preset_id_version >= PRESET_ID_VERSION:
+        return False
+
+    # Export Presets already had random IDs before they were used to refer to presets, but objects and
+    # collections still refer to them by position, so every file from before this version is converted.
+    for preset_property, list_name in PRESET_PROPERTIES.items():
+        presets = getattr(cap_file, list_name)
+
+        used_ids = set()
+        for preset in presets:
+            if preset.instance_id <= 0 or preset.instance_id in used_ids:
+                AssignPresetID(presets, preset)
+            used_ids.add(preset.instance_id)
+
+        position_ids = [preset.instance_id for preset in presets]
+
+        def ConvertValue(properties, property_name):
+            position = properties.get(property_name, 0)
+            if position > 0:
+                properties[property_name] = position_ids[position - 1] if position <= len(position_ids) else 0
+
+        for users in (bpy.data.objects, bpy.data.collections):
+            for user in users:
+                ConvertValue(GetPresetProperties(user), preset_property)
+
+        for scene in bpy.data.scenes:
+            for proxy_property in PROXY_PRESET_PROPERTIES[preset_property]:
+                ConvertValue(scene.CAPProxy, proxy_property)
+
+    cap_file.preset_id_version = PRESET_ID_VERSION
+    ClearPresetIndexes()
+
+    return True
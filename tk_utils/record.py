@@ -3,6 +3,7 @@
 # ///////////////////////////////////////////////////////////////////
 
 import bpy
+import numpy as np
 
 import os.path
 from mathutils import Vector
@@ -10,14 +11,62 @@ from . import search as search_utils
 from . import select as select_utils
 from . import locations as loc_utils
 from . import paths as path_utils
+from . import presets as preset_utils
 
 from . import object_ops, object_transform
+from .dependencies import GetDependencies
+from .trace import Traced
 
 
-def BuildSceneContext(context):
+# The name of the view layer Capsule exports from.
+CAPSULE_VIEW_LAYER_NAME = ">> Capsule <<"
+
+
+@Traced
+def GetSceneContextScope(context, export_tasks):
+    """
+    Finds every object the given export tasks can affect - their targets and the children of those targets,
+    origin objects and anything they depend on through parents, constraints and modifiers.
+    Currently selected objects are also included so their selections can be restored.
+
+    Returns None if the whole scene needs to be recorded, which happens when a pack script could touch
+    any object or when an origin move has to translate the entire scene.
+    """
+
+    preferences = context.preferences
+    addon_prefs = preferences.addons['Capsule'].preferences
+
+    scope = set(context.selected_objects)
+
+    for export_task in export_tasks:
+        if addon_prefs.use_pack_scripts is True and export_task['pack_script'] is not None:
+            return None
+
+        task_objects = list(export_task['targets'])
+        for target in export_task['targets']:
+            task_objects += target.children_recursive
+
+        if export_task['origin_object'] is not None:
+            task_objects.append(export_task['origin_object'])
+
+            # Keep the plan so the export doesn't have to search the same dependencies again.
+            export_task['relocation_plan'] = object_transform.BuildRelocationPlan(context, export_task['targets'])
+            if export_task['relocation_plan']['use_operators'] is True:
+                return None
+
+        scope.update(GetDependencies(task_objects))
+
+    return list(scope)
+
+
+@Traced
+def BuildSceneContext(context, scope = None):
     """
     Records all selection, edit mode, object constraint and view layer properties and saves it for later.
     ALSO builds a new View Layer with which to perform edits on.
+
+    If a scope of objects is given (see GetSceneContextScope), only those objects are recorded and prepared,
+    otherwise every object in the scene is.
     """
 
     scene_records = {}
@@ -28,7 +77,9 @@ def BuildSceneContext(context):
     # //////////////////////////////////////
     # RECORD AND CHANGE REGIONS
     # If the current context isn't the 3D View, we need to change that before anything else.
-    scene_records['active_area_type'] = bpy.context.area.type
+    scene_records['active_area_type'] = None
+    if bpy.context.area is not None:
+        scene_records['active_area_type'] = bpy.context.area.type
     
 
     # //////////////////////////////////////
@@ -45,6 +96,7 @@ def BuildSceneContext(context):
             selected_record.append(sel)
 
     scene_records['active_object'] = context.active_object
+    scene_records['selected_objects'] = selected_record
     scene_records['active_layer_collection'] = context.view_layer.active_layer_collection
     print(scene_records['active_layer_collection'])
 
@@ -56,100 +108,21 @@ def BuildSceneContext(context):
     scene_records['view_mode'] = bpy.context.mode
     if scene_records['view_mode'].find('EDIT') != -1:
         scene_records['view_mode'] = 'EDIT'
-    bpy.ops.object.mode_set(mode= 'OBJECT')
+    
+    # mode_set fails its poll without an active object, which is common in background sessions.
+    if scene_records['view_mode'] != 'OBJECT':
+        bpy.ops.object.mode_set(mode= 'OBJECT')
 
 
     # //////////////////////////////////////
     # PRESERVE OBJECT INFORMATION
-    
-    object_records = []
-
-    for item in context.scene.objects:
-        record = {}
-        record['item'] = item
-        record['item_name'] = item.name
-
-        # Record object visibility
-        # FIXME : hide_viewport is a global property, and isn't the same as Outliner/3D View hides.  Need to get and set that data when fixed.
-        # https://devtalk.blender.org/t/view-layer-api-access-wishlist-collection-expand-set/5517
-
-        record['hide_viewport'] = item.hide_viewport
-        record['hide_select'] = item.hide_select
-        record['is_selected'] = item.select_get()
-
-        item.hide_select = False
 
+    scene_objects = context.scene.objects
+    if scope is not None:
+        scene_objects = scope
 
-        # Record object loc/rot/scale locks if applicable
-        transform_locks = []
-        for i, x in enumerate(item.lock_location):
-            transform_locks.append(item.lock_location[i])
-
-        for i, x in enumerate(item.lock_rotation):
-            transform_locks.append(item.lock_rotation[i])
-
-        for i, x in enumerate(item.lock_scale):
-            transform_locks.append(item.lock_scale[i])
-        
-        if True in transform_locks:
-            record['transform_locks'] = transform_locks
-        
-        item.lock_location = (False, False, False)
-        item.lock_rotation = (False, False, False)
-        item.lock_scale = (False, False, False)
-
-
-        # If any armatures are in any non-object modes, we need to change this
-        if item.type == 'ARMATURE':
-            mode = object_ops.SwitchObjectMode('OBJECT', item)
-            
-            if mode != None:
-                record['armature_mode'] = mode
-
-
-        # Add constraint records if the object has any.
-        if len(item.constraints) > 0:
-
-            constraint_list = []
-
-            # Record the current object location for later
-            true_location = loc_utils.FindWorldSpaceObjectLocation(context, item)
-
-            # Placeholder for later, once all constraints are isolated and muted.
-            constraint_location = Vector((0.0, 0.0, 0.0))
-            record['true_location'] = true_location
-            record['constraint_location'] = constraint_location
-
-            # Iterate through and save constraint settings
-            i = 0
-            for constraint in item.constraints:
-                constraint_list.append( {'index': i, 'enabled': constraint.mute, 'influence': constraint.influence} )
-                i += 1
-            
-            record['constraint_list'] = constraint_list
-
-            # Mute and isolate them
-            for entry in constraint_list:
-                constraint = item.constraints[entry['index']]
-
-                # Mute the constraint
-                constraint.mute = True
-                constraint.influence = 0.0
-
-        # Add the new record
-        object_records.append(record)
-    
-    
-    # //////////////////////////////////////
-    # PRESERVE CONSTRAINTS
-     # TODO: I dont know whether this is used or how this is even used, I need to investigate
-
-    for record in object_records:
-        if 'constraint_list' in record:
-            item = record['item']
-            record['constraint_location'] = loc_utils.FindWorldSpaceObjectLocation(context, item)
-            
-            object_transform.MoveObjectFailsafe(item, context, record['true_location'])
+    object_records = RecordObjectStates(context, scene_objects)
+    ClearObjectStates(context, object_records)
     
 
     # //////////////////////////////////////
@@ -169,23 +142,27 @@ def BuildSceneContext(context):
         col.hide_select = False
     
     # //////////////////////////////////////
-    # CREATE NEW VIEW LAYER
+    # SWITCH TO THE CAPSULE VIEW LAYER
 
     scene_records['previous_view_layer'] = bpy.context.view_layer
+    scene_records['capsule_view_layer'] = None
+    scene_records['hidden_objects'] = []
+
+    # Background sessions have no window to switch view layers with, so the current one is used instead.
+    # Objects hidden in it are recorded so they can be hidden again afterwards.
+    if context.window is None:
+        view_layer_objects = context.view_layer.objects
+        if scope is not None:
+            view_layer_objects = [item for item in scope if item.name in context.view_layer.objects]
+
+        for item in view_layer_objects:
+            if item.hide_get() is True:
+                scene_records['hidden_objects'].append(item)
+                item.hide_set(False)
+            item.select_set(False)
 
-    bpy.ops.scene.view_layer_add()
-    bpy.context.view_layer.name = ">> Capsule <<"
-    scene_records['capsule_view_layer'] = bpy.context.view_layer
-    print(bpy.context.view_layer)
-
-
-    # Now we can unhide and deselect everything
-    override = object_ops.Find3DViewContext()
-    with context.temp_override(window = override['window'], area = override['area'], 
-            region = override['region']):
-        
-        bpy.ops.object.hide_view_clear()
-        bpy.ops.object.select_all(action= 'DESELECT')
+    else:
+        scene_records['capsule_view_layer'] = SwitchToCapsuleViewLayer(context, scope)
 
     records = {}
     records['scene'] = scene_records
@@ -194,6 +171,79 @@ def BuildSceneContext(context):
     return records
 
 
+def SwitchToCapsuleViewLayer(context, scope = None):
+    """
+    Makes the Capsule view layer the active view layer of the window, with everything (or only the objects
+    in the given scope) shown and deselected.  Returns the Capsule view layer.
+    """
+
+    capsule_view_layer = GetCapsuleViewLayer(context.scene)
+    SyncCapsuleViewLayer(capsule_view_layer, scope)
+
+    context.window.view_layer = capsule_view_layer
+    return capsule_view_layer
+
+
+def RestorePreviousViewLayer(context, scene_records):
+    """
+    Switches the window back to the view layer that was active before SwitchToCapsuleViewLayer.
+    The Capsule view layer is kept for the next export.
+    """
+
+    context.window.view_layer = scene_records['previous_view_layer']
+
+
+def GetCapsuleViewLayer(scene):
+    """
+    Returns the view layer Capsule exports from, creating it if the scene doesn't have one yet.
+    It's kept between exports, so Blender doesn't have to build a new depsgraph for every export.
+    """
+
+    view_layer = scene.view_layers.get(CAPSULE_VIEW_LAYER_NAME)
+
+    if view_layer is None:
+        view_layer = scene.view_layers.new(CAPSULE_VIEW_LAYER_NAME)
+    
+    # It should never be rendered.
+    if view_layer.use is True:
+        view_layer.use = False
+    
+    return view_layer
+
+
+@Traced
+def SyncCapsuleViewLayer(view_layer, scope = None):
+    """
+    Includes and shows every collection in the Capsule view layer, then shows and deselects every object
+    (or only the objects in the given scope).  Only the settings that are different are changed, so an
+    unchanged view layer costs very little to sync.
+    """
+
+    layer_collections = [view_layer.layer_collection]
+    while len(layer_collections) > 0:
+        layer_collection = layer_collections.pop()
+
+        if layer_collection.exclude is True:
+            layer_collection.exclude = False
+        if layer_collection.hide_viewport is True:
+            layer_collection.hide_viewport = False
+        
+        layer_collections += layer_collection.children
+
+    # Anything left selected from the last export needs deselecting.
+    for item in list(view_layer.objects.selected):
+        item.select_set(False, view_layer = view_layer)
+
+    view_layer_objects = view_layer.objects
+    if scope is not None:
+        view_layer_objects = [item for item in scope if item.name in view_layer.objects]
+
+    for item in view_layer_objects:
+        if item.hide_get(view_layer = view_layer) is True:
+            item.hide_set(False, view_layer = view_layer)
+
+
+@Traced
 def RestoreSceneContext(context, record):
     """
     Restores all selection, edit mode, object constraint and view layer properties from a previously saved scene context.
@@ -218,48 +268,16 @@ def RestoreSceneContext(context, record):
     # //////////////////////////////////////
     # RESTORE OBJECT RECORDS
 
-    for record in object_records:
-        item = record['item']
-        
-        # Restore constraint object positions
-        if 'constraint_list' in record:
-            object_transform.MoveObjectFailsafe(item, context, record['constraint_location'])
-
-            # Restore Constraint Defaults
-            for constraint_record in record['constraint_list']:
-                index = constraint_record['index']
-                item.constraints[index].mute = constraint_record['enabled']
-                item.constraints[index].influence = constraint_record['influence']
-        
-        # Restore visibility defaults
-        item.hide_viewport = record['hide_viewport']
-        item.hide_select = record['hide_select']
-        item.select_set(record['is_selected'])
-
-        # Restore transform locks
-        if 'transform_locks' in record:
-            lock_list = record['transform_locks']
-
-            item.lock_location[0] = lock_list[0]
-            item.lock_location[1] = lock_list[1]
-            item.lock_location[2] = lock_list[2]
-            item.lock_rotation[0] = lock_list[3]
-            item.lock_rotation[1] = lock_list[4]
-            item.lock_rotation[2] = lock_list[5]
-            item.lock_scale[0] = lock_list[6]
-            item.lock_scale[1] = lock_list[7]
-            item.lock_scale[2] = lock_list[8]
-        
-        # Restore armature mode
-        if 'armature_mode' in record:
-            mode = object_ops.SwitchObjectMode(record['armature_mode'], item)
+    RestoreObjectStates(context, object_records)
+
+    for item in scene_records['hidden_objects']:
+        item.hide_set(True)
     
     # //////////////////////////////////////
-    # DELETE AND RESTORE VIEW LAYER
+    # RESTORE VIEW LAYER
 
-    context.window.view_layer = scene_records['capsule_view_layer']
-    bpy.ops.scene.view_layer_remove()
-    context.window.view_layer = scene_records['previous_view_layer']
+    if scene_records['capsule_view_layer'] is not None:
+        RestorePreviousViewLayer(context, scene_records)
 
     # //////////////////////////////////////
     # RESTORE SCENE SELECTIONS
@@ -281,7 +299,8 @@ def RestoreSceneContext(context, record):
     # RESTORE VIEW MODES
 
     # Restore the 3D view mode
-    bpy.ops.object.mode_set(mode = scene_records['view_mode'])
+    if scene_records['view_mode'] != 'OBJECT':
+        bpy.ops.object.mode_set(mode = scene_records['view_mode'])
 
     # Restore the 3D cursor
     bpy.data.scenes[bpy.context.scene.name].cursor.location = scene_records['cursor_location']
@@ -292,7 +311,211 @@ def RestoreSceneContext(context, record):
     
 
 
+def ReadObjectProperty(objects, attribute, width, dtype):
+    """
+    Reads a property from every object into a flat NumPy array, using foreach_get if the objects are
+    a Blender collection and reading them one at a time if they aren't.
+    """
+
+    values = np.empty(len(objects) * width, dtype = dtype)
+
+    if hasattr(objects, 'foreach_get'):
+        try:
+            objects.foreach_get(attribute, values)
+            return values
+        except (AttributeError, RuntimeError, TypeError):
+            pass
+
+    for i, item in enumerate(objects):
+        values[i * width:(i + 1) * width] = getattr(item, attribute)
+    
+    return values
+
+
+def WriteObjectProperty(objects, attribute, width, values):
+    """
+    Writes a flat NumPy array previously made with ReadObjectProperty back to every object, using
+    foreach_set if the objects are a Blender collection and writing them one at a time if they aren't.
+    """
+
+    if hasattr(objects, 'foreach_set'):
+        try:
+            objects.foreach_set(attribute, values)
+            return
+        except (AttributeError, RuntimeError, TypeError):
+            pass
+    
+    for i, item in enumerate(objects):
+        if width == 1:
+            setattr(item, attribute, values[i].item())
+        else:
+            setattr(item, attribute, values[i * width:(i + 1) * width].tolist())
+
+
+def GetRecordedObjects(records):
+    """
+    Returns the collection the object records were read from if it still holds the same objects
+    in the same order, so values can be written back in bulk.  Otherwise returns the recorded object list.
+    """
+
+    collection = records['collection']
+    if collection is not None and len(collection) == len(records['objects']):
+        if all(a == b for a, b in zip(collection, records['objects'])):
+            return collection
+    
+    return records['objects']
+
+
+@Traced
+def RecordObjectStates(context, objects):
+    """
+    Records the visibility, selection, transform lock and constraint states of the given objects as
+    a set of NumPy arrays, with one row per object.  Constraint values for every constrained object are
+    stored back to back, with 'constraint_offsets' marking where each object's constraints begin.
+
+    Returns the records, which ClearObjectStates and RestoreObjectStates use.
+    """
+
+    records = {}
+    records['collection'] = None
+    if hasattr(objects, 'foreach_get'):
+        records['collection'] = objects
+    
+    records['objects'] = list(objects)
+    object_count = len(records['objects'])
+
+    # Record object visibility
+    # FIXME : hide_viewport is a global property, and isn't the same as Outliner/3D View hides.  Need to get and set that data when fixed.
+    # https://devtalk.blender.org/t/view-layer-api-access-wishlist-collection-expand-set/5517
+
+    records['hide_viewport'] = ReadObjectProperty(objects, 'hide_viewport', 1, np.bool_)
+    records['hide_select'] = ReadObjectProperty(objects, 'hide_select', 1, np.bool_)
+
+    # Selections are only available through a function call.
+    records['is_selected'] = np.fromiter((item.select_get() for item in records['objects']), 
+        dtype = np.bool_, count = object_count)
+
+    # Record object loc/rot/scale locks
+    records['lock_location'] = ReadObjectProperty(objects, 'lock_location', 3, np.bool_)
+    records['lock_rotation'] = ReadObjectProperty(objects, 'lock_rotation', 3, np.bool_)
+    records['lock_scale'] = ReadObjectProperty(objects, 'lock_scale', 3, np.bool_)
+
+    # Armature modes are recorded once they've been switched.
+    records['armature_modes'] = {}
+
+    # Record constraint settings for any objects that have them.
+    constrained_indices = [i for i, item in enumerate(records['objects']) if len(item.constraints) > 0]
+    constrained_objects = [records['objects'][i] for i in constrained_indices]
+
+    constraint_offsets = np.zeros(len(constrained_indices) + 1, dtype = np.int64)
+    for i, item in enumerate(constrained_objects):
+        constraint_offsets[i + 1] = constraint_offsets[i] + len(item.constraints)
+    
+    constraint_mute = np.empty(constraint_offsets[-1], dtype = np.bool_)
+    constraint_influence = np.empty(constraint_offsets[-1], dtype = np.float32)
+
+    for i, item in enumerate(constrained_objects):
+        start = constraint_offsets[i]
+        end = constraint_offsets[i + 1]
+        item.constraints.foreach_get('mute', constraint_mute[start:end])
+        item.constraints.foreach_get('influence', constraint_influence[start:end])
+    
+    records['constrained_indices'] = np.array(constrained_indices, dtype = np.int64)
+    records['constraint_offsets'] = constraint_offsets
+    records['constraint_mute'] = constraint_mute
+    records['constraint_influence'] = constraint_influence
+
+    # Record the current location of every constrained object in one pass, before any are muted.
+    records['true_locations'] = loc_utils.FindWorldSpaceObjectLocations(context, constrained_objects)
+    records['constraint_locations'] = records['true_locations'].copy()
+
+    return records
+
+
+@Traced
+def ClearObjectStates(context, records):
+    """
+    Makes every recorded object selectable and unlocked, switches armatures to Object Mode and
+    mutes constraints, moving constrained objects back to where they appeared before muting.
+    """
+
+    objects = records['objects']
+    object_count = len(objects)
+    collection = GetRecordedObjects(records)
+
+    WriteObjectProperty(collection, 'hide_select', 1, np.zeros(object_count, dtype = np.bool_))
+
+    unlocked = np.zeros(object_count * 3, dtype = np.bool_)
+    WriteObjectProperty(collection, 'lock_location', 3, unlocked)
+    WriteObjectProperty(collection, 'lock_rotation', 3, unlocked)
+    WriteObjectProperty(collection, 'lock_scale', 3, unlocked)
+
+    # If any armatures are in any non-object modes, we need to change this
+    for i, item in enumerate(objects):
+        if item.type == 'ARMATURE':
+            mode = object_ops.SwitchObjectMode('OBJECT', item)
+            
+            if mode != None:
+                records['armature_modes'][i] = mode
+    
+
+    # Mute and isolate constraints
+    constrained_objects = [objects[i] for i in records['constrained_indices']]
+
+    for item in constrained_objects:
+        constraint_count = len(item.constraints)
+        item.constraints.foreach_set('mute', np.ones(constraint_count, dtype = np.bool_))
+        item.constraints.foreach_set('influence', np.zeros(constraint_count, dtype = np.float32))
+    
+    # Muted constraints only change matrix_world once the scene is re-evaluated.
+    if len(constrained_objects) > 0:
+        context.view_layer.update()
+        records['constraint_locations'] = loc_utils.FindWorldSpaceObjectLocations(context, constrained_objects)
+
+    for i, item in enumerate(constrained_objects):
+        object_transform.MoveObjectFailsafe(item, context, Vector(records['true_locations'][i]))
+
+
+@Traced
+def RestoreObjectStates(context, records):
+    """
+    Restores every object state saved with RecordObjectStates.
+    """
+
+    objects = records['objects']
+    collection = GetRecordedObjects(records)
+    constraint_offsets = records['constraint_offsets']
+
+    # Restore constraint object positions and defaults
+    for i, object_index in enumerate(records['constrained_indices']):
+        item = objects[object_index]
+        object_transform.MoveObjectFailsafe(item, context, Vector(records['constraint_locations'][i]))
+
+        start = constraint_offsets[i]
+        end = constraint_offsets[i + 1]
+        item.constraints.foreach_set('mute', records['constraint_mute'][start:end])
+        item.constraints.foreach_set('influence', records['constraint_influence'][start:end])
+    
+    # Restore visibility defaults
+    WriteObjectProperty(collection, 'hide_viewport', 1, records['hide_viewport'])
+    WriteObjectProperty(collection, 'hide_select', 1, records['hide_select'])
+
+    for item, is_selected in zip(objects, records['is_selected'].tolist()):
+        item.select_set(is_selected)
+
+    # Restore transform locks
+    WriteObjectProperty(collection, 'lock_location', 3, records['lock_location'])
+    WriteObjectProperty(collection, 'lock_rotation', 3, records['lock_rotation'])
+    WriteObjectProperty(collection, 'lock_scale', 3, records['lock_scale'])
+
+    # Restore armature modes
+    for object_index, mode in records['armature_modes'].items():
+        object_ops.SwitchObjectMode(mode, objects[object_index])
+
+
+
 # FIXME : Check if needed and/or is working.
+@Traced
 def MuteArmatureConstraints(context):
     """
     Performs two operations together:
@@ -314,11 +537,15 @@ def MuteArmatureConstraints(context):
 
     for item in context.scene.objects:
         if item.type == 'ARMATURE':
-            for bone in item.pose.bones:
+
+            # Read every bone location in the armature at once, rather than one bone at a time.
+            bone_locations = loc_utils.FindWorldSpaceBoneLocations(context, item)
+
+            for bone_index, bone in enumerate(item.pose.bones):
                 i = 0
                 for constraint in bone.constraints:
                     if item not in record['armature_objects']:
-                        true_location = loc_utils.FindWorldSpaceBoneLocation(item, context, bone)
+                        true_location = Vector(bone_locations[bone_index])
                         constraint_location = Vector((bone.location[0], bone.location[1], bone.location[2]))
 
                         entry = {'object_name': item.name, 'bone_name': bone.name, 'true_location': true_location, 'constraint_location': constraint_location}
@@ -342,11 +569,17 @@ def MuteArmatureConstraints(context):
                 constraint.influence = 0.0
 
     # Reset the constraint location now we have a 'true' location
+    # Muted constraints only change bone matrices once the scene is re-evaluated.
+    context.view_layer.update()
+    muted_bone_locations = {}
+
     for entry in record['armature_objects']:
         item = context.scene.objects[entry['object_name']]
-        for bone in item.pose.bones:
-            if bone.name == entry['bone_name']:
-                entry['constraint_location'] = loc_utils.FindWorldSpaceBoneLocation(item, context, bone)
+        if item.name not in muted_bone_locations:
+            muted_bone_locations[item.name] = loc_utils.FindWorldSpaceBoneLocations(context, item)
+        
+        bone_index = item.pose.bones.find(entry['bone_name'])
+        entry['constraint_location'] = Vector(muted_bone_locations[item.name][bone_index])
 
     # Now all problematic constraints have been turned off, we can safely move
     # objects to their initial positions
@@ -359,6 +592,7 @@ def MuteArmatureConstraints(context):
     return record
 
 # FIXME : Check if needed and/or is working.
+@Traced
 def RestoreArmatureConstraints(context, record):
     """
     Restores any armature constraint changes that were made to prepare the scene for export.
@@ -385,215 +619,147 @@ def RestoreArmatureConstraints(context, record):
 
 
 
-def CheckCapsuleErrors(context, target_objects = None, target_collections = None):
-    # Ensures that the scene is setup with correct settings, before proceeding
-    # with the export.
+@Traced
+def ValidateExportTargets(context, target_objects = None, target_collections = None):
+    """
+    Checks export targets for anything that would stop them exporting, collecting every problem in a single pass.
+    If no targets are given, every export-enabled object and collection in the scene is checked.  Only the
+    Location Presets used by the targets are checked, and each one is only checked once.
+
+    Returns a report with 'objects', 'collections' and 'locations' dictionaries that list what has each type
+    of error, the number of errors in 'error_count' and a readable summary in 'message' (None if nothing was wrong).
+    """
 
     preferences = context.preferences
     addon_prefs = preferences.addons['Capsule'].preferences
     cap_file = bpy.data.objects[addon_prefs.default_datablock].CAPFile
-    
-    # TODO: Collect all errors for all objects and select them all at the end
-    # in order to make it easier for people to correct common mistakes.
 
-    # TODO: Find a better way to handle invalid enumerations.
+    if target_objects is None:
+        target_objects = [item for item in context.scene.objects if item.CAPObj.enable_export is True]
+    if target_collections is None:
+        target_collections = [collection for collection in search_utils.GetSceneCollections(context.scene, False)
+            if collection.CAPCol.enable_export is True]
     
-    # TODO: Export Selected doesn't have any impact on this, we should only check
-    # items that are in the export.
-
-    # Check all active file presets for valid directory names
-    # These lists will be analysed later
-    sub_directory_check = []
-    statement = None
-
-    if target_objects == None:
-        target_objects = context.scene.objects
-    if target_collections == None:
-        target_collections = search_utils.GetSceneCollections(context.scene, False)
+    report = {}
+    report['objects'] = {'no_export': [], 'no_location': []}
+    report['collections'] = {'no_export': [], 'no_location': [], 'no_root': []}
+    report['locations'] = {'no_path': [], 'invalid_path': []}
+    report['error_count'] = 0
+    report['message'] = None
+
+    # Location paths only need checking once, no matter how many targets use them.  Presets are keyed by
+    # pointer rather than ID, as presets that haven't been given an ID yet all share the same one.
+    location_checks = set()
+
+    def CheckLocationPreset(location_preset):
+        preset_key = location_preset.as_pointer()
+        if preset_key in location_checks:
+            return
+        
+        location_checks.add(preset_key)
+
+        if location_preset.path == "":
+            report['locations']['no_path'].append(location_preset)
+        
+        # TODO: os.path.isdir breaks on relative paths.
+        elif not os.path.isdir(bpy.path.abspath(location_preset.path)):
+            report['locations']['invalid_path'].append(location_preset)
     
-    # The errors that will be reported back.
-    error_objects = {}
-    error_objects['no_export'] = []
-    error_objects['no_location'] = []
 
     # ////////////////////////////////////////////////
     # OBJECTS
-    
 
-    # Checks for any easily-preventable errors
     for item in target_objects:
-        if item.CAPObj.enable_export is True:
-            cap_obj = item.CAPObj
-            
-            # Check for Valid Presets
-            # EnumProperty types are ints when valid and empty strings when invalid
-            if cap_obj.export_preset == '':
-                error_objects['no_export'].append(item)
-                continue
-            
-            if cap_obj.location_preset == '':
-                error_objects['no_location'].append(item)
-                continue
-            
-            cap_export_enum = int(cap_obj.export_preset)
-            cap_location_enum = int(cap_obj.location_preset)
-            exports_len = len(cap_file.export_presets)
-            locations_len = len(cap_file.location_presets)
-
-            # Check Export Key
-            if cap_export_enum == 0 or cap_export_enum > exports_len:
-                error_objects['no_export'].append(item)
-
-            # Check Location Preset
-            if cap_location_enum == 0 or cap_location_enum > locations_len:
-                error_objects['no_location'].append(item)
-
-
-    # Total up any errors found.
-    max_error_value = 0
-    max_error = ''
-    target_objects = []
-    for k, v in error_objects.items():
-        if (len(v) > max_error_value):
-            max_error_value = len(v)
-            max_error = k
-            target_objects = v
-    
+        cap_obj = item.CAPObj
+        export_preset = preset_utils.FindPreset(cap_file, 'export_preset', cap_obj.export_preset)
+        location_preset = preset_utils.FindPreset(cap_file, 'location_preset', cap_obj.location_preset)
 
-    # If any were found, report the biggest issue and select the objects that had it.
-    if max_error_value > 0:
-        if max_error == 'no_export':
-            statement = "The selected object(s) require a Export Preset to be defined - check the Export Lists to see all missing properties."
+        if export_preset is None:
+            report['objects']['no_export'].append(item)
 
-        elif max_error == 'no_location':
-            statement = "The selected object(s) require a Location Preset to be defined - check the Export Lists to see all missing properties."
-        
-        bpy.ops.object.select_all(action= 'DESELECT')
-
-        for item in target_objects:
-            select_utils.SelectObject(item)
-        
-        return statement
+        if location_preset is None:
+            report['objects']['no_location'].append(item)
+        else:
+            CheckLocationPreset(location_preset)
 
 
     # ////////////////////////////////////////////////
     # COLLECTIONS
 
-    # TODO: The Collection should be selected, not the objects!
-    error_collections = {}
-    error_collections['no_export'] = []
-    error_collections['no_location'] = []
-    error_collections['no_root'] = []
-
-
-    # Check all scene collections for potential errors
     for collection in target_collections:
-        if collection.CAPCol.enable_export is True:
-            cap_col = collection.CAPCol
-
-            # Check Origin Point
-            if cap_col.origin_point == 'Object':
-                if cap_col.root_object is None:
-                    error_collections['no_root'].append(collection)
-
-            # Check for Valid Presets
-            # EnumProperty types are ints when valid and empty strings when invalid
-            if cap_col.export_preset == '':
-                error_collections['no_export'].append(collection)
-                continue
-            
-            if cap_col.location_preset == '':
-                error_collections['no_location'].append(collection)
-                continue
+        cap_col = collection.CAPCol
+        export_preset = preset_utils.FindPreset(cap_file, 'export_preset', cap_col.export_preset)
+        location_preset = preset_utils.FindPreset(cap_file, 'location_preset', cap_col.location_preset)
 
+        if cap_col.origin_point == 'Object' and cap_col.root_object is None:
+            report['collections']['no_root'].append(collection)
 
-            cap_export_enum = int(cap_col.export_preset)
-            cap_location_enum = int(cap_col.location_preset)
-            exports_len = len(cap_file.export_presets)
-            locations_len = len(cap_file.location_presets)
-            
+        if export_preset is None:
+            report['collections']['no_export'].append(collection)
 
-            # Check Export Key
-            if cap_export_enum == 0 or cap_export_enum > exports_len:
-                error_collections['no_export'].append(collection)
+        if location_preset is None:
+            report['collections']['no_location'].append(collection)
+        else:
+            CheckLocationPreset(location_preset)
+    
 
-            # Check Export Location
-            if cap_location_enum <= 0 or cap_location_enum > locations_len:
-                error_collections['no_location'].append(collection)
+    # ////////////////////////////////////////////////
+    # SUMMARY
 
+    statements = []
 
-    # Total up any errors found.
-    max_error_value = 0
-    max_error = ''
-    target_collections = []
-    for k, v in error_collections.items():
-        if (len(v) > max_error_value):
-            max_error_value = len(v)
-            max_error = k
-            target_objects = v
+    if len(report['objects']['no_export']) > 0:
+        statements.append("%s object(s) require an Export Preset to be defined." % (len(report['objects']['no_export'])))
     
+    if len(report['objects']['no_location']) > 0:
+        statements.append("%s object(s) require a Location Preset to be defined." % (len(report['objects']['no_location'])))
 
-    # If any were found, report the biggest issue and select the objects that had it.
-    if max_error_value > 0:
-        if max_error == 'no_root':
-            statement = " % s collection(s) require a Root Object to be defined - check the Export Lists to see all missing properties." % (max_error_value)
+    if len(report['collections']['no_root']) > 0:
+        statements.append("%s collection(s) require a Root Object to be defined." % (len(report['collections']['no_root'])))
 
-        elif max_error == 'no_export':
-            statement = "% s collection(s) require an Export Preset to be defined - check the Export Lists to see all missing properties." % (max_error_value)
+    if len(report['collections']['no_export']) > 0:
+        statements.append("%s collection(s) require an Export Preset to be defined." % (len(report['collections']['no_export'])))
 
-        elif max_error == 'no_location':
-            statement = "% s collection(s) require a Location Preset to be defined - check the Export Lists to see all missing properties." % (max_error_value)
-        
-        return statement
-    
+    if len(report['collections']['no_location']) > 0:
+        statements.append("%s collection(s) require a Location Preset to be defined." % (len(report['collections']['no_location'])))
 
-    # ////////////////////////////////////////////////
-    # PATHS AND DIRECTORIES
+    for location_preset in report['locations']['no_path']:
+        statements.append("The Export Location '" + location_preset.name + "' has no file path.  Please set one before attempting to export.")
 
-    # Check all Location Presets to ensure the chatacters contained are valid.
-    i = 0
-    while i < len(cap_file.location_presets):
-        enumIndex = i
-        enumIndex -= 1
+    for location_preset in report['locations']['invalid_path']:
+        statements.append("The Export Location '" + location_preset.name + "' either points to a file or is a Relative Path that is now incorrect.  Please re-assign the location path.")
 
-        default_file_path = cap_file.location_presets[enumIndex].path
+    for errors in (report['objects'], report['collections'], report['locations']):
+        report['error_count'] += sum(len(v) for v in errors.values())
 
-        if default_file_path == "":
-            statement = "The Export Location '" + cap_file.location_presets[enumIndex].name + "' has no file path.  Please set one before attempting to export."
-            return statement
+    if len(statements) > 0:
+        if len(report['objects']['no_export']) + len(report['objects']['no_location']) \
+                + sum(len(v) for v in report['collections'].values()) > 0:
+            statements.append("Check the Export Lists to see all missing properties.")
         
-        # TODO: os.path.isdir breaks on relative paths.
-        full_path = bpy.path.abspath(default_file_path)
-        print(full_path)
-        if not os.path.isdir(full_path):
-            statement = "The Export Location '" + cap_file.location_presets[enumIndex].name + "' either points to a file or is a Relative Path that is now incorrect.  Please re-assign the location path."
-            return statement
-
-
-        i += 1
-    
-    # # Check all collected sub-directory names for invalid characters if we can't replace them.
-    if addon_prefs.substitute_directories is False:
+        report['message'] = "  ".join(statements)
 
-        for name in sub_directory_check:
+    return report
 
-            result = path_utils.CheckSystemChar(context, name[1])
-            returnStatement = ""
 
-            if len(result) != 0:
-                characterlead = ", is using the invalid file character "
-                end = ".  Please remove the invalid character from the path name."
+def CheckCapsuleErrors(context, target_objects = None, target_collections = None):
+    """
+    Ensures that the scene is setup with correct settings before proceeding with the export.
+    Objects with errors are selected, to make it easier to correct them.
 
-                if len(result) > 1:
-                    characterlead = ", is using the invalid file characters "
-                    end = ".  Please remove the invalid characters from the path name."
+    Returns a statement describing every error found, or None if there weren't any.
+    """
 
-                while len(result) != 0:
-                    text = result.pop()
-                    returnStatement += text + " "
+    report = ValidateExportTargets(context, target_objects, target_collections)
 
-                statement = "The" + name[0] + " " + name[1] + ", belonging to the export, " + name[3] + characterlead + returnStatement + end
-                return statement
+    error_objects = report['objects']['no_export'] + report['objects']['no_location']
+    if len(error_objects) > 0:
 
+        # Deselect through object data, as this can run before the scene is switched to Object Mode.
+        for item in context.selected_objects:
+            item.select_set(False)
 
-    return None
+        for item in error_objects:
+            select_utils.SelectObject(item)
+    
+    return report['message']
@@ -6,6 +6,8 @@
 from re import L
 import bpy
 
+from . import dependencies
+
 # batfinger you legend
 def TraverseCollectionTree(t):
     """
@@ -16,26 +18,117 @@ def TraverseCollectionTree(t):
         yield from TraverseCollectionTree(child)
 
 
-def GetSceneCollections(scene, hasObjects = False):
+# Collection indexes for each scene, which are cleared whenever collections change.
+scene_collection_indexes = {}
+
+
+def GetCollectionFingerprint():
     """
-    Returns all collections that belong to the scene, by searching through all objects belonging in it.
+    Returns a cheap summary of the collections in the file, used to notice collection changes made
+    inside a single operator, where the depsgraph handler that clears the indexes hasn't run yet.
     """
 
-    # batfinger is too good at this
-    #print(bpy.data.collections)
-    collections = [
-        c for c in bpy.data.collections 
-        if bpy.context.scene.user_of_id(c) and
-        (hasObjects is False or len(c.objects) > 0)
-    ]
+    return (len(bpy.data.collections), len(bpy.data.objects))
+
+
+def BuildSceneCollectionIndex(scene):
+    """
+    Builds an index of every collection in the scene with a single traversal of the collection tree.
+
+    Returns a dictionary with a 'collections' list sorted by name, and 'parents', 'children', 'depths' 
+    and 'objects' dictionaries keyed by collection.  Collections linked in more than one place use 
+    the first parent found.
+    """
+
+    index = {}
+    index['collections'] = []
+    index['parents'] = {scene.collection: None}
+    index['children'] = {}
+    index['depths'] = {scene.collection: 0}
+    index['objects'] = {}
+
+    for collection in TraverseCollectionTree(scene.collection):
+        if collection in index['children']:
+            continue
 
-    # bpy.data.collections does not include the top-level collection so we need to include it separately.
-    # TODO: Re-enable when the top-level collection scene issue is fixed.
-    # if hasObjects is False or len(scene.collection.objects > 0):
-    #     collections.insert(0, scene.collection)
+        index['children'][collection] = list(collection.children)
+        index['objects'][collection] = list(collection.objects)
+
+        for child in index['children'][collection]:
+            if child not in index['parents']:
+                index['parents'][child] = collection
+                index['depths'][child] = index['depths'][collection] + 1
+        
+        # The scene collection isn't part of bpy.data.collections, so it isn't included.
+        if collection != scene.collection:
+            index['collections'].append(collection)
+
+    index['collections'].sort(key = lambda c: c.name)
+    return index
+
+
+def GetSceneCollectionIndex(scene):
+    """
+    Returns the collection index for the given scene, building it first if needed or if
+    collections or objects were added or removed since it was built.
+    """
+
+    scene_key = scene.as_pointer()
+    fingerprint = GetCollectionFingerprint()
+    
+    index = scene_collection_indexes.get(scene_key)
+    if index is None or index['fingerprint'] != fingerprint:
+        index = BuildSceneCollectionIndex(scene)
+        index['fingerprint'] = fingerprint
+        scene_collection_indexes[scene_key] = index
     
+    return index
 
-    return collections
+
+def ClearSceneCollectionIndexes():
+    """
+    Clears every cached collection index.  Called whenever collections are changed, a new file is loaded,
+    an export starts or a Pack Script has run.
+    """
+
+    scene_collection_indexes.clear()
+
+
+def GetSceneCollections(scene, hasObjects = False):
+    """
+    Returns all collections that belong to the scene, using the scene's collection index.
+    """
+
+    index = GetSceneCollectionIndex(scene)
+
+    if hasObjects is False:
+        return list(index['collections'])
+
+    return [c for c in index['collections'] if len(index['objects'][c]) > 0]
+
+
+def GetRenderHiddenObjects(context):
+    """
+    Returns a set of every scene object that won't be rendered.  Objects are hidden if they have rendering turned off,
+    or if every collection they belong to is excluded from the view layer or has rendering turned off,
+    including through a parent collection.
+    """
+
+    rendered_objects = set()
+
+    # A single pass through the view layer's collection tree, skipping any branch that is hidden.
+    layer_collections = [context.view_layer.layer_collection]
+    while len(layer_collections) > 0:
+        layer_collection = layer_collections.pop()
+
+        if layer_collection.exclude is True or layer_collection.collection.hide_render is True:
+            continue
+
+        rendered_objects.update(layer_collection.collection.objects)
+        layer_collections += layer_collection.children
+
+    return set(item for item in context.scene.objects 
+        if item.hide_render is True or item not in rendered_objects)
 
 
 def GetEditableCollections(context):
@@ -54,26 +147,32 @@ def GetEditableCollections(context):
 
     return editables
 
-def GetActiveCollection():
+def GetActiveCollection(scene = None, view_layer = None):
     """
     Used when Capsule needs the "most important" active collection in the scene.
+
+    The selection is read from the view layer rather than the screen context, so this also works
+    in timers and handlers.  The current scene and view layer are used if they aren't given.
     """
 
-    context = bpy.context
-    scene = context.scene
-    layer_col_selection = context.layer_collection.collection
+    if scene is None:
+        scene = bpy.context.scene
+    if view_layer is None:
+        view_layer = bpy.context.view_layer
+
+    layer_col_selection = view_layer.active_layer_collection.collection
 
     # The active collection can either be the selection in the outliner
     # OR it can be based on the active object.  Oh No!
     # THIS BEHAVIOUR MUST MATCH GETSELECTEDCOLLECTIONS()
     
-    if len(context.selected_objects) == 0:
+    if len(view_layer.objects.selected) == 0:
         # TODO: Remove this check when the top-level collection can be used again
         if scene.collection != layer_col_selection:
             return layer_col_selection
 
     else:
-        active_obj = context.active_object
+        active_obj = view_layer.objects.active
         target_col = None
         
         if active_obj is not None:
@@ -89,7 +188,7 @@ def GetActiveCollection():
 
             return None
 
-    return bpy.context.layer_collection.collection
+    return layer_col_selection
 
 def GetSelectedCollections():
     """
@@ -194,29 +293,6 @@ def GetCollectionObjectTree(context, collection, collection_children):
     Returns a list of objects that can be exported by the given collection, based on it's child settings.
     """
 
-    # TODO: Ensure that somewhere in our export chain if Filter by Render Visibility is used,
-    # that only objects where the parent collection is not hidden will be exported.
-
-    # Now setup the recursive tree search.
-    def ExportTreeSearch(current_layer, max_layer, current_collection):
-
-        object_list = []
-        
-        # If we've over-extended, return
-        if current_layer >= max_layer and max_layer != -1:
-            return []
-            
-        # If not, add the current objects
-        object_list += current_collection.objects
-
-        # Now search further
-        for new_collection in current_collection.children:
-            new_objects = ExportTreeSearch(current_layer + 1, max_layer, new_collection)
-            object_list += new_objects
-        
-        return object_list
-
-
     object_list = []
 
     if collection_children == "All":
@@ -240,8 +316,24 @@ def GetCollectionObjectTree(context, collection, collection_children):
     if collection_children == "Down 5":
         max_layers = 5
 
+    # Walk down the indexed collection tree, one layer at a time.
+    index = GetSceneCollectionIndex(context.scene)
+    current_layer = [collection]
+
+    for layer in range(0, max_layers):
+        next_layer = []
+
+        for current_collection in current_layer:
+            if current_collection in index['objects']:
+                object_list += index['objects'][current_collection]
+                next_layer += index['children'][current_collection]
+            else:
+                # Collections outside the scene aren't indexed.
+                object_list += current_collection.objects
+                next_layer += current_collection.children
+        
+        current_layer = next_layer
     
-    object_list = ExportTreeSearch(0, max_layers, collection)
     return object_list
 
 
@@ -250,18 +342,7 @@ def GetObjectReferenceTree(target):
     Searches recursively for all objects used by another object until all have been found.
     """
 
-    def recursive_search(objects):
-        for obj in objects:
-            new_objects = [
-                o for o in bpy.data.objects
-                if obj.user_of_id(o) and
-                (o not in objects)
-            ]
-
-            objects += recursive_search(new_objects)
-        return objects
-
-    return recursive_search([target])
+    return dependencies.GetDependencies([target])
 
 
 def FindObjectDependencies(context, targets):
@@ -269,76 +350,4 @@ def FindObjectDependencies(context, targets):
     Returns a list of every unique non-object datablock the target objects use.
     """
 
-    # Object data includes the main datablock that defines
-    # an object (mesh, light, curve, etc)
-    object_data = []
-
-    materials = []
-    actions = []
-    particles = []
-    
-
-    # /////////////////////////
-    # GET UNIQUE OBJECT DATA
-    object_data = set(o.data for o in targets)
-    print(object_data)
-
-
-    # /////////////////////////
-    # GET MATERIALS
-    # The first one is a nested list comprehension, the second flattens nested arrays
-    # and gets the unique values using set()
-    materials = [[slot.material for slot in o.material_slots] 
-                 for o in targets]
-    
-
-    # GET MODIFIER DEPENDENCIES
-    for target in targets:
-        for mod in target.modifiers:
-                        # This needs to intercept both inputs and outputs
-            if mod.type == "NODES":
-
-                if mod.node_group is None:
-                    continue
-                
-                # We first need the NodeSocket types for the input nodes.
-                # the NodeGroup won't give us the set values, just the data layout.
-                input_node = next((node for node in mod.node_group.nodes if node.type == 'GROUP_INPUT'), None)
-                input_props = [prop for prop in input_node.outputs 
-                               if prop.type is not 'GEOMETRY']
-                input_prop_ids = [prop_id for prop_id in mod.keys()
-                        if (prop_id.startswith("Input_") and prop_id[-1].isdigit())]
-                
-                print([prop.type for prop in input_props])
-                
-                i = 0
-                node_mats = []
-                print(input_props)
-                print(input_prop_ids)
-                while i < len(input_props) - 1:
-                    if input_props[i].type == 'MATERIAL':
-                        node_mats.append(mod[input_prop_ids[i]])
-                    i += 1
-
-                materials += node_mats
-                print(node_mats)
-
-            else:
-                materials += [p for p in mod.bl_rna.properties 
-                              if p.type is 'MATERIAL' and not p.is_hidden and not p.is_readonly]
-                
-        # This was a nice bit of code but I can't use it </3
-        # materials += [[p for p in modifier.bl_rna.properties 
-        #                 if p.type is 'MATERIAL' and not p.is_hidden and not p.is_readonly]
-        #                 for modifier in target.modifiers if modifier.type is not 'NODES']
-                        
-
-    # Collapse and create unique lists
-    materials = set(i for j in materials for i in j)
-    print(materials)
-
-    # FIND MATERIALS IN MODIFIERS
-    
-
-
-
+    return dependencies.GetDataDependencies(targets)
@@ -0,0 +1,151 @@
+# ///////////////////////////////////////////////////////////////////
+# Records nested timing spans and saves them as Chrome trace events.
+# ///////////////////////////////////////////////////////////////////
+
+import functools, json, os, threading, time
+
+from contextlib import contextmanager
+
+
+# The trace currently being recorded, if any.  Spans do nothing while this is None.
+active_trace = None
+
+
+def StartTrace(name):
+    """
+    Starts recording a new trace, replacing any that was already being recorded.
+    Returns the trace.
+    """
+
+    global active_trace
+
+    active_trace = {}
+    active_trace['name'] = name
+    active_trace['start'] = time.perf_counter()
+    active_trace['events'] = []
+    active_trace['stack'] = []
+    active_trace['pid'] = os.getpid()
+    active_trace['tid'] = threading.get_ident()
+
+    return active_trace
+
+
+def StopTrace():
+    """
+    Stops recording the current trace, closing any spans left open.
+    Returns the trace, or None if nothing was being recorded.
+    """
+
+    global active_trace
+
+    trace = active_trace
+    if trace is not None:
+        while len(trace['stack']) > 0:
+            EndSpan()
+
+    active_trace = None
+    return trace
+
+
+def IsTracing():
+    """
+    Returns True if a trace is being recorded.
+    """
+
+    return active_trace is not None
+
+
+def BeginSpan(name, category = 'export', **args):
+    """
+    Opens a new span inside the current one.  Any arguments are shown alongside the span in trace viewers.
+    Returns the span arguments so more can be added before it ends, or None if nothing is being recorded.
+    """
+
+    if active_trace is None:
+        return None
+
+    span = {}
+    span['name'] = name
+    span['cat'] = category
+    span['start'] = time.perf_counter()
+    span['args'] = args
+    active_trace['stack'].append(span)
+
+    return span['args']
+
+
+def EndSpan(**args):
+    """
+    Closes the most recently opened span, adding any given arguments to it.
+    """
+
+    if active_trace is None or len(active_trace['stack']) == 0:
+        return
+
+    span = active_trace['stack'].pop()
+    span['args'].update(args)
+    end = time.perf_counter()
+
+    # Times are stored in microseconds from the start of the trace.
+    active_trace['events'].append({
+        'name': span['name'],
+        'cat': span['cat'],
+        'ph': 'X',
+        'ts': (span['start'] - active_trace['start']) * 1000000,
+        'dur': (end - span['start']) * 1000000,
+        'pid': active_trace['pid'],
+        'tid': active_trace['tid'],
+        'args': span['args'],
+    })
+
+
+@contextmanager
+def Span(name, category = 'export', **args):
+    """
+    Records everything inside a with block as a single span.  Any spans opened inside the block
+    and left open, such as by an early return, are closed with it.
+    """
+
+    if active_trace is None:
+        yield {}
+        return
+
+    trace = active_trace
+    depth = len(trace['stack'])
+    span_args = BeginSpan(name, category, **args)
+
+    try:
+        yield span_args
+    finally:
+        while active_trace is trace and len(trace['stack']) > depth:
+            EndSpan()
+
+
+def Traced(function):
+    """
+    A decorator that records every call to a function as a span named after it.
+    """
+
+    @functools.wraps(function)
+    def TracedFunction(*args, **kwargs):
+        if active_trace is None:
+            return function(*args, **kwargs)
+
+        with Span(function.__name__, 'function'):
+            return function(*args, **kwargs)
+
+    return TracedFunction
+
+
+def WriteTrace(trace, file_path):
+    """
+    Writes a trace as Chrome trace event JSON, which can be opened with chrome://tracing or Perfetto.
+    """
+
+    events = []
+    events.append({'name': 'process_name', 'ph': 'M', 'pid': trace['pid'], 'tid': trace['tid'],
+        'args': {'name': trace['name']}})
+    events += sorted(trace['events'], key = lambda event: event['ts'])
+
+    with open(file_path, 'w') as trace_file:
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, trace_file)
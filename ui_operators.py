@@ -10,6 +10,8 @@ from bpy.props import IntProperty, BoolProperty, FloatProperty, EnumProperty, Po
 from .tk_utils import search as search_utils
 from .tk_utils import select as select_utils
 from .tk_utils import object_ops
+from .tk_utils import presets as preset_utils
+from .update import update_list
 from .export_formats import CAP_ExportFormat
 from . import export_presets
 
@@ -31,6 +33,7 @@ class CAPSULE_OT_Add_Path(Operator):
         newPath = cap_file.location_presets.add()
         newPath.name = "Location " + str(len(cap_file.location_presets))
         newPath.path = ""
+        preset_utils.AssignPresetID(cap_file.location_presets, newPath)
 
         # Position the index to the current location of the
         #count = 0
@@ -59,25 +62,10 @@ class CAPSULE_OT_Delete_Path(Operator):
 
         preset_index = cap_file.location_presets_listindex
 
-        # Ensure that any objects with a matching preset are set to None.
-        # The index needs increasing by one as it doesnt include 'None'
-        objects = bpy.data.objects
-        for obj in objects:
-            cap_obj = obj.CAPObj
-            if cap_obj.location_preset == str(preset_index + 1):
-                cap_obj.location_preset = '0'
-
-        collections = search_utils.GetSceneCollections(context.scene, False)
-        for collection in collections:
-            cap_col = collection.CAPCol
-            if cap_col.location_preset == str(preset_index + 1):
-                cap_col.location_preset = '0'
-        
+        # Any objects and collections with a matching preset are set to None before it's removed.
+        # Presets are referred to by ID, so nothing else needs changing.
         # TODO: Ensure the selection interface is updated so it gets the new value!
-        # TODO: Ensure this is as efficient as it can be for large scenes
-        
-        # Once everything has been set, remove it.
-        cap_file.location_presets.remove(preset_index)
+        preset_utils.RemovePreset(cap_file, 'location_preset', preset_index)
 
         # ensure the selected list index is within the list bounds
         if len(cap_file.location_presets) > 0:
@@ -148,15 +136,6 @@ class CAPSULE_OT_Add_Export(Operator):
     bl_idname = "scene.cap_addexport"
     bl_label = "Add"
 
-    def get_unique_id(self, context, cap_file):
-        newID = random.randrange(0, 1000000)
-
-        for preset in cap_file.export_presets:
-            if preset.instance_id == newID:
-                newID = self.get_unique_id(context, cap_file)
-
-        return newID
-
     def execute(self, context):
         #print(self)
 
@@ -169,6 +148,7 @@ class CAPSULE_OT_Add_Export(Operator):
         newDefault = cap_file.export_presets.add()
         newDefault.name = "Export " + str(len(cap_file.export_presets))
         newDefault.path = ""
+        preset_utils.AssignPresetID(cap_file.export_presets, newDefault)
 
         # Ensure the tag index keeps within a window
         cap_file.export_presets_listindex = len(cap_file.export_presets) - 1
@@ -208,25 +188,10 @@ class CAPSULE_OT_Delete_Export(Operator):
 
         preset_index = cap_file.export_presets_listindex
 
-        # Ensure that any objects with a matching preset are set to None.
-        # The index needs increasing by one as it doesnt include 'None'
-        objects = bpy.data.objects
-        for obj in objects:
-            cap_obj = obj.CAPObj
-            if cap_obj.export_preset == str(preset_index + 1):
-                cap_obj.export_preset = '0'
-
-        collections = search_utils.GetSceneCollections(context.scene, False)
-        for collection in collections:
-            cap_col = collection.CAPCol
-            if cap_col.export_preset == str(preset_index + 1):
-                cap_col.export_preset = '0'
-        
+        # Any objects and collections with a matching preset are set to None before it's removed.
+        # Presets are referred to by ID, so nothing else needs changing.
         # TODO: Ensure the selection interface is updated so it gets the new value!
-        # TODO: Ensure this is as efficient as it can be for large scenes
-        
-        # Once everything has been set, remove it.
-        cap_file.export_presets.remove(preset_index)
+        preset_utils.RemovePreset(cap_file, 'export_preset', preset_index)
 
         # ensure the selected list index is within the list bounds
         if cap_file.export_presets_listindex > 0:
@@ -260,11 +225,13 @@ class CAPSULE_OT_Clear_List(Operator):
                 col.enable_export = False
                 col.in_export_list = False
             scn.collection_list.clear()
+        
+        update_list.ClearExportListIndexes(context.scene)
 
         return {'FINISHED'}
 
 class CAPSULE_OT_Refresh_List(Operator):
-    """Refresh the list of objects or collections marked for export in the scene.  In most cases Capsule can keep track of changes in the scene automatically"""
+    """Refresh the list of objects or collections marked for export in the scene.  Capsule keeps track of changes in the scene automatically, so this is only needed if the list gets out of sync"""
 
     bl_idname = "scene.cap_refreshlist"
     bl_label = "Refresh"
@@ -292,6 +259,8 @@ class CAPSULE_OT_Refresh_List(Operator):
                         entry = scn.collection_list.add()
                         entry.collection = collection
                         entry.enable_export = collection.CAPCol.enable_export
+        
+        update_list.ClearExportListIndexes(context.scene)
 
         return {'FINISHED'}
 
@@ -389,6 +358,7 @@ class CAPSULE_OT_Create_ExportData(Operator):
             default_datablock.hide_render = True
             default_datablock.hide_select = True
             default_datablock.CAPFile.is_storage_object = True
+            default_datablock.CAPFile.preset_id_version = preset_utils.PRESET_ID_VERSION
             addon_prefs.data_missing = False
 
             context.view_layer.objects.active = prev_active_object
@@ -436,6 +406,9 @@ class CAPSULE_OT_Add_Stored_Presets(Operator):
         new_preset = cap_file.export_presets.add()
         export_presets.CopyPreset(addon_prefs.saved_export_presets[addon_prefs.saved_export_presets_index], new_preset)
 
+        # The stored preset may have brought an ID with it that's already used in this file.
+        preset_utils.AssignPresetID(cap_file.export_presets, new_preset)
+
         return {'FINISHED'}
 
 class CAPSULE_OT_Delete_Presets(Operator):
@@ -452,6 +425,7 @@ class CAPSULE_OT_Delete_Presets(Operator):
 
         # Obtain the selected preset
         addon_prefs.saved_export_presets.remove(addon_prefs.saved_export_presets_index)
+        preset_utils.InvalidatePresetEnumItems()
 
         # Decrement the list selection
         if addon_prefs.saved_export_presets_index > 0:
@@ -487,6 +461,7 @@ class CAPSULE_OT_Store_Presets(Operator):
         # Obtain the selected preset
         new_preset = addon_prefs.saved_export_presets.add()
         export_presets.CopyPreset(cap_file.export_presets[cap_file.export_presets_listindex], new_preset)
+        preset_utils.InvalidatePresetEnumItems()
 
         return {'FINISHED'}
 
@@ -2,7 +2,6 @@
 import bpy, bmesh, time
 from math import *
 
-from .update_list import UpdateCollectionList
 from ..tk_utils import search as search_utils
 
 # COLLECTION DATA PROXY PROPERTIES
@@ -34,7 +33,6 @@ def CAP_Update_ProxyCol_EnableExport(self, context):
         if collection is not None:
             # print(collection)
             collection.CAPCol.enable_export = value
-            UpdateCollectionList(context.scene, collection, value)
 
     return None
 
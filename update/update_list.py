@@ -4,6 +4,133 @@ from math import *
 from ..tk_utils import select as select_utils
 from ..tk_utils import object_ops
 
+# EXPORT LIST INDEXES
+# /////////////////////////////////////////////////
+# /////////////////////////////////////////////////
+
+# The list item property that points to the object or collection, for each Export List.
+EXPORT_LIST_TARGETS = {
+    'object_list': 'object',
+    'collection_list': 'collection',
+}
+
+# Maps the objects and collections in each Export List to their list positions, keyed by the scene pointer
+# and list name.  Indexes are built when first needed, kept up to date as entries are added and cleared 
+# whenever entries are removed or the file changes underneath them (such as after an undo).
+export_list_indexes = {}
+
+
+def GetExportListIndex(scene, list_name):
+    """
+    Returns the index for an Export List, building it if needed.
+    """
+
+    export_list = getattr(scene.CAPScn, list_name)
+    index_key = (scene.as_pointer(), list_name)
+    index = export_list_indexes.get(index_key)
+
+    # Lists can also be changed outside of Capsule, so the length is checked to catch that.
+    if index is None or index['length'] != len(export_list):
+        target_attribute = EXPORT_LIST_TARGETS[list_name]
+        items = {}
+        for i, item in enumerate(export_list):
+            target = getattr(item, target_attribute)
+            if target is not None:
+                items[target.as_pointer()] = i
+        
+        index = {}
+        index['length'] = len(export_list)
+        index['items'] = items
+        export_list_indexes[index_key] = index
+    
+    return index
+
+
+def FindExportListItem(scene, list_name, target):
+    """
+    Finds the position of an object or collection in an Export List.
+    Returns None if it isn't in the list.
+    """
+
+    export_list = getattr(scene.CAPScn, list_name)
+    index = GetExportListIndex(scene, list_name)
+    i = index['items'].get(target.as_pointer())
+
+    if i is None:
+        return None
+
+    # If the entry doesn't match, the index is out of date and needs rebuilding.
+    if i >= len(export_list) or getattr(export_list[i], EXPORT_LIST_TARGETS[list_name]) != target:
+        ClearExportListIndexes(scene)
+        index = GetExportListIndex(scene, list_name)
+        i = index['items'].get(target.as_pointer())
+    
+    return i
+
+
+def AddExportListItem(scene, list_name, target):
+    """
+    Adds an object or collection to the end of an Export List, keeping the list index up to date.
+    Returns the new list entry.
+    """
+
+    export_list = getattr(scene.CAPScn, list_name)
+    index = GetExportListIndex(scene, list_name)
+
+    entry = export_list.add()
+    setattr(entry, EXPORT_LIST_TARGETS[list_name], target)
+
+    index['items'][target.as_pointer()] = len(export_list) - 1
+    index['length'] = len(export_list)
+
+    return entry
+
+
+def ClearExportListIndexes(scene = None):
+    """
+    Clears the Export List indexes for the given scene, or for every scene if none is given.
+    This needs to be called whenever list entries are removed or reordered.
+    """
+
+    if scene is None:
+        export_list_indexes.clear()
+        return
+    
+    scene_pointer = scene.as_pointer()
+    for list_name in EXPORT_LIST_TARGETS:
+        export_list_indexes.pop((scene_pointer, list_name), None)
+
+
+def RemoveDeletedExportListItems(scene):
+    """
+    Removes any Export List entries whose object or collection has been deleted.
+    Returns True if anything was removed.
+    """
+
+    scn = scene.CAPScn
+    removed = False
+
+    for list_name, target_attribute in EXPORT_LIST_TARGETS.items():
+        export_list = getattr(scn, list_name)
+
+        # Removed in reverse so the remaining positions don't shift.
+        for i in reversed(range(len(export_list))):
+            if getattr(export_list[i], target_attribute) is None:
+                export_list.remove(i)
+                removed = True
+    
+    if removed is True:
+        ClearExportListIndexes(scene)
+
+        if scn.object_list_index >= len(scn.object_list):
+            scn.object_list_index = max(len(scn.object_list) - 1, 0)
+        if scn.collection_list_index >= len(scn.collection_list):
+            scn.collection_list_index = max(len(scn.collection_list) - 1, 0)
+    
+    return removed
+
+
+
 # OBJECT LIST PROPERTIES
 # /////////////////////////////////////////////////
 # /////////////////////////////////////////////////
@@ -21,23 +148,36 @@ def UpdateObjectList(scene, object, enableExport):
         return
 
     # Check a list entry for the object doesn't already exist.
-    for item in scene.CAPScn.object_list:
-        if item.object.name == object.name:
-            #print("Changing", object.name, "'s export from list.'")
+    i = FindExportListItem(scene, 'object_list', object)
+    if i is not None:
+        #print("Changing", object.name, "'s export from list.'")
+        item = scn.object_list[i]
+        if item.enable_export != enableExport:
             item.enable_export = enableExport
-            return
+        return
 
     # If an entry couldn't be found in the list, add it.
     if enableExport is True:
         #print("Adding", object.name, "to list.")
-        entry = scn.object_list.add()
-        entry.object = object
+        entry = AddExportListItem(scene, 'object_list', object)
         entry.enable_export = enableExport
 
         object.CAPObj.in_export_list = True
 
     return None
 
+
+def CAP_Update_ObjectEnableExport(self, context):
+    """
+    Keeps the Export List in sync with an object's "Enable Export" status, wherever it was changed from.
+    """
+
+    if context.scene is None:
+        return None
+
+    UpdateObjectList(context.scene, self.id_data, self.enable_export)
+    return None
+
 def CAP_Update_FocusObject(self, context):
     """
     Focuses the camera to a particular object, ensuring the object is clearly within the camera frame.  
@@ -78,7 +218,8 @@ def CAP_Update_ObjectListExport(self, context):
     Note - Do not use this in any other place apart from when an object is represented in a list.
     """
 
-    self.object.CAPObj.enable_export = self.enable_export
+    if self.object.CAPObj.enable_export != self.enable_export:
+        self.object.CAPObj.enable_export = self.enable_export
     
     # TODO / WARNING
     # If the object is the active selection we should really change the proxy so it fits right?
@@ -109,14 +250,19 @@ def CAP_Update_ObjectListRemove(self, context):
         self.object.CAPObj.in_export_list = False
     
     # Find the index and remove it from the list
-    # TODO: There's probably a more efficient way right?
     i = None
-    try:
-        i = object_list.values().index(self)
-        object_list.remove(i)
-
-    except ValueError:
-        return
+    if self.object is not None:
+        i = FindExportListItem(context.scene, 'object_list', self.object)
+
+    # Deleted objects aren't in the index, so they have to be searched for.
+    if i is None:
+        try:
+            i = object_list.values().index(self)
+        except ValueError:
+            return
+    
+    object_list.remove(i)
+    ClearExportListIndexes(context.scene)
     
     # If the index is more than the list, bring it down one
     if scn.object_list_index > i:
@@ -139,24 +285,37 @@ def UpdateCollectionList(scene, collection, enableExport):
     """
     scn = scene.CAPScn
 
-    # Check a list entry for the collection doesn't already exist.
+    if collection is None:
+        return
 
-    for item in scene.CAPScn.collection_list:
-        if item:
-            if item.collection:
-                if item.collection.name == collection.name:
-                    #print("Changing", collection.name, "'s export from list.'")
-                    item.enable_export = enableExport
-                    return
+    # Check a list entry for the collection doesn't already exist.
+    i = FindExportListItem(scene, 'collection_list', collection)
+    if i is not None:
+        #print("Changing", collection.name, "'s export from list.'")
+        item = scn.collection_list[i]
+        if item.enable_export != enableExport:
+            item.enable_export = enableExport
+        return
 
     if enableExport is True:
         #print("Adding", collection.name, "to list.")
-        entry = scn.collection_list.add()
-        entry.collection = collection
+        entry = AddExportListItem(scene, 'collection_list', collection)
         entry.enable_export = enableExport
         collection.CAPCol.in_export_list = True
 
 
+def CAP_Update_CollectionEnableExport(self, context):
+    """
+    Keeps the Export List in sync with a collection's "Enable Export" status, wherever it was changed from.
+    """
+
+    if context.scene is None:
+        return None
+
+    UpdateCollectionList(context.scene, self.id_data, self.enable_export)
+    return None
+
+
 def CAP_Update_FocusCollection(self, context):
 
     """
@@ -198,7 +357,8 @@ def CAP_Update_CollectionListExport(self, context):
     Note - Do not use this in any other place apart from when an object is represented in a list.
     """
 
-    self.collection.CAPCol.enable_export = self.enable_export
+    if self.collection.CAPCol.enable_export != self.enable_export:
+        self.collection.CAPCol.enable_export = self.enable_export
     return None
 
 
@@ -219,24 +379,26 @@ def CAP_Update_CollectionListRemove(self, context):
     # if self is None or self.collection is None:
 
 
-    for item in scn.collection_list:
-        if item.collection is not None:
-            if item.collection.name == self.collection.name:
+    if self.collection is None:
+        return
 
-                self.collection.CAPCol.enable_export = False
-                self.collection.CAPCol.in_export_list = False
+    i = FindExportListItem(context.scene, 'collection_list', self.collection)
+    if i is None:
+        return
 
-                # Whether or not we find a successful match in the scene,
-                # remove it from the list
-                context.scene.CAPScn.collection_list.remove(i)
+    self.collection.CAPCol.enable_export = False
+    self.collection.CAPCol.in_export_list = False
 
-                # If the index is more than the list, bring it down one
-                # to ensure a list item gets selected
-                scn.collection_list_index = i
+    # Whether or not we find a successful match in the scene,
+    # remove it from the list
+    scn.collection_list.remove(i)
+    ClearExportListIndexes(context.scene)
 
-                if i == (backupListLength - 1):
-                    scn.collection_list_index = i - 1
+    # If the index is more than the list, bring it down one
+    # to ensure a list item gets selected
+    scn.collection_list_index = i
 
-                return
+    if i == (backupListLength - 1):
+        scn.collection_list_index = i - 1
 
-            i += 1
\ No newline at end of file
+    return
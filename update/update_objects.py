@@ -2,7 +2,7 @@
 import bpy, bmesh, time
 from math import *
 
-from .update_list import UpdateObjectList
+from ..tk_utils import presets as preset_utils
 
 # OBJECT DATA PROXY PROPERTIES
 # /////////////////////////////////////////////////
@@ -32,8 +32,8 @@ def FindEditableObjects(context):
 def CAP_Update_ProxyObj_EnableExport(self, context):
     """
     Updates the "Enable Export" property for all selected objects
-    Note - This should only be used from the Enable Export UI tick, otherwise manually handle "Enable Export" status 
-    assignment using "UpdateObjectList"
+    Note - This should only be used from the Enable Export UI tick.  The Export List is kept in sync by the 
+    "Enable Export" property itself.
     """
 
     preferences = context.preferences
@@ -51,7 +51,6 @@ def CAP_Update_ProxyObj_EnableExport(self, context):
     # Run through any collected objects to also update them.
     for item in collected:
         item.CAPObj.enable_export = value
-        UpdateObjectList(context.scene, item, value)
 
 
     return None
@@ -171,4 +170,25 @@ def CAP_Update_ProxyObj_PackScript(self, context):
     return None
 
 
+# PRESET USERS
+# /////////////////////////////////////////////////
+# /////////////////////////////////////////////////
+
+def CAP_Update_LocationPresetUser(self, context):
+    """
+    Keeps track of the objects and collections that use each Location Preset, so they can be found quickly
+    when a preset is deleted.
+    """
+
+    preset_utils.RecordPresetUser(self.id_data, 'location_preset', self.location_preset)
+    return None
+
+
+def CAP_Update_ExportPresetUser(self, context):
+    """
+    Keeps track of the objects and collections that use each Export Preset, so they can be found quickly
+    when a preset is deleted.
+    """
 
+    preset_utils.RecordPresetUser(self.id_data, 'export_preset', self.export_preset)
+    return None
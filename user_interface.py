@@ -214,6 +214,10 @@ class CAPSULE_PT_Selection(Panel):
         except KeyError:
             Draw_CreateCapsuleData(layout)
             return
+        
+        if context.scene.CAPStatus.is_exporting is True:
+            Draw_ExportProgress(layout, context.scene.CAPStatus)
+            return
 
         if scn.is_pack_script_scene == True:
             self.draw_pack_script(context, layout)
@@ -533,6 +537,10 @@ class CAPSULE_PT_List(Panel):
         except KeyError:
             Draw_CreateCapsuleData(layout)
             return
+        
+        if context.scene.CAPStatus.is_exporting is True:
+            Draw_ExportProgress(layout, context.scene.CAPStatus)
+            return
 
         list_tab = int(str(scn.list_switch))
 
@@ -707,3 +715,26 @@ def Draw_CreateCapsuleData(layout):
     col_export.operator("cap.exportdata_create")
     col_export.separator()
     return
+
+
+def Draw_ExportProgress(layout, export_status):
+
+    # Shows the progress of an export running in the background, in place of the usual panel contents.
+    col_export = layout.column(align= True)
+    col_export.label(text= "Exporting " + str(export_status.export_index + 1) + " of " 
+        + str(export_status.export_count) + "...", icon = "EXPORT")
+    col_export.label(text= export_status.target_name)
+    col_export.separator()
+
+    progress_bar = col_export.row(align= True)
+    progress_bar.enabled = False
+    progress_bar.prop(export_status, "export_progress", text= "", slider= True)
+    col_export.separator()
+
+    if export_status.time_remaining >= 0:
+        col_export.label(text= "About " + str(int(export_status.time_remaining + 0.5)) + " seconds remaining")
+    else:
+        col_export.label(text= "Estimating time remaining...")
+    
+    col_export.label(text= "Press Esc to cancel.")
+    return